@@ -0,0 +1,220 @@
+import os
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytz
+from supabase_client import supabase
+from pagination import iter_rows
+from shoe_lookup import fetch_shoes_by_ids
+from cache import TTLCache
+
+WITA = pytz.timezone('Asia/Makassar')
+
+# Status payment yang dihitung sebagai pendapatan yang sudah dibayar
+PAID_PAYMENT_STATUSES = [s.strip().lower() for s in os.environ.get('PAID_PAYMENT_STATUSES', 'paid,completed,success').split(',')]
+# Rollup hari yang sudah lewat di-cache selama ini (hari ini selalu dihitung ulang)
+ANALYTICS_CLOSED_DAY_TTL = int(os.environ.get('ANALYTICS_CLOSED_DAY_TTL', 86400))
+# Batas panjang rentang tanggal per request
+MAX_ANALYTICS_DAYS = int(os.environ.get('MAX_ANALYTICS_DAYS', 366))
+
+day_cache = TTLCache(max_size=4 * MAX_ANALYTICS_DAYS, ttl=ANALYTICS_CLOSED_DAY_TTL)
+
+METRICS = ['orders', 'units', 'revenue', 'paid_revenue', 'cancelled_orders']
+FUNNEL = ['view_users', 'cart_users', 'order_users', 'views', 'carts', 'order_events']
+
+
+def today_wita():
+    return datetime.now(WITA).date()
+
+
+def invalidate_sales_day(day):
+    """Hapus rollup satu hari dari cache (mis. status order di hari itu berubah)."""
+    day_cache.invalidate(str(day)[:10])
+
+
+def _fetch_orders(start, end):
+    query = lambda: supabase.table('order') \
+        .select('order_id,user_id,shoe_detail_id,order_date,amount,order_status,payment(payment_status)') \
+        .gte('order_date', start.isoformat()).lte('order_date', end.isoformat())
+    return list(iter_rows(query, 'order_id'))
+
+
+def _fetch_interactions(start, end):
+    # Batas hari dalam WITA, dikirim sebagai timestamp dengan offset
+    start_at = WITA.localize(datetime.combine(start, datetime.min.time())).isoformat()
+    end_at = WITA.localize(datetime.combine(end + timedelta(days=1), datetime.min.time())).isoformat()
+    query = lambda: supabase.table('user_interaction') \
+        .select('interaction_id,id_user,shoe_detail_id,interaction_type,interaction_date') \
+        .gte('interaction_date', start_at).lt('interaction_date', end_at)
+    return list(iter_rows(query, 'interaction_id'))
+
+
+def _fetch_shoes(shoe_ids):
+    # Hanya sepatu yang muncul di order rentang ini (batch in_() lewat shoe_cache)
+    shoes = fetch_shoes_by_ids(shoe_ids)
+    return pd.DataFrame([{'shoe_detail_id': shoe_id, 'category_id': row.get('category_id'), 'shoe_price': row.get('shoe_price')}
+                         for shoe_id, row in shoes.items()],
+                        columns=['shoe_detail_id', 'category_id', 'shoe_price'])
+
+
+def _empty_rollup(day):
+    return dict({metric: 0 for metric in METRICS}, **{key: 0 for key in FUNNEL},
+                date=day.isoformat(), by_category={}, by_shoe={})
+
+
+def _group_metrics(frame, key):
+    grouped = frame.groupby(key).agg(orders=('order_id', 'size'), units=('units', 'sum'), revenue=('revenue', 'sum'))
+    return {int(k): {'orders': int(row.orders), 'units': int(row.units), 'revenue': round(float(row.revenue), 2)}
+            for k, row in grouped.iterrows()}
+
+
+def compute_daily_rollups(start, end):
+    """Rollup per hari untuk [start, end] langsung dari database (tanpa cache)."""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    rollups = {day.isoformat(): _empty_rollup(day) for day in days}
+
+    orders = pd.DataFrame(_fetch_orders(start, end),
+                          columns=['order_id', 'user_id', 'shoe_detail_id', 'order_date', 'amount', 'order_status', 'payment'])
+    if not orders.empty:
+        shoes = _fetch_shoes(orders['shoe_detail_id'].dropna().unique().tolist())
+        orders = orders.merge(shoes, on='shoe_detail_id', how='left')
+        orders['day'] = orders['order_date'].astype(str).str[:10]
+        orders['amount'] = orders['amount'].astype(float)
+        cancelled = orders['order_status'].astype(str).str.lower().eq('cancelled').to_numpy()
+        # payment berupa list (relasi one-to-many) atau None
+        payment_status = orders['payment'].map(
+            lambda p: str((p[0] if isinstance(p, list) and p else p or {}).get('payment_status', '')).lower())
+        paid = payment_status.isin(PAID_PAYMENT_STATUSES).to_numpy() & ~cancelled
+
+        # Tabel order tidak menyimpan quantity: diperkirakan dari amount / harga sepatu saat ini
+        price = orders['shoe_price'].astype(float).to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            units = np.where(price > 0, np.rint(orders['amount'].to_numpy() / price), 1)
+        orders['units'] = np.where(cancelled, 0, np.maximum(units, 1)).astype(np.int64)
+        orders['revenue'] = np.where(cancelled, 0.0, orders['amount'].to_numpy())
+        orders['paid_revenue'] = np.where(paid, orders['amount'].to_numpy(), 0.0)
+        orders['cancelled'] = cancelled.astype(np.int64)
+
+        daily = orders.groupby('day').agg(
+            orders=('order_id', 'size'), units=('units', 'sum'), revenue=('revenue', 'sum'),
+            paid_revenue=('paid_revenue', 'sum'), cancelled_orders=('cancelled', 'sum'))
+        active = orders[~cancelled]
+        for day, row in daily.iterrows():
+            rollup = rollups.get(day)
+            if rollup is None:
+                continue
+            rollup.update({
+                'orders': int(row.orders) - int(row.cancelled_orders),
+                'units': int(row.units),
+                'revenue': round(float(row.revenue), 2),
+                'paid_revenue': round(float(row.paid_revenue), 2),
+                'cancelled_orders': int(row.cancelled_orders)
+            })
+        for day, frame in active.groupby('day'):
+            if day in rollups:
+                rollups[day]['by_category'] = _group_metrics(frame.dropna(subset=['category_id']), 'category_id')
+                rollups[day]['by_shoe'] = _group_metrics(frame, 'shoe_detail_id')
+
+    interactions = pd.DataFrame(_fetch_interactions(start, end),
+                                columns=['interaction_id', 'id_user', 'shoe_detail_id', 'interaction_type', 'interaction_date'])
+    if not interactions.empty:
+        local = pd.to_datetime(interactions['interaction_date'], utc=True, format='ISO8601').dt.tz_convert(WITA)
+        interactions['day'] = local.dt.strftime('%Y-%m-%d')
+        counts = interactions.pivot_table(index='day', columns='interaction_type', values='interaction_id',
+                                          aggfunc='count', fill_value=0)
+        users = interactions.pivot_table(index='day', columns='interaction_type', values='id_user',
+                                         aggfunc='nunique', fill_value=0)
+        for day in counts.index:
+            rollup = rollups.get(day)
+            if rollup is None:
+                continue
+            rollup.update({
+                'views': int(counts.loc[day].get('view', 0)),
+                'carts': int(counts.loc[day].get('cart', 0)),
+                'order_events': int(counts.loc[day].get('order', 0)),
+                'view_users': int(users.loc[day].get('view', 0)),
+                'cart_users': int(users.loc[day].get('cart', 0)),
+                'order_users': int(users.loc[day].get('order', 0))
+            })
+    return rollups
+
+
+def get_daily_rollups(start, end):
+    """Rollup per hari; hari yang sudah lewat diambil dari cache, sisanya dihitung dalam satu rentang."""
+    keys = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    found, missing = day_cache.get_many(keys)
+    if missing:
+        computed = compute_daily_rollups(date.fromisoformat(missing[0]), date.fromisoformat(missing[-1]))
+        today = today_wita().isoformat()
+        for key in missing:
+            found[key] = computed[key]
+            if key < today:
+                day_cache.set(key, computed[key])
+    return [found[key] for key in keys]
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def _with_conversion(row):
+    row['view_to_cart'] = _ratio(row['cart_users'], row['view_users'])
+    row['cart_to_order'] = _ratio(row['order_users'], row['cart_users'])
+    row['view_to_order'] = _ratio(row['order_users'], row['view_users'])
+    return row
+
+
+def _merge_groups(rollups, field):
+    merged = {}
+    for rollup in rollups:
+        for key, values in rollup[field].items():
+            target = merged.setdefault(int(key), {'orders': 0, 'units': 0, 'revenue': 0.0})
+            for metric in target:
+                target[metric] += values[metric]
+    return merged
+
+
+def sales_report(start, end, granularity='day', top_n=20):
+    """
+    Laporan penjualan [start, end] (tanggal WITA): seri per hari/minggu, total,
+    per kategori dan top sepatu. Funnel dihitung dari user_interaction
+    (view -> cart -> order, user unik per hari; untuk seri mingguan dijumlahkan per hari).
+    """
+    rollups = get_daily_rollups(start, end)
+    frame = pd.DataFrame([{k: v for k, v in r.items() if k not in ('by_category', 'by_shoe')} for r in rollups])
+    frame['date'] = pd.to_datetime(frame['date'])
+    if granularity == 'week':
+        # Minggu dimulai hari Senin
+        frame['period'] = (frame['date'] - pd.to_timedelta(frame['date'].dt.weekday, unit='D')).dt.strftime('%Y-%m-%d')
+    else:
+        frame['period'] = frame['date'].dt.strftime('%Y-%m-%d')
+    series = frame.groupby('period', sort=True)[METRICS + FUNNEL].sum()
+
+    totals = {metric: series[metric].sum() for metric in METRICS + FUNNEL}
+    totals = _with_conversion({k: round(float(v), 2) if k.endswith('revenue') else int(v) for k, v in totals.items()})
+
+    categories = _merge_groups(rollups, 'by_category')
+    shoes_by_id = _merge_groups(rollups, 'by_shoe')
+    names = {}
+    if categories or shoes_by_id:
+        result = supabase.table('shoe_category').select('category_id,category_name').execute()
+        names = {row['category_id']: row['category_name'] for row in result.data or []}
+    top_shoes = sorted(shoes_by_id.items(), key=lambda item: (-item[1]['revenue'], item[0]))[:top_n]
+
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'granularity': granularity,
+        'series': [
+            _with_conversion(dict(
+                {k: round(float(v), 2) if k.endswith('revenue') else int(v) for k, v in row.items()},
+                period=period))
+            for period, row in series.iterrows()
+        ],
+        'totals': totals,
+        'by_category': sorted(
+            [dict(values, category_id=category_id, category_name=names.get(category_id), revenue=round(values['revenue'], 2))
+             for category_id, values in categories.items()],
+            key=lambda row: -row['revenue']),
+        'top_shoes': [dict(values, shoe_detail_id=shoe_id, revenue=round(values['revenue'], 2)) for shoe_id, values in top_shoes]
+    }
@@ -3,9 +3,9 @@ import os
 from dotenv import load_dotenv
 
 load_dotenv()
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 
 # import semua blueprint
 from routes.users import users_bp
@@ -17,6 +17,12 @@ from routes.cart import cart_bp
 from routes.wishlist import wishlist_bp
 from routes.userInteraction import user_interaction_bp
 from routes.shoeRecomendation import shoe_recommendation_bp
+from routes.analytics import analytics_bp
+from supabase_client import supabase, get_pool_metrics
+from training_jobs import TrainingJobRunner, JobAlreadyRunning
+from data_loader import init_round_trip_logging
+from interaction_buffer import get_interaction_buffer
+from user_lookup import current_user_is_admin
 
 # Inisialisasi aplikasi Flask
 app = Flask(__name__)
@@ -44,25 +50,89 @@ CORS(app, resources={
         "origins": allowed_origins,
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"],
-        "expose_headers": ["Content-Type"],
+        "expose_headers": ["Content-Type", "X-Next-Cursor", "X-Supabase-Round-Trips", "X-Cart-Subtotal"],
         "supports_credentials": True,
         "max_age": 3600
     }
 })
 
+# Jumlah query Supabase per request dicatat supaya regresi N+1 kelihatan
+init_round_trip_logging(app)
+
 
 # =============== ROUTE KHUSUS TRAINING ===============
+def run_training(**params):
+    from data_training import train_nmf_model
+    return train_nmf_model(**params)
+
+
+training_runner = TrainingJobRunner(run_training)
+
+
 @app.route('/api/train_recommendation', methods=['POST'])
 def train_recommendation():
-    from data_training import train_nmf_model
+    # ?mode=full untuk membangun ulang agregat dari seluruh tabel interaksi
+    mode = request.args.get('mode', 'incremental')
+    if mode not in ('incremental', 'full'):
+        return jsonify({"error": "Invalid mode. Use 'incremental' or 'full'."}), 400
+    # ?scoring=decay|weight, default dari POPULARITY_SCORING
+    scoring = request.args.get('scoring')
+    if scoring not in (None, 'decay', 'weight'):
+        return jsonify({"error": "Invalid scoring. Use 'decay' or 'weight'."}), 400
+    # ?engine=popularity|nmf, default dari RECOMMENDATION_ENGINE
+    engine = request.args.get('engine')
+    if engine not in (None, 'popularity', 'nmf'):
+        return jsonify({"error": "Invalid engine. Use 'popularity' or 'nmf'."}), 400
+
     try:
-        result = train_nmf_model()
-        if result and result.get('status') == 'skipped':
-            return jsonify(result), 200
-        return jsonify(result or {"message": "Model training successfully completed!"}), 200
-    except Exception as e:
-        app.logger.error(f'Error saat melatih model: {str(e)}')
-        return jsonify({"error": str(e)}), 500
+        job = training_runner.start(mode=mode, scoring=scoring, engine=engine)
+    except JobAlreadyRunning as e:
+        return jsonify({"error": "Training is already running", "job": e.job}), 409
+
+    # ?sync=true menunggu job selesai di request (mode lama), tetap lewat runner
+    # supaya tidak ada dua training yang menulis state/rekomendasi bersamaan
+    if request.args.get('sync', 'false').lower() == 'true':
+        job = training_runner.join(job['job_id'])
+        if job['status'] == 'failed':
+            app.logger.error(f'Error saat melatih model: {job["error"]}')
+            return jsonify({"error": job['error'], "job_id": job['job_id']}), 500
+        return jsonify(job['result'] or {"message": "Model training successfully completed!"}), 200
+    return jsonify({
+        "message": "Training started",
+        "status": "running",
+        "job_id": job['job_id'],
+        "job": job
+    }), 202
+
+
+@app.route('/api/train_recommendation/jobs', methods=['GET'])
+@jwt_required()
+def list_training_jobs():
+    if not current_user_is_admin():
+        return jsonify({"message": "Admin access required"}), 403
+    return jsonify(training_runner.list()), 200
+
+
+@app.route('/api/train_recommendation/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_training_job(job_id):
+    if not current_user_is_admin():
+        return jsonify({"message": "Admin access required"}), 403
+    job = training_runner.get(job_id)
+    if not job:
+        return jsonify({"message": "Training job not found"}), 404
+    return jsonify(job), 200
+
+
+@app.route('/api/train_recommendation/runs', methods=['GET'])
+@jwt_required()
+def list_training_runs():
+    if not current_user_is_admin():
+        return jsonify({"message": "Admin access required"}), 403
+    # Riwayat run (durasi & jumlah baris) dari tabel training_run
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    result = supabase.table('training_run').select('*').order('started_at', desc=True).limit(limit).execute()
+    return jsonify(result.data or []), 200
 
 
 # =============== ROOT ROUTE FOR HEALTHCHECK ===============
@@ -75,6 +145,16 @@ def health_check():
         "version": "2.0.0"
     }), 200
 
+
+@app.route('/api/health/supabase_pool', methods=['GET'])
+def supabase_pool_metrics():
+    return jsonify(get_pool_metrics()), 200
+
+
+@app.route('/api/health/interaction_buffer', methods=['GET'])
+def interaction_buffer_stats():
+    return jsonify(get_interaction_buffer().snapshot()), 200
+
 # =============== REGISTER BLUEPRINTS ===============
 app.register_blueprint(users_bp)
 app.register_blueprint(orders_bp)
@@ -85,6 +165,7 @@ app.register_blueprint(cart_bp)
 app.register_blueprint(wishlist_bp)
 app.register_blueprint(user_interaction_bp)
 app.register_blueprint(shoe_recommendation_bp)
+app.register_blueprint(analytics_bp)
 
 
 # =============== GLOBAL ERROR HANDLER ===============
@@ -0,0 +1,73 @@
+"""
+Benchmark ad-hoc komponen backend (tidak dijalankan pytest). Jalankan dari folder backend, mis.:
+    python -m benchmarks.catalog_search --skus 100000
+Data dibuat sintetis di memori; tidak ada koneksi ke Supabase.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+# supabase_client wajib punya env ini saat import; client asli tidak pernah dipakai benchmark
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SUPABASE_KEY', 'benchmark-key')
+os.environ.setdefault('INTERACTION_BUFFER_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BRANDS = ['nike', 'adidas', 'puma', 'reebok', 'asics', 'vans', 'converse', 'fila', 'mizuno', 'ortuseight']
+MODELS = ['air', 'max', 'runner', 'classic', 'zoom', 'court', 'trail', 'boost', 'street', 'pro', 'lite', 'flex']
+COLORS = ['black', 'white', 'red', 'blue', 'grey', 'green', 'navy', 'cream']
+
+
+def synthetic_shoes(count, categories=20, seed=0):
+    """Baris shoe_detail sintetis (nama dari kombinasi brand/model/warna, harga 20-500, sebagian stock 0)."""
+    rng = random.Random(seed)
+    return [{
+        'shoe_detail_id': i,
+        'shoe_name': f'{rng.choice(BRANDS)} {rng.choice(MODELS)} {rng.choice(MODELS)} {rng.choice(COLORS)} {i}',
+        'shoe_price': round(rng.uniform(20, 500), 2),
+        'shoe_size': rng.randint(36, 46),
+        'stock': rng.choice([0, 0, 1, 5, 10, 25]),
+        'category_id': rng.randint(1, categories),
+        'date_added': f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+        'last_updated': '2026-10-01'
+    } for i in range(1, count + 1)]
+
+
+def synthetic_categories(count=20):
+    return [{'category_id': c, 'category_name': f'Category {c}'} for c in range(1, count + 1)]
+
+
+def measure(func, repeat=50):
+    """Jalankan func `repeat` kali; return {p50_ms, p95_ms, max_ms}."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'max_ms': round(samples[-1], 3)
+    }
+
+
+def peak_rss_mb():
+    """Puncak RSS proses ini (MB); None di platform tanpa modul resource."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS byte
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def print_report(title, rows):
+    print(f'\n{title}')
+    width = max(len(name) for name, _ in rows)
+    for name, result in rows:
+        values = ', '.join(f'{k}={v}' for k, v in result.items()) if isinstance(result, dict) else result
+        print(f'  {name.ljust(width)}  {values}')
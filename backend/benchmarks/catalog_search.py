@@ -0,0 +1,47 @@
+"""
+Latency catalog_index.CatalogIndex pada katalog sintetis:
+    python -m benchmarks.catalog_search --skus 100000 --repeat 50
+"""
+import argparse
+import time
+
+from benchmarks import synthetic_shoes, synthetic_categories, measure, print_report
+
+QUERIES = [
+    ("q='nike air'", dict(q='nike air')),
+    ("q='nik' (prefix)", dict(q='nik')),
+    ('category + size', dict(category_ids=[3], sizes=['42'])),
+    ('price 100-150', dict(min_price=100, max_price=150)),
+    ("q + category + price + in_stock", dict(q='runner', category_ids=[1, 2, 3], min_price=50, max_price=300, in_stock=True)),
+    ('no filter, sort price_asc', dict(sort='price_asc')),
+]
+
+
+def run(skus=100000, repeat=50):
+    from catalog_index import CatalogIndex
+
+    shoes = synthetic_shoes(skus)
+    index = CatalogIndex(ttl=3600)
+    started = time.perf_counter()
+    index.build(shoes=shoes, categories=synthetic_categories())
+    rows = [('build', {'seconds': round(time.perf_counter() - started, 3), 'skus': len(index.docs)})]
+
+    for name, params in QUERIES:
+        _, total = index.search(**params)
+        rows.append((name, dict(measure(lambda: index.search(**params), repeat), hits=total)))
+
+    updated = dict(shoes[0])
+
+    def upsert():
+        updated['shoe_price'] = (updated['shoe_price'] + 1) % 500
+        index.upsert(updated)
+    rows.append(('upsert 1 row', measure(upsert, repeat)))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--skus', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    print_report(f'CatalogIndex, {args.skus} SKU', run(args.skus, args.repeat))
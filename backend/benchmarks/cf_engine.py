@@ -0,0 +1,58 @@
+"""
+Waktu dan puncak RSS cf_engine pada matriks interaksi sintetis:
+    python -m benchmarks.cf_engine --users 100000 --items 10000
+Interaksi per user mengikuti popularitas item (zipf) seperti log sungguhan.
+Matriks dense float32 dengan ukuran sama dicetak sebagai pembanding memori.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks import peak_rss_mb, print_report
+
+
+def synthetic_interactions(users, items, per_user=20, seed=0):
+    """(user_ids, item_ids, scores) dengan rata-rata per_user interaksi per user."""
+    rng = np.random.default_rng(seed)
+    rows = users * per_user
+    user_ids = rng.integers(1, users + 1, rows)
+    item_ids = np.minimum(rng.zipf(1.3, rows), items)
+    scores = rng.choice(np.array([1.0, 2.0, 3.0, 5.0], dtype=np.float32), rows, p=[0.7, 0.1, 0.15, 0.05])
+    return user_ids, item_ids, scores
+
+
+def stage(func):
+    started = time.perf_counter()
+    result = func()
+    return result, {'seconds': round(time.perf_counter() - started, 3), 'peak_rss_mb': peak_rss_mb()}
+
+
+def run(users=100000, items=10000, per_user=20, n_components=32, max_iter=50, top_n=10):
+    from cf_engine import build_interaction_matrix, factorize, iter_top_n
+
+    user_ids, item_ids, scores = synthetic_interactions(users, items, per_user)
+    (matrix, user_index, item_index), build = stage(lambda: build_interaction_matrix(user_ids, item_ids, scores))
+    (W, H), nmf = stage(lambda: factorize(matrix, n_components=n_components, max_iter=max_iter))
+    filled, top = stage(lambda: sum(int((chunk >= 0).all(axis=1).sum()) for _, chunk in iter_top_n(W, H, matrix, top_n)))
+
+    sparse_mb = (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 2 ** 20
+    return [
+        ('build CSR', dict(build, shape=f'{matrix.shape[0]}x{matrix.shape[1]}', nnz=matrix.nnz)),
+        ('NMF', dict(nmf, k=W.shape[1], max_iter=max_iter)),
+        (f'top-{top_n} per user', dict(top, users_full=filled)),
+        ('memori matriks', {'csr_mb': round(sparse_mb, 1),
+                            'dense_float32_mb': round(matrix.shape[0] * matrix.shape[1] * 4 / 2 ** 20, 1)}),
+    ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--per-user', type=int, default=20)
+    parser.add_argument('--components', type=int, default=32)
+    parser.add_argument('--max-iter', type=int, default=50)
+    args = parser.parse_args()
+    print_report(f'cf_engine, {args.users} user x {args.items} item',
+                 run(args.users, args.items, args.per_user, args.components, args.max_iter))
@@ -0,0 +1,59 @@
+"""
+Latency facet count (FacetSnapshot) pada katalog sintetis:
+    python -m benchmarks.facets --skus 100000
+Dibandingkan dengan hitungan per baris di Python untuk filter yang sama.
+"""
+import argparse
+import time
+
+from benchmarks import measure, print_report, synthetic_categories, synthetic_shoes
+
+FILTERS = {
+    'tanpa filter': {},
+    'category': {'category_ids': [1, 2, 3]},
+    'category + size + stock': {'category_ids': [1, 2, 3], 'sizes': [41, 42], 'in_stock': True},
+    'harga + bucket custom': {'min_price': 50, 'max_price': 300, 'price_buckets': [0, 100, 250, 400]},
+}
+
+
+def python_counts(rows, category_ids=None, sizes=None, min_price=None, max_price=None, in_stock=False,
+                  price_buckets=None):
+    # Pembanding: satu loop per facet seperti implementasi naif
+    sizes = {str(s) for s in sizes or []}
+    categories = set(category_ids or [])
+    counts = {'categories': {}, 'sizes': {}}
+    for row in rows:
+        if in_stock and not row['stock']:
+            continue
+        in_price = (min_price is None or row['shoe_price'] >= min_price) and \
+                   (max_price is None or row['shoe_price'] <= max_price)
+        in_category = not categories or row['category_id'] in categories
+        in_size = not sizes or str(row['shoe_size']) in sizes
+        if in_size and in_price:
+            counts['categories'][row['category_id']] = counts['categories'].get(row['category_id'], 0) + 1
+        if in_category and in_price:
+            counts['sizes'][str(row['shoe_size'])] = counts['sizes'].get(str(row['shoe_size']), 0) + 1
+    return counts
+
+
+def run(skus=100000, repeat=20):
+    from facets import FacetSnapshot
+
+    shoes = synthetic_shoes(skus)
+    docs = {row['shoe_detail_id']: row for row in shoes}
+    categories = {c['category_id']: c['category_name'] for c in synthetic_categories()}
+    started = time.perf_counter()
+    snapshot = FacetSnapshot(docs, categories, version=1)
+    rows = [('snapshot build', {'skus': skus, 'seconds': round(time.perf_counter() - started, 3)})]
+    for name, filters in FILTERS.items():
+        rows.append((f'{name} (numpy)', measure(lambda: snapshot.facet_counts(**filters), repeat)))
+        rows.append((f'{name} (loop python)', measure(lambda: python_counts(shoes, **filters), max(1, repeat // 10))))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--skus', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    print_report(f'Facet count, {args.skus} SKU', run(args.skus, args.repeat))
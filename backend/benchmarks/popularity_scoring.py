@@ -0,0 +1,89 @@
+"""
+Runtime skor popularitas pada log interaksi sintetis:
+    python -m benchmarks.popularity_scoring --rows 3000000
+Membandingkan jalur lama (map bobot + groupby per sepatu) dengan decayed_scores
+dan agregasi np.bincount yang dipakai fold_interactions, plus parsing interaction_date
+(string ISO dari PostgREST) yang hanya dibutuhkan skor decay.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import print_report
+
+INTERACTION_TYPES = np.array(['view', 'wishlist', 'cart', 'order'], dtype=object)
+
+
+def synthetic_log(rows, shoes=10000, days=730, seed=0):
+    """(interaction_types, interaction_dates, shoe_ids, now) dengan umur interaksi 0..days hari."""
+    from data_training import utc_now
+
+    rng = np.random.default_rng(seed)
+    now = utc_now()
+    types = rng.choice(INTERACTION_TYPES, rows, p=[0.7, 0.1, 0.15, 0.05])
+    ages = (rng.integers(0, days * 86400, rows) * np.timedelta64(1, 's')).astype('timedelta64[ns]')
+    return types, now - ages, rng.integers(1, shoes + 1, rows), now
+
+
+def seconds(func):
+    started = time.perf_counter()
+    result = func()
+    return round(time.perf_counter() - started, 3), result
+
+
+def groupby_weight_scores(types, shoe_ids):
+    # Jalur train_nmf_model sebelum ada decay: bobot lewat map, lalu groupby per sepatu
+    from data_training import INTERACTION_WEIGHTS
+
+    df = pd.DataFrame({'shoe_detail_id': shoe_ids, 'interaction_type': types})
+    df['score'] = df['interaction_type'].map(INTERACTION_WEIGHTS).fillna(0)
+    return df.groupby('shoe_detail_id')['score'].sum()
+
+
+def bincount_decayed_scores(types, dates, shoe_ids, now):
+    from data_training import decayed_scores
+
+    codes, uniques = pd.factorize(shoe_ids)
+    sums = np.bincount(codes, weights=decayed_scores(types, dates, now), minlength=len(uniques))
+    return pd.Series(sums, index=uniques)
+
+
+def iso_strings(dates, offset='+08:00'):
+    return [text + offset for text in np.datetime_as_string(dates.astype('datetime64[us]'), unit='us')]
+
+
+def run(rows=3000000, parse_rows=500000):
+    from data_training import decayed_scores, parse_interaction_dates, _parse_dates_pandas
+
+    types, dates, shoe_ids, now = synthetic_log(rows)
+    groupby_s, by_groupby = seconds(lambda: groupby_weight_scores(types, shoe_ids))
+    decay_s, _ = seconds(lambda: decayed_scores(types, dates, now))
+    bincount_s, by_bincount = seconds(lambda: bincount_decayed_scores(types, dates, shoe_ids, now))
+    # Tanpa half-life hasil bincount harus sama dengan groupby (cek kebenaran, bukan timing)
+    no_decay = {t: None for t in INTERACTION_TYPES}
+    codes, uniques = pd.factorize(shoe_ids)
+    plain = pd.Series(np.bincount(codes, weights=decayed_scores(types, dates, now, half_lives=no_decay),
+                                  minlength=len(uniques)), index=uniques)
+    assert np.allclose(plain.sort_index().to_numpy(), by_groupby.sort_index().to_numpy())
+
+    texts = iso_strings(dates[:parse_rows])
+    parse_s, parsed = seconds(lambda: parse_interaction_dates(texts))
+    pandas_s, by_pandas = seconds(lambda: _parse_dates_pandas(texts))
+    assert (parsed == by_pandas).all()
+    return [
+        ('groupby (weight, jalur lama)', {'seconds': groupby_s, 'shoes': len(by_groupby)}),
+        ('decayed_scores', {'seconds': decay_s, 'rows_per_s': int(rows / max(decay_s, 1e-9))}),
+        ('decayed_scores + bincount', {'seconds': bincount_s, 'shoes': len(by_bincount)}),
+        (f'parse_interaction_dates ({len(texts)} string)', {'seconds': parse_s}),
+        (f'pandas ISO8601 ({len(texts)} string)', {'seconds': pandas_s}),
+    ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=3000000)
+    parser.add_argument('--parse-rows', type=int, default=500000)
+    args = parser.parse_args()
+    print_report(f'Skor popularitas, {args.rows} interaksi', run(args.rows, args.parse_rows))
@@ -0,0 +1,73 @@
+"""
+Latency request HTTP dengan client pooled (keep-alive, seperti supabase_client) dibanding
+client baru per request (koneksi TCP baru setiap kali):
+    python -m benchmarks.supabase_pool --requests 500 --latency-ms 2
+Server lokal meniru PostgREST dengan jeda tetap; yang diukur hanya overhead koneksi.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from benchmarks import measure, print_report
+
+
+def start_server(latency_ms=2.0):
+    body = json.dumps([{'shoe_detail_id': 1, 'stock': 5}]).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Tanpa ini header & body terkirim terpisah dan keep-alive terkena jeda Nagle/delayed ACK
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def unpooled_get(url):
+    with httpx.Client() as client:
+        return client.get(url)
+
+
+def run(requests=500, latency_ms=2.0):
+    from supabase_client import create_http_client, _pool_connection_counts
+
+    server = start_server(latency_ms)
+    url = f'http://127.0.0.1:{server.server_address[1]}/rest/v1/shoe_detail'
+    pooled = create_http_client()
+    try:
+        pooled.get(url)
+        rows = [
+            ('pooled (create_http_client)', measure(lambda: pooled.get(url), requests)),
+            ('client baru per request', measure(lambda: unpooled_get(url), requests)),
+        ]
+        open_connections, idle_connections = _pool_connection_counts(pooled)
+        rows.append(('pool setelah benchmark', {'open': open_connections, 'idle': idle_connections}))
+        return rows
+    finally:
+        pooled.close()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+    print_report(f'HTTP pooled vs unpooled, {args.requests} request', run(args.requests, args.latency_ms))
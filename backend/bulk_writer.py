@@ -0,0 +1,81 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from supabase_client import supabase
+
+
+class BulkWriteError(Exception):
+    pass
+
+
+class BulkWriter:
+    """
+    Insert banyak baris ke satu tabel Supabase secara paralel:
+    - records dipotong per batch_size
+    - maksimal max_workers insert berjalan bersamaan
+    - batch yang gagal di-retry dengan exponential backoff (+ jitter)
+    - progress & throughput dilaporkan lewat logging dan progress_callback(done, total)
+    """
+
+    def __init__(self, table, batch_size=500, max_workers=4, max_retries=3, backoff=0.5,
+                 progress_callback=None, client=None):
+        self.table = table
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.progress_callback = progress_callback
+        self.client = client or supabase
+        self._lock = threading.Lock()
+        self._retries = 0
+
+    def _insert_batch(self, batch):
+        attempt = 0
+        while True:
+            try:
+                self.client.table(self.table).insert(batch).execute()
+                return len(batch)
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise BulkWriteError(f'Insert ke {self.table} gagal setelah {self.max_retries} retry: {e}') from e
+                with self._lock:
+                    self._retries += 1
+                delay = self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25)
+                logging.warning(f'Insert batch {self.table} gagal ({e}), retry {attempt} dalam {delay:.2f}s')
+                time.sleep(delay)
+
+    def write(self, records):
+        """Tulis semua records; return statistik (rows, batches, retries, seconds, rows_per_second)."""
+        total = len(records)
+        batches = [records[i:i + self.batch_size] for i in range(0, total, self.batch_size)]
+        started = time.perf_counter()
+        written = 0
+        self._retries = 0
+
+        if batches:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self._insert_batch, batch) for batch in batches]
+                try:
+                    for future in as_completed(futures):
+                        written += future.result()
+                        elapsed = time.perf_counter() - started
+                        logging.info(f'{self.table}: {written}/{total} baris '
+                                     f'({written / elapsed if elapsed else 0:.0f} baris/detik)')
+                        if self.progress_callback:
+                            self.progress_callback(written, total)
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+        elapsed = time.perf_counter() - started
+        return {
+            'rows': written,
+            'batches': len(batches),
+            'retries': self._retries,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(written / elapsed, 1) if elapsed else 0.0
+        }
@@ -0,0 +1,314 @@
+import bisect
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from supabase_client import supabase
+from pagination import iter_rows
+from shoe_lookup import IN_QUERY_CHUNK_SIZE
+
+# Index dibangun ulang penuh setelah umur ini (menangkap perubahan dari worker lain / di luar API)
+CATALOG_INDEX_TTL = int(os.environ.get('CATALOG_INDEX_TTL', 300))
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text or '').lower())
+
+
+class CatalogIndex:
+    """
+    Index katalog in-memory untuk pencarian & filter shoe_detail:
+    - inverted index token shoe_name -> set shoe_detail_id (plus vocabulary terurut untuk prefix match)
+    - list (harga, id) terurut untuk range harga (bisect)
+    - set id per category_id dan per shoe_size
+    Dibangun lazy saat search pertama, di-update per baris dari route tulis shoes,
+    dan dibangun ulang penuh setiap CATALOG_INDEX_TTL detik. Rebuild membaca database
+    dan menyusun struktur baru tanpa memegang lock (search tetap dilayani dari index lama),
+    lalu di-swap di bawah lock; hanya satu thread yang rebuild dalam satu waktu.
+    """
+
+    def __init__(self, ttl=CATALOG_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._built_at = None
+        self._dirty = set()
+        # Selama rebuild: id yang diubah di index lama (perubahan itu hilang saat swap, dibaca ulang sesudahnya)
+        self._touched = None
+        # Naik setiap isi index berubah (dipakai snapshot facets untuk tahu kapan dibangun ulang)
+        self.version = 0
+        self._reset()
+
+    def _reset(self):
+        self.docs = {}
+        self.doc_tokens = {}
+        self.categories = {}
+        self.tokens = {}
+        self.by_category = {}
+        self.by_size = {}
+        self.prices = []
+        self._vocabulary = None
+
+    # ---------- build & maintenance ----------
+
+    def build(self, shoes=None, categories=None):
+        with self._build_lock:
+            self._rebuild(shoes, categories)
+
+    def _rebuild(self, shoes=None, categories=None):
+        # Dipanggil dengan _build_lock dipegang
+        started = time.perf_counter()
+        with self._lock:
+            dirty_before = set(self._dirty)
+            self._touched = set()
+        try:
+            if categories is None:
+                categories = supabase.table('shoe_category').select('category_id,category_name').execute().data or []
+            if shoes is None:
+                shoes = iter_rows(lambda: supabase.table('shoe_detail').select('*'), 'shoe_detail_id')
+            staging = CatalogIndex(self.ttl)
+            staging.categories = {c['category_id']: c['category_name'] for c in categories}
+            for shoe in shoes:
+                staging._add(shoe)
+            staging.prices.sort()
+        except BaseException:
+            with self._lock:
+                self._touched = None
+            raise
+
+        with self._lock:
+            for name in ('docs', 'doc_tokens', 'categories', 'tokens', 'by_category', 'by_size', 'prices', '_vocabulary'):
+                setattr(self, name, getattr(staging, name))
+            # Yang di-mark_dirty/di-upsert selama rebuild mungkin belum ada di hasil baca: refresh berikutnya
+            self._dirty = (self._dirty - dirty_before) | self._touched
+            self._touched = None
+            self._built_at = time.monotonic()
+            self.version += 1
+            count = len(self.docs)
+        logging.info(f'Catalog index dibangun: {count} sepatu dalam {time.perf_counter() - started:.2f}s')
+
+    def _is_expired(self):
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl
+
+    def ensure_fresh(self):
+        with self._lock:
+            expired = self._is_expired()
+            has_index = self._built_at is not None or self.version > 0
+            dirty = list(self._dirty)
+        if expired:
+            # Thread lain sedang rebuild: pakai index lama kalau sudah ada, kalau belum tunggu hasilnya
+            if not self._build_lock.acquire(blocking=not has_index):
+                return
+            try:
+                with self._lock:
+                    expired = self._is_expired()
+                if expired:
+                    self._rebuild()
+            finally:
+                self._build_lock.release()
+        elif dirty:
+            self._refresh(dirty)
+
+    def invalidate(self):
+        """Paksa rebuild penuh pada search berikutnya."""
+        with self._lock:
+            self._built_at = None
+
+    def mark_dirty(self, shoe_ids):
+        """Baris berubah di luar route shoes (mis. stock saat checkout); dibaca ulang saat search berikutnya."""
+        with self._lock:
+            if self._built_at is not None or self._touched is not None:
+                self._dirty.update(shoe_ids)
+
+    def _refresh(self, shoe_ids):
+        rows = []
+        for i in range(0, len(shoe_ids), IN_QUERY_CHUNK_SIZE):
+            chunk = shoe_ids[i:i + IN_QUERY_CHUNK_SIZE]
+            rows.extend(supabase.table('shoe_detail').select('*').in_('shoe_detail_id', chunk).execute().data or [])
+        found = {row['shoe_detail_id'] for row in rows}
+        with self._lock:
+            for row in rows:
+                self.upsert(row)
+            for shoe_id in shoe_ids:
+                if shoe_id not in found:
+                    self.remove(shoe_id)
+            self._dirty.difference_update(shoe_ids)
+
+    def upsert(self, shoe):
+        with self._lock:
+            if self._touched is not None:
+                self._touched.add(shoe['shoe_detail_id'])
+            if self._built_at is None:
+                return
+            self.remove(shoe['shoe_detail_id'])
+            self._add(shoe, keep_sorted=True)
+            self.version += 1
+
+    def remove(self, shoe_id):
+        with self._lock:
+            if self._touched is not None:
+                self._touched.add(shoe_id)
+            shoe = self.docs.pop(shoe_id, None)
+            if shoe is None:
+                return
+            for token in set(self.doc_tokens.pop(shoe_id)):
+                self._discard(self.tokens, token, shoe_id)
+            self._discard(self.by_category, shoe['category_id'], shoe_id)
+            self._discard(self.by_size, str(shoe['shoe_size']), shoe_id)
+            entry = (shoe['shoe_price'], shoe_id)
+            position = bisect.bisect_left(self.prices, entry)
+            if position < len(self.prices) and self.prices[position] == entry:
+                del self.prices[position]
+            self.version += 1
+
+    def set_category(self, category_id, category_name):
+        with self._lock:
+            self.categories[category_id] = category_name
+            self.version += 1
+
+    def _add(self, shoe, keep_sorted=False):
+        shoe_id = shoe['shoe_detail_id']
+        self.docs[shoe_id] = shoe
+        self.doc_tokens[shoe_id] = tokenize(shoe['shoe_name'])
+        for token in set(self.doc_tokens[shoe_id]):
+            if token not in self.tokens:
+                self._vocabulary = None
+            self.tokens.setdefault(token, set()).add(shoe_id)
+        self.by_category.setdefault(shoe['category_id'], set()).add(shoe_id)
+        self.by_size.setdefault(str(shoe['shoe_size']), set()).add(shoe_id)
+        entry = (shoe['shoe_price'], shoe_id)
+        if keep_sorted:
+            bisect.insort(self.prices, entry)
+        else:
+            self.prices.append(entry)
+
+    def _discard(self, index, key, shoe_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(shoe_id)
+            if not ids:
+                del index[key]
+                if index is self.tokens:
+                    self._vocabulary = None
+
+    # ---------- query ----------
+
+    def _token_matches(self, token, prefix):
+        if not prefix:
+            return self.tokens.get(token, set())
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.tokens)
+        matched = set()
+        start = bisect.bisect_left(self._vocabulary, token)
+        for word in self._vocabulary[start:]:
+            if not word.startswith(token):
+                break
+            matched |= self.tokens[word]
+        return matched
+
+    def _price_range(self, min_price, max_price):
+        start = 0 if min_price is None else bisect.bisect_left(self.prices, (min_price, float('-inf')))
+        end = len(self.prices) if max_price is None else bisect.bisect_right(self.prices, (max_price, float('inf')))
+        return start, end
+
+    def candidates(self, q=None, category_ids=None, sizes=None, min_price=None, max_price=None, in_stock=False):
+        """Set shoe_detail_id yang cocok dengan semua filter (lock harus dipegang pemanggil)."""
+        sets = []
+        query_tokens = tokenize(q)
+        for i, token in enumerate(query_tokens):
+            # token terakhir dicocokkan sebagai prefix (search-as-you-type)
+            sets.append(self._token_matches(token, prefix=i == len(query_tokens) - 1))
+        if category_ids:
+            sets.append(set().union(*(self.by_category.get(c, set()) for c in category_ids)))
+        if sizes:
+            sets.append(set().union(*(self.by_size.get(str(s), set()) for s in sizes)))
+
+        price_filtered = min_price is not None or max_price is not None
+        if sets:
+            sets.sort(key=len)
+            result = set(sets[0])
+            for other in sets[1:]:
+                result &= other
+                if not result:
+                    break
+            if price_filtered:
+                low = float('-inf') if min_price is None else min_price
+                high = float('inf') if max_price is None else max_price
+                result = {i for i in result if low <= self.docs[i]['shoe_price'] <= high}
+        elif price_filtered:
+            start, end = self._price_range(min_price, max_price)
+            result = {shoe_id for _, shoe_id in self.prices[start:end]}
+        else:
+            result = set(self.docs)
+
+        if in_stock:
+            result = {i for i in result if (self.docs[i].get('stock') or 0) > 0}
+        return result
+
+    def text_matches(self, q):
+        with self._lock:
+            return self.candidates(q=q)
+
+    def export(self):
+        """(docs, categories, version) salinan konsisten untuk snapshot lain (facets)."""
+        with self._lock:
+            return dict(self.docs), dict(self.categories), self.version
+
+    def search(self, q=None, category_ids=None, sizes=None, min_price=None, max_price=None,
+               in_stock=False, sort=None, limit=50, offset=0):
+        self.ensure_fresh()
+        with self._lock:
+            ids = self.candidates(q, category_ids, sizes, min_price, max_price, in_stock)
+            query_tokens = set(tokenize(q))
+            sort = sort or ('relevance' if query_tokens else 'id')
+            docs = self.docs
+
+            if sort == 'price_asc':
+                key = lambda i: (docs[i]['shoe_price'], i)
+            elif sort == 'price_desc':
+                key = lambda i: (-docs[i]['shoe_price'], i)
+            elif sort == 'name':
+                key = lambda i: (str(docs[i]['shoe_name']).lower(), i)
+            elif sort == 'newest':
+                # date_added ISO string: urutan string = urutan waktu (diurutkan terbalik)
+                key = lambda i: (str(docs[i].get('date_added') or ''), i)
+            elif sort == 'relevance':
+                # Lebih banyak token yang cocok persis = lebih relevan, lalu nama yang lebih pendek
+                doc_tokens = self.doc_tokens
+                key = lambda i: (-len(query_tokens.intersection(doc_tokens[i])), len(doc_tokens[i]), i)
+            else:
+                key = None
+
+            reverse = sort == 'newest'
+            wanted = offset + limit
+            if wanted < len(ids) // 4:
+                # Hanya halaman yang diminta yang perlu diurutkan
+                pick = heapq.nlargest if reverse else heapq.nsmallest
+                ordered = pick(wanted, ids, key=key)
+            else:
+                ordered = sorted(ids, key=key, reverse=reverse)
+
+            page = [
+                dict(docs[i], category_name=self.categories.get(docs[i]['category_id']))
+                for i in ordered[offset:offset + limit]
+            ]
+            return page, len(ids)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'shoes': len(self.docs),
+                'tokens': len(self.tokens),
+                'categories': len(self.by_category),
+                'sizes': len(self.by_size),
+                'dirty': len(self._dirty),
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if self._built_at else None,
+                'ttl_seconds': self.ttl
+            }
+
+
+catalog_index = CatalogIndex()
@@ -0,0 +1,81 @@
+import logging
+import os
+from supabase_client import supabase
+from cache import TTLCache
+from catalog_index import catalog_index
+from recommendation_store import get_global_ranking
+
+# Ringkasan kategori di-cache; di-invalidate oleh route tulis kategori, sepatu & checkout
+CATEGORY_OVERVIEW_TTL = int(os.environ.get('CATEGORY_OVERVIEW_TTL', 300))
+DEFAULT_TOP_N = 5
+MAX_TOP_N = 20
+
+overview_cache = TTLCache(max_size=MAX_TOP_N, ttl=CATEGORY_OVERVIEW_TTL)
+
+
+def invalidate_category_overview():
+    overview_cache.clear()
+
+
+def _overview_from_index(top_n):
+    """
+    Fallback kalau fungsi category_overview belum ada di database: satu pass atas
+    catalog_index, popularitas dari skor ranking global hasil training (sumber yang
+    sama dengan fungsi SQL, jadi urutan top_items kedua jalur identik).
+    """
+    catalog_index.ensure_fresh()
+    # Sama dengan CTE popularity di fungsi SQL category_overview (MAX skor per sepatu)
+    scores = {}
+    for row in get_global_ranking():
+        scores[row['shoe_detail_id']] = max(scores.get(row['shoe_detail_id'], 0), row.get('score') or 0)
+    docs, categories, _ = catalog_index.export()
+
+    overview = {
+        category_id: {
+            'category_id': category_id,
+            'category_name': name,
+            'sku_count': 0,
+            'in_stock_count': 0,
+            'min_price': None,
+            'max_price': None,
+            'top_items': []
+        }
+        for category_id, name in categories.items()
+    }
+    for shoe in docs.values():
+        entry = overview.get(shoe['category_id'])
+        if entry is None:
+            continue
+        price = shoe['shoe_price']
+        entry['sku_count'] += 1
+        entry['in_stock_count'] += 1 if (shoe.get('stock') or 0) > 0 else 0
+        entry['min_price'] = price if entry['min_price'] is None else min(entry['min_price'], price)
+        entry['max_price'] = price if entry['max_price'] is None else max(entry['max_price'], price)
+        entry['top_items'].append({
+            'shoe_detail_id': shoe['shoe_detail_id'],
+            'shoe_name': shoe['shoe_name'],
+            'shoe_price': price,
+            'shoe_size': shoe['shoe_size'],
+            'stock': shoe['stock'],
+            'popularity': scores.get(shoe['shoe_detail_id'], 0)
+        })
+
+    for entry in overview.values():
+        entry['top_items'] = sorted(entry['top_items'], key=lambda item: (-item['popularity'], item['shoe_detail_id']))[:top_n]
+    return [overview[category_id] for category_id in sorted(overview)]
+
+
+def get_category_overview(top_n=DEFAULT_TOP_N):
+    """Setiap kategori dengan sku_count, in_stock_count, min/max_price dan top_items (top-N populer)."""
+    cached = overview_cache.get(top_n)
+    if cached is not None:
+        return cached
+    try:
+        overview = supabase.rpc('category_overview', {'p_top_n': top_n}).execute().data or []
+    except Exception as e:
+        if getattr(e, 'code', None) != 'PGRST202':
+            raise
+        logging.warning('Fungsi category_overview belum ada di database, dihitung dari catalog index')
+        overview = _overview_from_index(top_n)
+    overview_cache.set(top_n, overview)
+    return overview
@@ -0,0 +1,80 @@
+import logging
+import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import NMF
+
+# Jumlah user yang di-skor sekaligus saat membuat top-N;
+# memori scoring dibatasi ~ SCORING_CHUNK_SIZE x jumlah item float32
+SCORING_CHUNK_SIZE = 2048
+
+
+def build_interaction_matrix(user_ids, item_ids, scores):
+    """
+    Bangun matriks CSR user x item dari array interaksi (skor duplikat dijumlah).
+    Return (matrix, user_index, item_index) dengan *_index = id asli per baris/kolom.
+    """
+    user_index, user_codes = np.unique(np.asarray(user_ids, dtype=np.int64), return_inverse=True)
+    item_index, item_codes = np.unique(np.asarray(item_ids, dtype=np.int64), return_inverse=True)
+    matrix = sp.coo_matrix(
+        (np.asarray(scores, dtype=np.float32), (user_codes, item_codes)),
+        shape=(len(user_index), len(item_index))
+    ).tocsr()
+    matrix.sum_duplicates()
+    return matrix, user_index, item_index
+
+
+def factorize(matrix, n_components=32, max_iter=200, random_state=42):
+    """NMF pada matriks sparse; return (W user x k, H k x item) dalam float32."""
+    n_components = max(1, min(n_components, min(matrix.shape)))
+    model = NMF(
+        n_components=n_components,
+        init='nndsvda',
+        solver='cd',
+        max_iter=max_iter,
+        random_state=random_state
+    )
+    W = model.fit_transform(matrix).astype(np.float32)
+    H = model.components_.astype(np.float32)
+    logging.info(f'NMF selesai: {matrix.shape[0]} users x {matrix.shape[1]} items, '
+                 f'k={n_components}, iterasi={model.n_iter_}, error={model.reconstruction_err_:.4f}')
+    return W, H
+
+
+def iter_top_n(W, H, matrix=None, top_n=10, chunk_size=SCORING_CHUNK_SIZE):
+    """
+    Generator (row_start, top_items) per chunk user: top_items adalah array
+    (chunk x top_n) index item, urut dari skor tertinggi. Item yang sudah
+    diinteraksi user (nilai di matrix) dilewati kalau matrix diberikan.
+    Slot yang tidak terisi bernilai -1.
+    """
+    n_items = H.shape[1]
+    top_n = min(top_n, n_items)
+    for start in range(0, W.shape[0], chunk_size):
+        scores = W[start:start + chunk_size] @ H
+        if matrix is not None:
+            seen = matrix[start:start + chunk_size].tocoo()
+            scores[seen.row, seen.col] = -np.inf
+
+        top = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top[np.take_along_axis(top_scores, order, axis=1) <= 0] = -1
+        yield start, top
+
+
+def recommend_for_users(user_ids, item_ids, scores, top_n=10, n_components=32, max_iter=200):
+    """
+    Latih NMF dari interaksi dan hasilkan {user_id: [shoe_detail_id, ...]}
+    untuk setiap user yang punya interaksi.
+    """
+    matrix, user_index, item_index = build_interaction_matrix(user_ids, item_ids, scores)
+    W, H = factorize(matrix, n_components=n_components, max_iter=max_iter)
+
+    recommendations = {}
+    for start, top in iter_top_n(W, H, matrix, top_n=top_n):
+        for offset, items in enumerate(top):
+            picked = item_index[items[items >= 0]]
+            if len(picked):
+                recommendations[int(user_index[start + offset])] = picked.tolist()
+    return recommendations
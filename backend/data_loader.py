@@ -0,0 +1,127 @@
+import logging
+import os
+from collections import defaultdict
+from flask import g, has_request_context, request
+from supabase_client import supabase, pool_metrics
+
+# Batas jumlah id per query in_() supaya URL PostgREST tidak terlalu panjang
+IN_QUERY_CHUNK_SIZE = 200
+# Request dengan round trip ke Supabase lebih dari ini dicatat sebagai warning
+ROUND_TRIP_WARN_THRESHOLD = int(os.environ.get('SUPABASE_ROUND_TRIP_WARN', 10))
+
+
+class Deferred:
+    """Hasil lookup yang baru dijalankan saat get() dipanggil (dibatch dengan lookup lain)."""
+
+    def __init__(self, loader, group, value):
+        self._loader = loader
+        self._group = group
+        self._value = value
+
+    def get(self):
+        return self._loader._resolve_value(self._group, self._value)
+
+
+class RequestDataLoader:
+    """
+    Wrapper Supabase per request Flask:
+    - select(table, columns, **eq) di-memoise: query identik dalam satu request hanya sekali
+    - load(table, key, value) mengantre point lookup; semua lookup yang antre di
+      tabel/key/kolom yang sama dijalankan sebagai satu query in_() saat salah satunya di-get()
+    Hasil "tidak ada" juga di-memoise. Data hasil write dalam request yang sama harus di-invalidate(table).
+    """
+
+    def __init__(self, client=None):
+        self.client = client or supabase
+        self._selects = {}
+        self._rows = {}
+        self._pending = defaultdict(set)
+
+    def select(self, table, columns='*', **filters):
+        cache_key = (table, columns, tuple(sorted((k, str(v)) for k, v in filters.items())))
+        if cache_key not in self._selects:
+            query = self.client.table(table).select(columns)
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            self._selects[cache_key] = query.execute().data or []
+        return self._selects[cache_key]
+
+    def select_one(self, table, columns='*', **filters):
+        rows = self.select(table, columns, **filters)
+        return rows[0] if rows else None
+
+    def load(self, table, key, value, columns='*'):
+        group = (table, key, columns)
+        if (group, str(value)) not in self._rows:
+            self._pending[group].add(value)
+        return Deferred(self, group, value)
+
+    def load_one(self, table, key, value, columns='*'):
+        return self.load(table, key, value, columns).get()
+
+    def load_many(self, table, key, values, columns='*'):
+        """{value: row} untuk value yang ditemukan; semua value dijalankan bersama lookup lain yang antre."""
+        deferred = [self.load(table, key, value, columns) for value in values]
+        rows = (d.get() for d in deferred)
+        return {value: row for value, row in zip(values, rows) if row is not None}
+
+    def _resolve_value(self, group, value):
+        if (group, str(value)) not in self._rows:
+            self._resolve_group(group)
+        return self._rows.get((group, str(value)))
+
+    def _resolve_group(self, group):
+        table, key, columns = group
+        values = list(self._pending.pop(group, set()))
+        select_columns = columns if columns == '*' or key in columns.split(',') else f'{key},{columns}'
+        for i in range(0, len(values), IN_QUERY_CHUNK_SIZE):
+            chunk = values[i:i + IN_QUERY_CHUNK_SIZE]
+            for value in chunk:
+                self._rows[(group, str(value))] = None
+            result = self.client.table(table).select(select_columns).in_(key, chunk).execute()
+            for row in result.data or []:
+                self._rows[(group, str(row[key]))] = row
+
+    def invalidate(self, table):
+        self._selects = {k: v for k, v in self._selects.items() if k[0] != table}
+        self._rows = {k: v for k, v in self._rows.items() if k[0][0] != table}
+        for group in [group for group in self._pending if group[0] == table]:
+            del self._pending[group]
+
+
+def get_loader():
+    """Loader milik request aktif (dibuat sekali per request); di luar request selalu loader baru."""
+    if not has_request_context():
+        return RequestDataLoader()
+    if 'data_loader' not in g:
+        g.data_loader = RequestDataLoader()
+    return g.data_loader
+
+
+def invalidate_loaded(table):
+    # Dipanggil write path supaya lookup berikutnya dalam request yang sama membaca data baru
+    if has_request_context() and 'data_loader' in g:
+        g.data_loader.invalidate(table)
+
+
+def _count_round_trip(http_request):
+    # Dipanggil dari event hook httpx; request di thread lain (mis. bulk writer) tidak dihitung
+    if has_request_context():
+        g.supabase_round_trips = g.get('supabase_round_trips', 0) + 1
+
+
+def init_round_trip_logging(app):
+    """Catat jumlah round trip Supabase per request (log + header X-Supabase-Round-Trips)."""
+    if _count_round_trip not in pool_metrics.listeners:
+        pool_metrics.listeners.append(_count_round_trip)
+
+    @app.after_request
+    def log_round_trips(response):
+        round_trips = g.get('supabase_round_trips', 0)
+        response.headers['X-Supabase-Round-Trips'] = str(round_trips)
+        message = f'{request.method} {request.path} -> {response.status_code}, {round_trips} Supabase round trip(s)'
+        if round_trips > ROUND_TRIP_WARN_THRESHOLD:
+            logging.warning(message)
+        else:
+            logging.debug(message)
+        return response
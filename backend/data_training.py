@@ -1,5 +1,15 @@
+import os
+import re
+import joblib
+import numpy as np
 import pandas as pd
 from supabase_client import supabase
+from shoe_lookup import fetch_shoes_by_ids
+from recommendation_store import (
+    RECOMMENDATION_STORAGE, new_generation, activate_generation,
+    save_global_ranking, write_user_recommendations
+)
+import cf_engine
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -12,46 +22,354 @@ INTERACTION_WEIGHTS = {
     'order': 3
 }
 
-def train_nmf_model():
+# Half-life (hari) per tipe interaksi untuk skor time-decay; None = tanpa decay.
+# Bisa di-override lewat env, contoh: POPULARITY_HALF_LIFE_DAYS="view=7,order=120"
+INTERACTION_HALF_LIFE_DAYS = {
+    'view': 14,
+    'wishlist': 30,
+    'cart': 30,
+    'order': 90
+}
+for _item in filter(None, os.environ.get('POPULARITY_HALF_LIFE_DAYS', '').split(',')):
+    _type, _days = _item.split('=')
+    INTERACTION_HALF_LIFE_DAYS[_type.strip()] = float(_days) if _days.strip().lower() != 'none' else None
+
+# 'decay' : skor time-decay berdasarkan interaction_date
+# 'weight': jumlah bobot biasa (tanpa melihat umur interaksi)
+POPULARITY_SCORING = os.environ.get('POPULARITY_SCORING', 'decay')
+
+# 'popularity': top-N global saja
+# 'nmf'       : ditambah rekomendasi personal per user (NMF pada matriks user x item)
+RECOMMENDATION_ENGINE = os.environ.get('RECOMMENDATION_ENGINE', 'popularity')
+NMF_COMPONENTS = int(os.environ.get('NMF_COMPONENTS', 32))
+NMF_MAX_ITER = int(os.environ.get('NMF_MAX_ITER', 200))
+
+# Jumlah baris per halaman saat membaca user_interaction (batas default PostgREST)
+FETCH_PAGE_SIZE = 1000
+
+# interaction_id di-commit tidak selalu berurutan (transaksi paralel): setiap run incremental
+# membaca ulang sejumlah id terakhir di bawah high-water mark, id yang sudah di-fold dilewati
+INCREMENTAL_REREAD_WINDOW = int(os.environ.get('INCREMENTAL_REREAD_WINDOW', 1000))
+
+# Lokasi state agregat popularitas untuk training incremental
+POPULARITY_STATE_PATH = os.environ.get(
+    'POPULARITY_STATE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'popularity_state.joblib')
+)
+
+
+def utc_now():
+    return pd.Timestamp.now(tz='UTC').tz_localize(None).to_datetime64().astype('datetime64[ns]')
+
+
+UTC_OFFSET_RE = re.compile(r'([+-])(\d{2}):(\d{2})')
+
+
+def _parse_dates_pandas(values):
+    dates = pd.to_datetime(pd.Series(values, dtype=object), utc=True, errors='coerce', format='ISO8601')
+    return dates.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+
+
+def parse_interaction_dates(values):
     """
-    Global Popularity Recommendation:
-    - Akumulasi semua interaksi dari semua user
-    - Hitung skor popularitas per produk (berdasarkan bobot interaksi)
-    - Top N produk paling populer direkomendasikan ke SEMUA user
+    String ISO (dengan timezone) -> array datetime64[ns] UTC; nilai invalid jadi NaT.
+    String dikelompokkan per offset (+HH:MM / Z; dari Postgres biasanya hanya satu),
+    bagian tanggalnya di-parse NumPy lalu digeser offset. Parser ISO8601 pandas untuk
+    string ber-offset jauh lebih lambat, jadi hanya dipakai untuk format lain.
+    """
+    values = list(values)
+    result = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    groups = {}
+    for i, value in enumerate(values):
+        if isinstance(value, str):
+            groups.setdefault('Z' if value.endswith('Z') else value[-6:], []).append(i)
+
+    for suffix, positions in groups.items():
+        texts = [values[i] for i in positions]
+        offset = UTC_OFFSET_RE.fullmatch(suffix)
+        try:
+            if suffix == 'Z':
+                parsed = np.array([t[:-1] for t in texts], dtype='datetime64[ns]')
+            elif offset:
+                sign = 1 if offset.group(1) == '+' else -1
+                minutes = int(offset.group(2)) * 60 + int(offset.group(3))
+                parsed = np.array([t[:-6] for t in texts], dtype='datetime64[ns]') - np.timedelta64(sign * minutes, 'm')
+            else:
+                parsed = _parse_dates_pandas(texts)
+        except ValueError:
+            parsed = _parse_dates_pandas(texts)
+        result[positions] = parsed
+    return result
+
+
+NS_PER_DAY = 86400 * 10**9
+NAT_INT = np.iinfo(np.int64).min
+
+
+def decayed_scores(interaction_types, interaction_dates, now, weights=None, half_lives=None):
     """
+    Skor time-decay tervektorisasi: bobot * 2^(-umur_hari / half_life).
+    interaction_dates berupa datetime64 UTC (NaT dan tanggal di masa depan dianggap
+    umur 0), tipe yang tidak dikenal bernilai 0, dan tipe dengan half_life None tidak di-decay.
+    """
+    weights = INTERACTION_WEIGHTS if weights is None else weights
+    half_lives = INTERACTION_HALF_LIFE_DAYS if half_lives is None else half_lives
+
+    # Tipe difaktorisasi sekali, bobot & rate dicari per tipe unik (bukan map per baris).
+    # Kode -1 (NaN) menunjuk ke elemen terakhir (0)
+    codes, type_names = pd.factorize(np.asarray(interaction_types, dtype=object))
+    weight_by_code = np.array([float(weights.get(t) or 0.0) for t in type_names] + [0.0])
+    rate_by_code = np.array([1.0 / half_lives[t] if half_lives.get(t) else 0.0 for t in type_names] + [0.0])
+
+    dates = np.asarray(interaction_dates, dtype='datetime64[ns]').view(np.int64)
+    unknown = dates == NAT_INT
+    age_days = (np.datetime64(now, 'ns').astype(np.int64) - np.where(unknown, 0, dates)) * (1.0 / NS_PER_DAY)
+    age_days[unknown | (age_days < 0)] = 0.0
+
+    # Dihitung in-place di satu array: exp2(-umur * rate) * bobot
+    scores = np.multiply(age_days, rate_by_code[codes], out=age_days)
+    np.negative(scores, out=scores)
+    np.exp2(scores, out=scores)
+    scores *= weight_by_code[codes]
+    return scores
+
+
+def new_popularity_state(now=None):
+    return {
+        'last_interaction_id': 0,
+        # interaction_id yang sudah di-fold di dalam jendela baca ulang
+        'recent_ids': set(),
+        'shoes': {},
+        # Skor decay per sepatu disimpan relatif terhadap waktu referensi ini
+        'decay_reference': utc_now() if now is None else now,
+        'weights': dict(INTERACTION_WEIGHTS),
+        'half_lives': dict(INTERACTION_HALF_LIFE_DAYS)
+    }
+
+
+def load_popularity_state(path=POPULARITY_STATE_PATH):
+    if not os.path.exists(path):
+        return None
     try:
-        # 1. Fetch semua interaksi
-        interactions_result = supabase.table('user_interaction').select('*').execute()
-        interactions = interactions_result.data or []
-        logging.info(f'Total interaksi: {len(interactions)}')
+        state = joblib.load(path)
     except Exception as e:
-        logging.error(f'Error saat membaca data interaksi: {e}')
-        raise
+        logging.warning(f'State popularitas tidak bisa dibaca, full rebuild: {e}')
+        return None
+
+    # Bobot / half-life berubah: agregat lama tidak bisa dipakai lagi
+    if state.get('weights') != INTERACTION_WEIGHTS or state.get('half_lives') != INTERACTION_HALF_LIFE_DAYS:
+        logging.info('Konfigurasi skor berubah, full rebuild')
+        return None
+    # State lama tanpa daftar id terakhir tidak bisa membaca ulang jendela tanpa double count
+    if 'recent_ids' not in state:
+        logging.info('State popularitas versi lama, full rebuild')
+        return None
+    return state
+
+
+def save_popularity_state(state, path=POPULARITY_STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
 
+def fetch_interactions_after(last_interaction_id=0, page_size=FETCH_PAGE_SIZE, columns='*'):
+    """Generator halaman user_interaction dengan interaction_id > last_interaction_id (keyset)."""
+    while True:
+        result = supabase.table('user_interaction').select(columns) \
+            .gt('interaction_id', last_interaction_id) \
+            .order('interaction_id') \
+            .limit(page_size) \
+            .execute()
+        rows = result.data or []
+        if not rows:
+            return
+        yield rows
+        last_interaction_id = rows[-1]['interaction_id']
+        if len(rows) < page_size:
+            return
+
+
+def advance_decay_reference(state, now):
+    """Geser waktu referensi skor decay ke now (skor lama di-decay sesuai selisih waktu)."""
+    elapsed_days = (np.datetime64(now, 'ns') - state['decay_reference']) / np.timedelta64(1, 'D')
+    if elapsed_days <= 0:
+        return state
+    factors = {
+        t: 2.0 ** (-elapsed_days / h) if h else 1.0
+        for t, h in INTERACTION_HALF_LIFE_DAYS.items()
+    }
+    for agg in state['shoes'].values():
+        for t in agg['decayed']:
+            agg['decayed'][t] *= factors.get(t, 1.0)
+    state['decay_reference'] = np.datetime64(now, 'ns')
+    return state
+
+
+def fold_interactions(state, interactions):
+    """Tambahkan batch interaksi baru ke agregat per sepatu di state."""
     if not interactions:
-        return {'message': 'No interaction data available for training', 'status': 'skipped'}
+        return state
 
     df = pd.DataFrame(interactions)
+    state['last_interaction_id'] = max(state['last_interaction_id'], int(df['interaction_id'].max()))
 
-    # 2. Filter data valid
+    # Filter data valid
     df = df.dropna(subset=['shoe_detail_id', 'interaction_type'])
     df = df[df['shoe_detail_id'] > 0]
-
     if df.empty:
-        return {'message': 'No valid interaction data after cleaning', 'status': 'skipped'}
+        return state
+
+    # Agregasi per sepatu (dan per sepatu x tipe untuk skor decay) dengan np.bincount
+    # atas kode hasil faktorisasi, bukan groupby
+    shoe_codes, shoe_ids = pd.factorize(df['shoe_detail_id'].to_numpy(dtype=np.int64))
+    type_codes, type_names = pd.factorize(df['interaction_type'].to_numpy(dtype=object))
+    n_shoes, n_types = len(shoe_ids), len(type_names)
+    weight_by_code = np.array([float(INTERACTION_WEIGHTS.get(t) or 0.0) for t in type_names])
+    total_score = np.bincount(shoe_codes, weights=weight_by_code[type_codes], minlength=n_shoes)
+    interaction_count = np.bincount(shoe_codes, minlength=n_shoes)
+
+    dates = parse_interaction_dates(df['interaction_date']) if 'interaction_date' in df else np.full(len(df), np.datetime64('NaT'))
+    decayed = decayed_scores(df['interaction_type'].to_numpy(), dates, state['decay_reference'])
+    cell = shoe_codes * n_types + type_codes
+    decayed_by_type = np.bincount(cell, weights=decayed, minlength=n_shoes * n_types).reshape(n_shoes, n_types)
+    count_by_type = np.bincount(cell, minlength=n_shoes * n_types).reshape(n_shoes, n_types)
+
+    shoes = state['shoes']
+    aggs = []
+    for i, shoe_id in enumerate(shoe_ids.tolist()):
+        agg = shoes.setdefault(shoe_id, {'total_score': 0.0, 'interaction_count': 0, 'users': set(), 'decayed': {}})
+        agg['total_score'] += float(total_score[i])
+        agg['interaction_count'] += int(interaction_count[i])
+        for j in np.flatnonzero(count_by_type[i]):
+            interaction_type = type_names[j]
+            agg['decayed'][interaction_type] = agg['decayed'].get(interaction_type, 0.0) + float(decayed_by_type[i, j])
+        aggs.append(agg)
+
+    users = df['id_user'].to_numpy()
+    has_user = ~pd.isna(users)
+    for shoe_code, user_id in zip(shoe_codes[has_user].tolist(), users[has_user].astype(np.int64).tolist()):
+        aggs[shoe_code]['users'].add(user_id)
+    return state
+
 
-    # 3. Hitung skor per produk
-    df['score'] = df['interaction_type'].map(INTERACTION_WEIGHTS).fillna(0)
+def compute_shoe_scores(state, scoring=None):
+    """
+    DataFrame skor per sepatu, urut dari kolom score tertinggi (tie-break shoe_detail_id).
+    score = decayed_score untuk scoring='decay', total_score untuk scoring='weight'.
+    """
+    scoring = scoring or POPULARITY_SCORING
+    shoe_scores = pd.DataFrame([
+        {
+            'shoe_detail_id': shoe_id,
+            'total_score': agg['total_score'],
+            'decayed_score': sum(agg['decayed'].values()),
+            'interaction_count': agg['interaction_count'],
+            'unique_users': len(agg['users'])
+        }
+        for shoe_id, agg in state['shoes'].items()
+    ], columns=['shoe_detail_id', 'total_score', 'decayed_score', 'interaction_count', 'unique_users'])
+    shoe_scores['score'] = shoe_scores['decayed_score'] if scoring == 'decay' else shoe_scores['total_score']
+    return shoe_scores.sort_values(
+        ['score', 'shoe_detail_id'], ascending=[False, True], kind='mergesort'
+    ).reset_index(drop=True)
+
+
+def update_popularity_state(mode='incremental'):
+    """
+    mode='incremental': lanjutkan dari state tersimpan, hanya baca interaksi baru
+    (interaction_id > high-water mark - INCREMENTAL_REREAD_WINDOW, id yang sudah di-fold
+    dilewati, jadi baris yang commit terlambat dengan id lebih kecil tetap terhitung).
+    mode='full': bangun ulang dari seluruh tabel.
+    Return (state, jumlah interaksi yang dibaca, mode yang benar-benar dipakai).
+    """
+    state = load_popularity_state() if mode == 'incremental' else None
+    now = utc_now()
+    if state is None:
+        mode = 'full'
+        state = new_popularity_state(now)
+    else:
+        advance_decay_reference(state, now)
+
+    fetched = 0
+    seen = state['recent_ids']
+    for page in fetch_interactions_after(max(state['last_interaction_id'] - INCREMENTAL_REREAD_WINDOW, 0)):
+        page = [row for row in page if row['interaction_id'] not in seen]
+        fold_interactions(state, page)
+        seen.update(row['interaction_id'] for row in page)
+        fetched += len(page)
+    floor = state['last_interaction_id'] - INCREMENTAL_REREAD_WINDOW
+    state['recent_ids'] = {i for i in seen if i > floor}
+
+    save_popularity_state(state)
+    return state, fetched, mode
+
+
+def train_collaborative_filtering(scoring=None, top_n=10):
+    """
+    Baca seluruh interaksi per halaman ke array NumPy (bukan list of dict),
+    lalu latih NMF pada matriks CSR user x item berbobot INTERACTION_WEIGHTS.
+    Return {user_id: [shoe_detail_id, ...]}.
+    """
+    scoring = scoring or POPULARITY_SCORING
+    now = utc_now()
+    user_chunks, item_chunks, score_chunks = [], [], []
+    columns = 'interaction_id,id_user,shoe_detail_id,interaction_type,interaction_date'
+    for page in fetch_interactions_after(0, columns=columns):
+        df = pd.DataFrame(page).dropna(subset=['id_user', 'shoe_detail_id', 'interaction_type'])
+        df = df[df['shoe_detail_id'] > 0]
+        if df.empty:
+            continue
+        if scoring == 'decay':
+            page_scores = decayed_scores(df['interaction_type'].to_numpy(), parse_interaction_dates(df['interaction_date']), now)
+        else:
+            page_scores = df['interaction_type'].map(INTERACTION_WEIGHTS).fillna(0).to_numpy()
+        user_chunks.append(df['id_user'].to_numpy(dtype=np.int64))
+        item_chunks.append(df['shoe_detail_id'].to_numpy(dtype=np.int64))
+        score_chunks.append(page_scores.astype(np.float32))
+
+    if not user_chunks:
+        return {}
 
-    # Akumulasi skor per sepatu
-    shoe_scores = df.groupby('shoe_detail_id').agg(
-        total_score=('score', 'sum'),
-        interaction_count=('score', 'count'),
-        unique_users=('id_user', 'nunique')
-    ).reset_index()
+    return cf_engine.recommend_for_users(
+        np.concatenate(user_chunks),
+        np.concatenate(item_chunks),
+        np.concatenate(score_chunks),
+        top_n=top_n,
+        n_components=NMF_COMPONENTS,
+        max_iter=NMF_MAX_ITER
+    )
+
+
+def train_nmf_model(mode='incremental', scoring=None, engine=None, progress_callback=None):
+    """
+    Global Popularity Recommendation:
+    - Akumulasi semua interaksi dari semua user (incremental dari high-water mark
+      interaction_id, atau full rebuild dengan mode='full')
+    - Hitung skor popularitas per produk (bobot interaksi, dengan time-decay
+      per tipe interaksi kalau scoring='decay')
+    - Top N produk paling populer direkomendasikan ke SEMUA user
+    - engine='nmf': user yang punya interaksi juga mendapat top N personal
+      dari NMF (cf_engine), top N global tetap jadi fallback
+    - Hasil ditulis ke generation baru lalu di-swap atomik (recommendation_store);
+      progress_callback(done, total) menerima progress penulisan per user
+    """
+    engine = engine or RECOMMENDATION_ENGINE
+    try:
+        # 1. Fetch interaksi (baru) dan update agregat
+        state, fetched, mode = update_popularity_state(mode)
+        logging.info(f'Interaksi dibaca ({mode}): {fetched}, high-water mark: {state["last_interaction_id"]}')
+    except Exception as e:
+        logging.error(f'Error saat membaca data interaksi: {e}')
+        raise
+
+    if not state['shoes']:
+        return {'message': 'No interaction data available for training', 'status': 'skipped'}
 
-    # Sort by total score descending
-    shoe_scores = shoe_scores.sort_values('total_score', ascending=False)
+    # 2-3. Skor per produk dari agregat
+    scoring = scoring or POPULARITY_SCORING
+    shoe_scores = compute_shoe_scores(state, scoring)
 
     logging.info(f'Produk dengan interaksi: {len(shoe_scores)}')
     logging.info(f'Top 5 produk:\n{shoe_scores.head()}')
@@ -63,21 +381,9 @@ def train_nmf_model():
     if not top_shoes:
         return {'message': 'No products with interactions found', 'status': 'skipped'}
 
-    # 5. Fetch semua user
+    # 5. Validasi shoe_detail_id yang masih ada
     try:
-        users_result = supabase.table('user').select('user_id').execute()
-        all_users = [u['user_id'] for u in users_result.data] if users_result.data else []
-    except Exception as e:
-        logging.error(f'Error saat membaca data user: {e}')
-        raise
-
-    if not all_users:
-        return {'message': 'No users found in database', 'status': 'skipped'}
-
-    # 6. Validasi shoe_detail_id yang masih ada
-    try:
-        shoes_result = supabase.table('shoe_detail').select('shoe_detail_id').execute()
-        valid_shoe_ids = set(s['shoe_detail_id'] for s in shoes_result.data) if shoes_result.data else set()
+        valid_shoe_ids = set(fetch_shoes_by_ids(top_shoes, 'shoe_detail_id', use_cache=False))
     except Exception as e:
         logging.error(f'Error saat membaca data sepatu: {e}')
         raise
@@ -87,27 +393,74 @@ def train_nmf_model():
     if not top_shoes:
         return {'message': 'No valid products found for recommendations', 'status': 'skipped'}
 
-    # 7. Simpan rekomendasi: setiap user dapat produk yang sama
+    scores = shoe_scores.set_index('shoe_detail_id')['score']
+
+    # 6. Engine nmf: rekomendasi personal per user dari matrix factorization
+    personal = {}
+    if engine == 'nmf':
+        try:
+            personal = train_collaborative_filtering(scoring)
+            logging.info(f'Rekomendasi personal (NMF): {len(personal)} users')
+        except Exception as e:
+            logging.error(f'Error saat training NMF: {e}')
+            raise
+
+    generation = new_generation()
+
+    # 7a. Mode global: simpan ranking sekali, dibaca & di-merge dengan override per user
+    if RECOMMENDATION_STORAGE == 'global':
+        try:
+            saved = save_global_ranking([(shoe_id, scores[shoe_id]) for shoe_id in top_shoes], generation)
+            logging.info(f'Ranking global disimpan: {saved} produk')
+            records = [
+                {'id_user': user_id, 'shoe_detail_id': shoe_id}
+                for user_id, shoe_ids in personal.items() for shoe_id in shoe_ids
+            ]
+            write_stats = write_user_recommendations(records, generation, progress_callback)
+            activate_generation(generation)
+        except Exception as e:
+            logging.error(f'Error saat menyimpan rekomendasi: {e}')
+            raise
+
+        return {
+            'message': f'Training completed! {len(top_shoes)} top products stored as global recommendations.',
+            'status': 'success',
+            'storage': 'global',
+            'engine': engine,
+            'total_recommendations': saved + len(records),
+            'top_products': len(top_shoes),
+            'personalized_users': len(personal),
+            'generation': generation,
+            'write_stats': write_stats,
+            'mode': mode,
+            'scoring': scoring,
+            'new_interactions': fetched
+        }
+
+    # 7b. Mode per_user: fetch semua user
     try:
-        # Hapus rekomendasi lama
-        supabase.table('shoe_recomendation_for_users').delete().neq('id_shoe_recomendation', 0).execute()
+        users_result = supabase.table('user').select('user_id').execute()
+        all_users = [u['user_id'] for u in users_result.data] if users_result.data else []
+    except Exception as e:
+        logging.error(f'Error saat membaca data user: {e}')
+        raise
+
+    if not all_users:
+        return {'message': 'No users found in database', 'status': 'skipped'}
 
-        # Insert rekomendasi baru untuk setiap user
+    # 8. Simpan rekomendasi: rekomendasi personal kalau ada, selain itu top produk global
+    try:
         records = []
         for user_id in all_users:
-            for shoe_id in top_shoes:
+            for shoe_id in personal.get(int(user_id), top_shoes):
                 records.append({
                     'id_user': int(user_id),
                     'shoe_detail_id': int(shoe_id)
                 })
+        write_stats = write_user_recommendations(records, generation, progress_callback)
+        activate_generation(generation)
 
-        # Batch insert (max 50 per request to avoid timeout)
-        batch_size = 50
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            supabase.table('shoe_recomendation_for_users').insert(batch).execute()
-
-        logging.info(f'Rekomendasi berhasil disimpan: {len(records)} records ({len(all_users)} users x {len(top_shoes)} produk)')
+        logging.info(f'Rekomendasi berhasil disimpan: {len(records)} records ({len(all_users)} users)')
     except Exception as e:
         logging.error(f'Error saat menyimpan rekomendasi: {e}')
         raise
@@ -117,5 +470,13 @@ def train_nmf_model():
         'status': 'success',
         'total_recommendations': len(records),
         'top_products': len(top_shoes),
-        'total_users': len(all_users)
+        'total_users': len(all_users),
+        'personalized_users': len(personal),
+        'generation': generation,
+        'write_stats': write_stats,
+        'storage': 'per_user',
+        'engine': engine,
+        'mode': mode,
+        'scoring': scoring,
+        'new_interactions': fetched
     }
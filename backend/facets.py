@@ -0,0 +1,112 @@
+import os
+import threading
+import numpy as np
+from catalog_index import catalog_index
+
+# Batas bawah bucket harga; bucket terakhir tanpa batas atas
+DEFAULT_PRICE_BUCKETS = [float(edge) for edge in os.environ.get('FACET_PRICE_BUCKETS', '0,50,100,200,500').split(',')]
+
+
+class FacetSnapshot:
+    """
+    Snapshot kolom (array NumPy) shoe_detail dari catalog_index untuk facet count:
+    setiap filter menjadi boolean mask, count per nilai dihitung dengan np.bincount.
+    """
+
+    def __init__(self, docs, categories, version):
+        self.version = version
+        self.categories = dict(categories)
+        rows = list(docs.values())
+        n = len(rows)
+        self.ids = np.fromiter(docs.keys(), dtype=np.int64, count=n)
+        self.prices = np.fromiter((row['shoe_price'] for row in rows), dtype=np.float64, count=n)
+        self.stock = np.fromiter(((row.get('stock') or 0) for row in rows), dtype=np.int64, count=n)
+        self.category_values, self.category_codes = np.unique(
+            np.fromiter((row['category_id'] for row in rows), dtype=np.int64, count=n), return_inverse=True)
+        self.size_values, self.size_codes = np.unique(
+            np.array([str(row['shoe_size']) for row in rows], dtype=str), return_inverse=True)
+        self._default_buckets = self._bucket_codes(DEFAULT_PRICE_BUCKETS)
+
+    def _bucket_codes(self, edges):
+        # -1 = di bawah batas bawah bucket pertama
+        return np.searchsorted(np.asarray(edges, dtype=np.float64), self.prices, side='right') - 1
+
+    def _value_mask(self, values, codes, selected):
+        if not selected:
+            return None
+        return np.isin(values, selected)[codes]
+
+    def facet_counts(self, text_ids=None, category_ids=None, sizes=None, min_price=None, max_price=None,
+                     in_stock=False, price_buckets=None):
+        n = len(self.ids)
+        base = np.ones(n, dtype=bool)
+        if text_ids is not None:
+            base &= np.isin(self.ids, np.fromiter(text_ids, dtype=np.int64, count=len(text_ids)))
+        if in_stock:
+            base &= self.stock > 0
+
+        category_mask = self._value_mask(self.category_values, self.category_codes, category_ids)
+        size_mask = self._value_mask(self.size_values, self.size_codes, [str(s) for s in sizes or []])
+        price_mask = None
+        if min_price is not None or max_price is not None:
+            price_mask = np.ones(n, dtype=bool)
+            if min_price is not None:
+                price_mask &= self.prices >= min_price
+            if max_price is not None:
+                price_mask &= self.prices <= max_price
+
+        def combine(*masks):
+            mask = base
+            for m in masks:
+                if m is not None:
+                    mask = mask & m
+            return mask
+
+        # Facet disjunctive: count setiap facet memakai semua filter kecuali filter facet itu sendiri
+        total_mask = combine(category_mask, size_mask, price_mask)
+        category_counts = np.bincount(self.category_codes[combine(size_mask, price_mask)],
+                                      minlength=len(self.category_values))
+        size_counts = np.bincount(self.size_codes[combine(category_mask, price_mask)],
+                                  minlength=len(self.size_values))
+
+        edges = price_buckets or DEFAULT_PRICE_BUCKETS
+        bucket_codes = self._default_buckets if price_buckets is None else self._bucket_codes(edges)
+        in_buckets = bucket_codes[combine(category_mask, size_mask) & (bucket_codes >= 0)]
+        bucket_counts = np.bincount(in_buckets, minlength=len(edges))
+
+        return {
+            'total': int(total_mask.sum()),
+            'categories': [
+                {'category_id': int(value), 'category_name': self.categories.get(int(value)), 'count': int(count)}
+                for value, count in zip(self.category_values, category_counts) if count
+            ],
+            'sizes': [
+                {'shoe_size': str(value), 'count': int(count)}
+                for value, count in zip(self.size_values, size_counts) if count
+            ],
+            'price_buckets': [
+                {'min': edges[i], 'max': edges[i + 1] if i + 1 < len(edges) else None, 'count': int(bucket_counts[i])}
+                for i in range(len(edges))
+            ]
+        }
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_facet_snapshot():
+    """Snapshot terbaru; dibangun ulang hanya kalau catalog_index berubah sejak snapshot terakhir."""
+    global _snapshot
+    catalog_index.ensure_fresh()
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != catalog_index.version:
+            _snapshot = FacetSnapshot(*catalog_index.export())
+        return _snapshot
+
+
+def compute_facets(q=None, category_ids=None, sizes=None, min_price=None, max_price=None, in_stock=False,
+                   price_buckets=None):
+    snapshot = get_facet_snapshot()
+    text_ids = catalog_index.text_matches(q) if q else None
+    return snapshot.facet_counts(text_ids, category_ids, sizes, min_price, max_price, in_stock, price_buckets)
@@ -0,0 +1,362 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import pytz
+from postgrest.exceptions import APIError
+from supabase_client import supabase
+from interaction_counters import record_counters
+
+# Event interaksi ditulis ke user_interaction secara bulk di background thread
+INTERACTION_BUFFER_ENABLED = os.environ.get('INTERACTION_BUFFER_ENABLED', 'true').lower() == 'true'
+# Batas jumlah event di memori; kalau penuh, request menunggu (backpressure) lalu menulis langsung
+INTERACTION_BUFFER_MAX_SIZE = int(os.environ.get('INTERACTION_BUFFER_MAX_SIZE', 10000))
+INTERACTION_FLUSH_BATCH_SIZE = int(os.environ.get('INTERACTION_FLUSH_BATCH_SIZE', 500))
+INTERACTION_FLUSH_INTERVAL = float(os.environ.get('INTERACTION_FLUSH_INTERVAL', 2))
+INTERACTION_ENQUEUE_TIMEOUT = float(os.environ.get('INTERACTION_ENQUEUE_TIMEOUT', 1))
+# Journal spill (NDJSON per proses) berisi event yang belum tersimpan. Buffer aktif secara default,
+# jadi journal juga aktif secara default supaya event di antrean tidak hilang saat worker crash;
+# di-set kosong untuk menonaktifkan
+INTERACTION_SPILL_PATH = os.environ.get(
+    'INTERACTION_SPILL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'interaction_spill.ndjson')
+)
+# File spill ditulis ulang (hanya event yang belum tersimpan) setelah melewati ukuran ini
+INTERACTION_SPILL_COMPACT_BYTES = int(os.environ.get('INTERACTION_SPILL_COMPACT_BYTES', 1024 * 1024))
+# Percobaan flush saat Supabase tidak bisa dihubungi sebelum batch dikembalikan ke antrean
+MAX_FLUSH_ATTEMPTS = 3
+
+VALID_INTERACTION_TYPES = ('view', 'wishlist', 'cart', 'order')
+
+
+def get_current_time_wita():
+    wita_tz = pytz.timezone('Asia/Makassar')
+    return datetime.now(wita_tz).isoformat()
+
+
+def make_interaction(id_user, shoe_detail_id, interaction_type, interaction_date=None):
+    return {
+        'id_user': id_user,
+        'shoe_detail_id': shoe_detail_id,
+        'interaction_type': interaction_type,
+        'interaction_date': interaction_date or get_current_time_wita()
+    }
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class InteractionBuffer:
+    """
+    Write-behind buffer untuk tabel user_interaction.
+    - add() hanya menaruh event di antrean (dibatasi max_size, dengan backpressure)
+    - background thread menulis bulk setiap batch_size event atau flush_interval detik
+    - sisa antrean ditulis saat proses berhenti (atexit)
+    - kalau spill_path diisi, event juga dicatat ke journal NDJSON per proses
+      (<spill_path>.<pid>): add() menambahkan baris {"seq", "event"} (fsync, di luar
+      lock antrean), flusher menambahkan {"ack": seq} setelah batch tersimpan, dan file
+      baru ditulis ulang kalau melewati spill_compact_bytes. Journal milik proses yang
+      sudah mati dibaca ulang saat start (event dengan seq > ack terakhir). Jaminannya
+      at-least-once (crash tepat setelah insert bisa menulis ulang satu batch).
+    """
+
+    def __init__(self, client=None, max_size=INTERACTION_BUFFER_MAX_SIZE, batch_size=INTERACTION_FLUSH_BATCH_SIZE,
+                 flush_interval=INTERACTION_FLUSH_INTERVAL, enqueue_timeout=INTERACTION_ENQUEUE_TIMEOUT,
+                 spill_path=INTERACTION_SPILL_PATH, spill_compact_bytes=INTERACTION_SPILL_COMPACT_BYTES):
+        self.client = client
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.spill_path = f'{spill_path}.{os.getpid()}' if spill_path else None
+        self._spill_base = spill_path
+        self.spill_compact_bytes = spill_compact_bytes
+        # Antrean berisi (seq, event); seq naik sesuai urutan antrean, batch selalu diambil dari depan
+        self._events = deque()
+        self._inflight = []
+        self._next_seq = 1
+        self._acked_seq = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        # Menyerialkan I/O journal spill; tidak pernah diambil sambil memegang _cond
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self.stats = {'enqueued': 0, 'flushed': 0, 'direct_writes': 0, 'failed_flushes': 0, 'dropped': 0}
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if self.spill_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+            self._recover_spill_files()
+        self._thread = threading.Thread(target=self._run, name='interaction-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=10):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        if self.spill_path and not self.pending():
+            with self._spill_lock:
+                if os.path.exists(self.spill_path):
+                    os.remove(self.spill_path)
+
+    # ---------- producer ----------
+
+    def add(self, events):
+        """Antrekan satu event (dict) atau list event."""
+        events = [events] if isinstance(events, dict) else list(events)
+        if not events:
+            return
+        deadline = time.monotonic() + self.enqueue_timeout
+        with self._cond:
+            while len(self._events) + len(events) > self.max_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            accepted = len(self._events) + len(events) <= self.max_size and not self._stopping
+            if accepted:
+                entries = self._enqueue(events)
+        if accepted:
+            # fsync journal di luar _cond: flusher & producer lain tidak ikut menunggu disk
+            self._append_spill(entries)
+            return
+
+        # Antrean penuh terlalu lama (atau sedang shutdown): tulis langsung di request ini
+        logging.warning(f'Interaction buffer penuh, menulis {len(events)} event langsung')
+        self._insert(events)
+        with self._cond:
+            self.stats['direct_writes'] += len(events)
+
+    def _enqueue(self, events):
+        # Dipanggil dengan _cond dipegang
+        entries = [(self._next_seq + i, event) for i, event in enumerate(events)]
+        self._next_seq += len(events)
+        self._events.extend(entries)
+        self.stats['enqueued'] += len(events)
+        if len(self._events) >= self.batch_size:
+            self._cond.notify_all()
+        return entries
+
+    def pending(self):
+        with self._cond:
+            return len(self._events) + len(self._inflight)
+
+    def snapshot(self):
+        with self._cond:
+            return dict(self.stats, pending=len(self._events) + len(self._inflight),
+                        max_size=self.max_size, spill_path=self.spill_path)
+
+    # ---------- consumer ----------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._events) < self.batch_size and not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            if self._flush_batch() is None:
+                # Supabase tidak bisa dihubungi: tunggu satu interval sebelum mencoba lagi
+                with self._cond:
+                    if not self._stopping:
+                        self._cond.wait(self.flush_interval)
+
+    def flush(self):
+        """Tulis semua event di antrean sekarang (dipakai saat shutdown)."""
+        while self._flush_batch():
+            pass
+        if self.pending():
+            logging.error(f'{self.pending()} interaksi belum tersimpan saat flush'
+                          + (f', tetap ada di {self.spill_path}' if self.spill_path else ''))
+
+    def _flush_batch(self):
+        """True kalau satu batch diproses, False kalau antrean kosong, None kalau upstream gagal."""
+        with self._flush_lock:
+            with self._cond:
+                batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                self._inflight = batch
+                # Ada ruang lagi di antrean untuk producer yang menunggu
+                self._cond.notify_all()
+            if not batch:
+                return False
+
+            try:
+                written = self._write_batch([event for _, event in batch])
+            except Exception as e:
+                logging.warning(f'Flush interaksi terputus, batch dicoba lagi: {e}')
+                written = None
+            with self._cond:
+                self._inflight = []
+                if written is None:
+                    # Kembalikan ke depan antrean (urutan tetap) untuk dicoba lagi
+                    self._events.extendleft(reversed(batch))
+                else:
+                    self.stats['flushed'] += written
+                    self.stats['dropped'] += len(batch) - written
+                    # Semua event sampai seq terakhir batch ini sudah selesai (batch diambil dari depan)
+                    self._acked_seq = batch[-1][0]
+            if written is not None:
+                self._ack_spill(batch[-1][0])
+            return None if written is None else True
+
+    def _write_batch(self, batch):
+        """Jumlah baris yang tersimpan, atau None kalau Supabase tidak bisa dihubungi."""
+        for attempt in range(1, MAX_FLUSH_ATTEMPTS + 1):
+            try:
+                self._insert(batch)
+                return len(batch)
+            except APIError as e:
+                # Ditolak database (mis. sepatu sudah dihapus): cari baris yang bermasalah
+                logging.warning(f'Flush {len(batch)} interaksi ditolak: {e}')
+                break
+            except Exception as e:
+                with self._cond:
+                    self.stats['failed_flushes'] += 1
+                logging.warning(f'Flush {len(batch)} interaksi gagal (percobaan {attempt}): {e}')
+                if attempt == MAX_FLUSH_ATTEMPTS:
+                    return None
+                time.sleep(min(self.flush_interval, 0.5 * 2 ** attempt))
+
+        written = 0
+        for event in batch:
+            try:
+                self._insert([event])
+                written += 1
+            except APIError as e:
+                logging.error(f'Interaksi dibuang {event}: {e}')
+        return written
+
+    def _insert(self, events):
+        (self.client or supabase).table('user_interaction').insert(events).execute()
+        record_counters(events, client=self.client)
+
+    # ---------- spill file ----------
+
+    def _append_spill(self, entries):
+        if not self.spill_path:
+            return
+        with self._spill_lock:
+            with open(self.spill_path, 'a') as f:
+                f.write(''.join(json.dumps({'seq': seq, 'event': event}) + '\n' for seq, event in entries))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _ack_spill(self, seq):
+        # Ack tidak di-fsync: ack yang hilang saat crash hanya membuat batch itu ditulis ulang (at-least-once)
+        if not self.spill_path:
+            return
+        with self._spill_lock:
+            with open(self.spill_path, 'a') as f:
+                f.write(json.dumps({'ack': seq}) + '\n')
+            if os.path.getsize(self.spill_path) > self.spill_compact_bytes:
+                self._compact_spill()
+
+    def _compact_spill(self):
+        # Dipanggil dengan _spill_lock dipegang. Event yang sudah di antrean tapi barisnya belum
+        # ditulis producer bisa muncul dua kali di file; recovery men-dedup per seq.
+        with self._cond:
+            acked = self._acked_seq
+            remaining = list(self._inflight) + list(self._events)
+        tmp_path = self.spill_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps({'ack': acked}) + '\n')
+            f.write(''.join(json.dumps({'seq': seq, 'event': event}) + '\n' for seq, event in remaining))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spill_path)
+
+    @staticmethod
+    def _read_spill(path):
+        """Event yang belum tersimpan di satu journal (format lama: satu event per baris)."""
+        events, legacy, acked = {}, [], 0
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning(f'Baris spill tidak valid di {path}: {line[:100]}')
+                    continue
+                if 'ack' in record:
+                    acked = max(acked, record['ack'])
+                elif 'seq' in record and 'event' in record:
+                    events[record['seq']] = record['event']
+                else:
+                    legacy.append(record)
+        return legacy + [events[seq] for seq in sorted(events) if seq > acked]
+
+    def _recover_spill_files(self):
+        recovered = []
+        for path in glob.glob(f'{self._spill_base}.*'):
+            suffix = path.rsplit('.', 1)[-1]
+            if not suffix.isdigit() or (int(suffix) != os.getpid() and _pid_alive(int(suffix))):
+                continue
+            # rename atomic: kalau beberapa worker start bersamaan, hanya satu yang mengambil file ini
+            claimed = f'{path}.recover.{os.getpid()}'
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+            recovered.extend(self._read_spill(claimed))
+            os.remove(claimed)
+
+        if recovered:
+            logging.info(f'{len(recovered)} interaksi dibaca ulang dari spill file')
+            with self._cond:
+                entries = self._enqueue(recovered)
+            self._append_spill(entries)
+
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+
+def get_interaction_buffer():
+    """Buffer milik proses ini (dibuat & di-start lazy per PID, aman untuk worker hasil fork)."""
+    pid = os.getpid()
+    buffer = _buffers.get(pid)
+    if buffer is None:
+        with _buffers_lock:
+            buffer = _buffers.get(pid)
+            if buffer is None:
+                _buffers.clear()
+                buffer = _buffers[pid] = InteractionBuffer().start()
+    return buffer
+
+
+def record_interactions(events):
+    """Catat event user_interaction: lewat buffer kalau aktif, kalau tidak insert langsung."""
+    events = [events] if isinstance(events, dict) else list(events)
+    if not events:
+        return
+    if INTERACTION_BUFFER_ENABLED:
+        get_interaction_buffer().add(events)
+    else:
+        supabase.table('user_interaction').insert(events).execute()
+        record_counters(events)
+
+
+def record_interaction(id_user, shoe_detail_id, interaction_type, interaction_date=None):
+    record_interactions(make_interaction(id_user, shoe_detail_id, interaction_type, interaction_date))
@@ -0,0 +1,148 @@
+import logging
+import os
+import time
+from collections import Counter
+from supabase_client import supabase
+from cache import TTLCache
+from pagination import iter_rows
+from shoe_lookup import IN_QUERY_CHUNK_SIZE
+
+# Cache baca counter per sepatu (detik); counter sendiri selalu di-update di database
+INTERACTION_COUNTER_CACHE_TTL = int(os.environ.get('INTERACTION_COUNTER_CACHE_TTL', 30))
+
+COUNTER_COLUMNS = {
+    'view': 'view_count',
+    'wishlist': 'wishlist_count',
+    'cart': 'cart_count',
+    'order': 'order_count'
+}
+EMPTY_COUNTERS = {column: 0 for column in COUNTER_COLUMNS.values()}
+
+counter_cache = TTLCache(max_size=10000, ttl=INTERACTION_COUNTER_CACHE_TTL)
+_missing_rpc_logged = False
+
+
+def count_deltas(events, sign=1):
+    """Counter {(shoe_detail_id, interaction_type): n} dari list event user_interaction."""
+    deltas = Counter()
+    for event in events:
+        if event.get('interaction_type') in COUNTER_COLUMNS and event.get('shoe_detail_id') is not None:
+            deltas[(int(event['shoe_detail_id']), event['interaction_type'])] += sign
+    return deltas
+
+
+def apply_counter_deltas(deltas, client=None):
+    """
+    Tambahkan deltas ke shoe_interaction_counter lewat satu RPC.
+    Dipanggil setelah baris user_interaction tersimpan; kegagalan hanya di-log
+    (interaksi sudah tersimpan dan tidak boleh ditulis ulang), selisihnya dikoreksi
+    oleh reconcile_counters().
+    """
+    global _missing_rpc_logged
+    items = [
+        {'shoe_detail_id': shoe_id, 'interaction_type': interaction_type, 'count': count}
+        for (shoe_id, interaction_type), count in sorted(deltas.items()) if count
+    ]
+    if not items:
+        return
+    try:
+        (client or supabase).rpc('increment_interaction_counters', {'p_deltas': items}).execute()
+    except Exception as e:
+        if getattr(e, 'code', None) == 'PGRST202':
+            if not _missing_rpc_logged:
+                logging.warning('Fungsi increment_interaction_counters belum ada di database, counter tidak di-update')
+                _missing_rpc_logged = True
+            return
+        logging.warning(f'Update counter interaksi gagal ({len(items)} baris), dikoreksi saat reconcile: {e}')
+        return
+    for shoe_id in {item['shoe_detail_id'] for item in items}:
+        counter_cache.invalidate(shoe_id)
+
+
+def record_counters(events, sign=1, client=None):
+    apply_counter_deltas(count_deltas(events, sign), client)
+
+
+def get_counters(shoe_ids):
+    """{shoe_detail_id: {view_count, wishlist_count, cart_count, order_count}}; sepatu tanpa interaksi bernilai 0."""
+    shoe_ids = list(dict.fromkeys(int(s) for s in shoe_ids))
+    counters, missing = counter_cache.get_many(shoe_ids)
+    for i in range(0, len(missing), IN_QUERY_CHUNK_SIZE):
+        chunk = missing[i:i + IN_QUERY_CHUNK_SIZE]
+        result = supabase.table('shoe_interaction_counter').select('*').in_('shoe_detail_id', chunk).execute()
+        rows = {row['shoe_detail_id']: {column: row.get(column) or 0 for column in EMPTY_COUNTERS} for row in result.data or []}
+        for shoe_id in chunk:
+            counters[shoe_id] = rows.get(shoe_id, dict(EMPTY_COUNTERS))
+            counter_cache.set(shoe_id, counters[shoe_id])
+    return counters
+
+
+def top_counters(column, limit):
+    """Sepatu dengan counter tertinggi untuk satu kolom (mis. badge populer)."""
+    result = supabase.table('shoe_interaction_counter').select('*') \
+        .order(column, desc=True).order('shoe_detail_id').limit(limit).execute()
+    return result.data or []
+
+
+def _expected_counts():
+    """Hitung ulang dari user_interaction: GROUP BY di database, atau scan per halaman kalau RPC belum ada."""
+    try:
+        # Satu nilai JSONB berisi semua (shoe, tipe): tidak kena batas max-rows PostgREST
+        rows = supabase.rpc('interaction_counts', {}).execute().data or []
+        if not isinstance(rows, list):
+            raise ValueError('interaction_counts harus mengembalikan array JSONB')
+        return {(row['shoe_detail_id'], row['interaction_type']): row['count'] for row in rows}, 'rpc'
+    except Exception as e:
+        if getattr(e, 'code', None) != 'PGRST202':
+            raise
+    logging.warning('Fungsi interaction_counts belum ada di database, user_interaction di-scan per halaman')
+    rows = iter_rows(lambda: supabase.table('user_interaction').select('interaction_id,shoe_detail_id,interaction_type'),
+                     'interaction_id')
+    return dict(count_deltas(rows)), 'scan'
+
+
+def reconcile_counters(apply=True, max_report=50):
+    """
+    Bangun ulang counter dari tabel user_interaction dan laporkan drift
+    (selisih counter tersimpan terhadap hitungan ulang) per sepatu.
+    apply=False hanya melaporkan. Interaksi yang tersimpan selama reconcile
+    berjalan bisa memunculkan drift kecil; run berikutnya mengoreksinya.
+    """
+    started = time.perf_counter()
+    counts, source = _expected_counts()
+    expected = {}
+    for (shoe_id, interaction_type), count in counts.items():
+        expected.setdefault(int(shoe_id), dict(EMPTY_COUNTERS))[COUNTER_COLUMNS[interaction_type]] = int(count)
+
+    stored = {
+        row['shoe_detail_id']: {column: row.get(column) or 0 for column in EMPTY_COUNTERS}
+        for row in iter_rows(lambda: supabase.table('shoe_interaction_counter').select('*'), 'shoe_detail_id')
+    }
+
+    drift = []
+    for shoe_id in sorted(set(expected) | set(stored)):
+        want = expected.get(shoe_id, EMPTY_COUNTERS)
+        have = stored.get(shoe_id, EMPTY_COUNTERS)
+        diff = {column: have[column] - want[column] for column in EMPTY_COUNTERS if have[column] != want[column]}
+        if diff:
+            drift.append({'shoe_detail_id': shoe_id, 'drift': diff, 'expected': want, 'stored': have})
+
+    if apply and drift:
+        updates = [dict(item['expected'], shoe_detail_id=item['shoe_detail_id']) for item in drift]
+        for i in range(0, len(updates), IN_QUERY_CHUNK_SIZE):
+            supabase.table('shoe_interaction_counter').upsert(updates[i:i + IN_QUERY_CHUNK_SIZE]).execute()
+        counter_cache.clear()
+
+    drift.sort(key=lambda item: (-sum(abs(v) for v in item['drift'].values()), item['shoe_detail_id']))
+    report = {
+        'source': source,
+        'applied': bool(apply and drift),
+        'shoes_checked': len(set(expected) | set(stored)),
+        'drifted_shoes': len(drift),
+        'total_abs_drift': sum(abs(v) for item in drift for v in item['drift'].values()),
+        'drift': drift[:max_report],
+        'duration_seconds': round(time.perf_counter() - started, 3)
+    }
+    if drift:
+        logging.warning(f'Reconcile counter interaksi: drift di {len(drift)} sepatu (total {report["total_abs_drift"]})')
+    return report
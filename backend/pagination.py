@@ -0,0 +1,130 @@
+import base64
+import json
+import os
+from flask import request, jsonify
+
+# Default & batas maksimum limit per halaman (sama dengan batas default PostgREST)
+DEFAULT_PAGE_LIMIT = int(os.environ.get('DEFAULT_PAGE_LIMIT', 1000))
+MAX_PAGE_LIMIT = int(os.environ.get('MAX_PAGE_LIMIT', 1000))
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Cursor opaque -> list nilai key; ValueError kalau cursor tidak valid."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or not values:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def parse_page_args(args=None):
+    """Return (limit, cursor_values, envelope) dari query string ?limit=&cursor=."""
+    args = request.args if args is None else args
+    limit = args.get('limit', DEFAULT_PAGE_LIMIT, type=int)
+    if limit is None or limit < 1:
+        raise ValueError('limit must be a positive integer')
+    cursor = args.get('cursor')
+    values = decode_cursor(cursor) if cursor else None
+    # Response envelope {data, next_cursor} hanya kalau client memakai pagination;
+    # tanpa parameter, body tetap array (kompatibel dengan frontend lama)
+    envelope = 'limit' in args or 'cursor' in args
+    return min(limit, MAX_PAGE_LIMIT), values, envelope
+
+
+def is_key_value(value):
+    # Semua primary key yang dipaginasi berupa integer (bool juga turunan int di Python)
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def fetch_page(query, key, limit, after=None, desc=False):
+    """
+    Keyset pagination pada satu kolom unik (primary key integer):
+    ORDER BY key, WHERE key > after, LIMIT limit + 1 untuk tahu masih ada halaman berikutnya.
+    Return (rows, next_cursor); ValueError kalau after bukan integer (cursor dari client).
+    """
+    if after is not None and not is_key_value(after):
+        raise ValueError('Invalid cursor')
+    if after is not None:
+        query = query.lt(key, after) if desc else query.gt(key, after)
+    rows = query.order(key, desc=desc).limit(limit + 1).execute().data or []
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor([rows[-1][key]])
+    return rows, None
+
+
+def fetch_keyset_page(query, keys, limit, after=None, desc=False):
+    """
+    Keyset pagination pada beberapa kolom (kolom terakhir harus unik, mis. order_date, order_id):
+    (k1, k2) > (a1, a2) ditulis sebagai or(k1.gt.a1,and(k1.eq.a1,k2.gt.a2)).
+    Nilai after harus sudah divalidasi pemanggil (masuk ke filter PostgREST apa adanya).
+    Return (rows, next_cursor).
+    """
+    if after is not None:
+        op = 'lt' if desc else 'gt'
+        conditions = []
+        for i, key in enumerate(keys):
+            parts = [f'{k}.eq.{v}' for k, v in zip(keys[:i], after[:i])] + [f'{key}.{op}.{after[i]}']
+            conditions.append(parts[0] if len(parts) == 1 else f'and({",".join(parts)})')
+        query = query.or_(','.join(conditions))
+    for key in keys:
+        query = query.order(key, desc=desc)
+    rows = query.limit(limit + 1).execute().data or []
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor([rows[-1][key] for key in keys])
+    return rows, None
+
+
+def iter_pages(query_factory, key, page_size=MAX_PAGE_LIMIT, desc=False):
+    """Generator halaman-halaman keyset; query_factory() membuat query baru per halaman."""
+    after = None
+    while True:
+        rows, next_cursor = fetch_page(query_factory(), key, page_size, after, desc)
+        if rows:
+            yield rows
+        if next_cursor is None:
+            return
+        after = rows[-1][key]
+
+
+def iter_rows(query_factory, key, page_size=MAX_PAGE_LIMIT, desc=False):
+    """Generator semua baris tabel, dibaca per halaman keyset."""
+    for rows in iter_pages(query_factory, key, page_size, desc):
+        yield from rows
+
+
+def paginated_response(query, key, transform=None, empty_message=None):
+    """
+    Response list dengan keyset pagination.
+    transform(rows) -> items untuk satu halaman. empty_message: pesan 404 kalau
+    halaman pertama kosong (perilaku lama beberapa endpoint).
+    Tanpa ?limit/?cursor body berupa array dan cursor berikutnya ada di header X-Next-Cursor.
+    """
+    try:
+        limit, after, envelope = parse_page_args()
+        if after is not None and len(after) != 1:
+            raise ValueError('Invalid cursor')
+        rows, next_cursor = fetch_page(query, key, limit, after[0] if after else None)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    items = transform(rows) if transform else rows
+
+    if not items and after is None and empty_message:
+        return jsonify({'message': empty_message}), 404
+
+    if envelope:
+        return jsonify({'data': items, 'next_cursor': next_cursor, 'limit': limit}), 200
+
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
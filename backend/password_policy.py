@@ -0,0 +1,167 @@
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+# Algoritma & cost hash password (format method werkzeug): pbkdf2:<hash>:<iterations> atau scrypt:<n>:<r>:<p>.
+# Default mengikuti default werkzeug yang terpasang. Hash tersimpan dengan parameter lain di-hash ulang
+# otomatis saat login berhasil, kecuali cost-nya lebih tinggi dari policy (lihat PASSWORD_HASH_ALLOW_DOWNGRADE).
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}')
+# true = hash dengan cost lebih tinggi dari policy juga di-hash ulang ke cost policy (turun)
+PASSWORD_HASH_ALLOW_DOWNGRADE = os.environ.get('PASSWORD_HASH_ALLOW_DOWNGRADE', 'false').lower() == 'true'
+PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+# Verifikasi di worker pool terpisah (0 = langsung di thread request).
+# pbkdf2/scrypt di hashlib melepas GIL, jadi worker berjalan paralel di beberapa core.
+PASSWORD_VERIFY_WORKERS = int(os.environ.get('PASSWORD_VERIFY_WORKERS', 0))
+# Batas verifikasi yang menunggu + berjalan; di atas ini login ditolak (503) daripada antre tanpa batas
+PASSWORD_VERIFY_MAX_PENDING = int(os.environ.get('PASSWORD_VERIFY_MAX_PENDING', 32))
+PASSWORD_VERIFY_TIMEOUT = float(os.environ.get('PASSWORD_VERIFY_TIMEOUT', 5))
+# Response 503 yang sama untuk semua route login saat pool verifikasi penuh
+PASSWORD_VERIFY_BUSY_MESSAGE = 'Too many login attempts in progress, try again shortly'
+PASSWORD_VERIFY_RETRY_AFTER = '1'
+
+SCRYPT_DEFAULTS = (2 ** 15, 8, 1)
+
+
+class PasswordVerifyBusy(Exception):
+    pass
+
+
+def normalize_method(method):
+    """Bentuk lengkap method seperti yang disimpan werkzeug di awal hash (parameter default ikut ditulis)."""
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else SCRYPT_DEFAULTS
+        return f'scrypt:{n}:{r}:{p}'
+    raise ValueError(f'Metode hash password tidak didukung: {method}')
+
+
+POLICY_METHOD = normalize_method(PASSWORD_HASH_METHOD)
+
+
+def _cost(method):
+    """(algoritma, parameter cost) dari method lengkap; cost hanya dibandingkan dalam algoritma yang sama."""
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        return f'pbkdf2:{args[0]}', (int(args[1]),)
+    return name, tuple(int(a) for a in args)
+
+
+def hash_password(password, method=POLICY_METHOD):
+    return generate_password_hash(password, method=method, salt_length=PASSWORD_SALT_LENGTH)
+
+
+def needs_rehash(stored_hash, method=POLICY_METHOD, allow_downgrade=PASSWORD_HASH_ALLOW_DOWNGRADE):
+    """
+    True kalau hash tersimpan dibuat dengan algoritma/cost yang berbeda dari policy.
+    Hash dengan algoritma sama dan cost lebih tinggi di semua parameter tidak diturunkan
+    kecuali allow_downgrade.
+    """
+    stored_method = str(stored_hash or '').split('$', 1)[0]
+    try:
+        stored_method = normalize_method(stored_method)
+    except ValueError:
+        return True
+    if stored_method == method:
+        return False
+    if not allow_downgrade:
+        stored_name, stored_cost = _cost(stored_method)
+        policy_name, policy_cost = _cost(method)
+        if stored_name == policy_name and all(s >= p for s, p in zip(stored_cost, policy_cost)):
+            return False
+    return True
+
+
+class VerifyPool:
+    """ThreadPoolExecutor dengan batas jumlah verifikasi yang boleh menunggu (semaphore non-blocking)."""
+
+    def __init__(self, workers, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-verify')
+        self.slots = threading.BoundedSemaphore(max(max_pending, workers))
+
+    def verify(self, stored_hash, password, timeout=PASSWORD_VERIFY_TIMEOUT):
+        if not self.slots.acquire(blocking=False):
+            raise PasswordVerifyBusy('Terlalu banyak login diproses bersamaan')
+        try:
+            future = self.executor.submit(check_password_hash, stored_hash, password)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise PasswordVerifyBusy('Verifikasi password melebihi batas waktu') from None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_verify_pool():
+    """Pool milik proses ini (dibuat lazy per PID, aman untuk worker hasil fork)."""
+    pid = os.getpid()
+    pool = _pools.get(pid)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(pid)
+            if pool is None:
+                _pools.clear()
+                pool = _pools[pid] = VerifyPool(PASSWORD_VERIFY_WORKERS, PASSWORD_VERIFY_MAX_PENDING)
+    return pool
+
+
+def verify_password(stored_hash, password):
+    """check_password_hash, lewat worker pool kalau PASSWORD_VERIFY_WORKERS > 0 (bisa raise PasswordVerifyBusy)."""
+    if not stored_hash:
+        return False
+    if PASSWORD_VERIFY_WORKERS > 0:
+        return get_verify_pool().verify(stored_hash, password)
+    return check_password_hash(stored_hash, password)
+
+
+def verify_and_upgrade(user, password):
+    """
+    Verifikasi password baris user; kalau benar dan hash-nya belum sesuai policy,
+    hash baru disimpan (gagal simpan hanya di-log, login tetap berhasil).
+    """
+    if not verify_password(user.get('password'), password):
+        return False
+    if needs_rehash(user['password']) and user.get('user_id') is not None:
+        # Import di sini: modul ini (dan benchmark CLI-nya) tidak butuh kredensial Supabase
+        from supabase_client import supabase
+        try:
+            supabase.table('user').update({'password': hash_password(password)}).eq('user_id', user['user_id']).execute()
+        except Exception as e:
+            logging.warning(f'Rehash password user {user["user_id"]} gagal: {e}')
+    return True
+
+
+def benchmark(methods, seconds=2.0):
+    """Login (verifikasi) per detik per core untuk setiap method; verifikasi berjalan di satu thread."""
+    results = []
+    for method in methods:
+        method = normalize_method(method)
+        stored = hash_password('benchmark-password', method)
+        rounds, started = 0, time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            check_password_hash(stored, 'benchmark-password')
+            rounds += 1
+        elapsed = time.perf_counter() - started
+        results.append({'method': method, 'logins_per_second_per_core': round(rounds / elapsed, 1),
+                        'ms_per_login': round(elapsed / rounds * 1000, 1)})
+    return results
+
+
+if __name__ == '__main__':
+    # python password_policy.py [method ...]  (default: policy aktif + beberapa setting umum)
+    for row in benchmark(sys.argv[1:] or [POLICY_METHOD, 'pbkdf2:sha256:1000000', 'pbkdf2:sha256:260000',
+                                           'scrypt:32768:8:1', 'scrypt:16384:8:1']):
+        print(f"{row['method']:<24} {row['logins_per_second_per_core']:>8} login/s/core {row['ms_per_login']:>8} ms")
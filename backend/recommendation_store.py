@@ -0,0 +1,129 @@
+import os
+import time
+from supabase_client import supabase
+from cache import TTLCache
+from bulk_writer import BulkWriter
+
+# 'global'   : ranking global disimpan sekali di shoe_recomendation_global,
+#              shoe_recomendation_for_users hanya berisi override per user
+# 'per_user' : mode lama, ranking global di-copy ke setiap user
+RECOMMENDATION_STORAGE = os.environ.get('RECOMMENDATION_STORAGE', 'global')
+
+WRITE_BATCH_SIZE = int(os.environ.get('RECOMMENDATION_WRITE_BATCH_SIZE', 500))
+WRITE_MAX_WORKERS = int(os.environ.get('RECOMMENDATION_WRITE_WORKERS', 4))
+
+# Pointer generation aktif di-cache sebentar supaya GET tidak selalu query pointer
+_generation_cache = TTLCache(max_size=1, ttl=float(os.environ.get('RECOMMENDATION_GENERATION_TTL', 5)))
+
+
+# ============================
+# GENERATION (atomic swap)
+# ============================
+# Hasil training ditulis dengan generation baru, lalu pointer di
+# recommendation_generation dipindah ke generation itu. Selama penulisan,
+# pembaca tetap melihat generation lama secara utuh. Baris dengan
+# generation NULL (override manual) selalu terlihat.
+
+def new_generation():
+    return int(time.time() * 1000)
+
+
+def get_active_generation():
+    generation = _generation_cache.get('active')
+    if generation is None:
+        result = supabase.table('recommendation_generation').select('active_generation').eq('id', 1).execute()
+        generation = result.data[0]['active_generation'] if result.data else 0
+        _generation_cache.set('active', generation)
+    return generation
+
+
+def activate_generation(generation):
+    """
+    Pindahkan pointer ke generation baru. Generation sebelumnya masih disimpan
+    (worker lain bisa masih membaca pointer lama dari cache); yang lebih tua dihapus.
+    """
+    result = supabase.table('recommendation_generation').select('active_generation').eq('id', 1).execute()
+    previous = result.data[0]['active_generation'] if result.data else 0
+
+    supabase.table('recommendation_generation').upsert({
+        'id': 1,
+        'active_generation': generation,
+        'previous_generation': previous
+    }).execute()
+    _generation_cache.set('active', generation)
+
+    supabase.table('shoe_recomendation_global').delete().lt('generation', previous).execute()
+    supabase.table('shoe_recomendation_for_users').delete().lt('generation', previous).execute()
+    return previous
+
+
+def visible_user_rows(query, generation=None):
+    """Filter baris shoe_recomendation_for_users yang terlihat: override manual + generation aktif."""
+    generation = get_active_generation() if generation is None else generation
+    return query.or_(f'generation.is.null,generation.eq.{generation}')
+
+
+# ============================
+# WRITE
+# ============================
+
+def save_global_ranking(shoe_scores, generation):
+    """
+    Tulis ranking global (list (shoe_detail_id, score) terurut) untuk generation.
+    Hanya O(top_n) baris yang ditulis.
+    """
+    records = [
+        {'rank': rank, 'shoe_detail_id': int(shoe_id), 'score': float(score), 'generation': generation}
+        for rank, (shoe_id, score) in enumerate(shoe_scores, start=1)
+    ]
+    if records:
+        supabase.table('shoe_recomendation_global').insert(records).execute()
+    return len(records)
+
+
+def write_user_recommendations(records, generation, progress_callback=None):
+    """Tulis rekomendasi per user untuk generation secara paralel (BulkWriter)."""
+    writer = BulkWriter(
+        'shoe_recomendation_for_users',
+        batch_size=WRITE_BATCH_SIZE,
+        max_workers=WRITE_MAX_WORKERS,
+        progress_callback=progress_callback
+    )
+    return writer.write([dict(record, generation=generation) for record in records])
+
+
+# ============================
+# READ
+# ============================
+
+def get_global_ranking():
+    result = supabase.table('shoe_recomendation_global').select('*') \
+        .eq('generation', get_active_generation()) \
+        .order('rank') \
+        .execute()
+    return result.data or []
+
+
+def get_user_recommendations(user_id):
+    """
+    Rekomendasi untuk satu user: override per user dulu, lalu ranking global
+    yang belum ada di override. Baris dari ranking global tidak punya
+    id_shoe_recomendation (None).
+    """
+    query = supabase.table('shoe_recomendation_for_users').select('*').eq('id_user', user_id)
+    overrides = visible_user_rows(query).execute().data or []
+    if RECOMMENDATION_STORAGE != 'global':
+        return overrides
+
+    seen = {rec['shoe_detail_id'] for rec in overrides}
+    merged = list(overrides)
+    for row in get_global_ranking():
+        if row['shoe_detail_id'] in seen:
+            continue
+        seen.add(row['shoe_detail_id'])
+        merged.append({
+            'id_shoe_recomendation': None,
+            'id_user': user_id,
+            'shoe_detail_id': row['shoe_detail_id']
+        })
+    return merged
@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from user_lookup import current_user_is_admin
+from analytics import sales_report, today_wita, day_cache, MAX_ANALYTICS_DAYS
+from datetime import datetime, timedelta
+
+analytics_bp = Blueprint('analytics', __name__)
+
+DEFAULT_RANGE_DAYS = 30
+MAX_TOP_SHOES = 100
+
+
+@analytics_bp.route('/api/analytics/sales', methods=['GET'])
+@jwt_required()
+def get_sales_report():
+    """
+    Laporan penjualan: ?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=day|week&top=20
+    Default 30 hari terakhir sampai hari ini (WITA).
+    """
+    if not current_user_is_admin():
+        return jsonify({'message': 'Admin access required'}), 403
+
+    try:
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if 'to' in request.args else today_wita()
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if 'from' in request.args \
+            else end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    except ValueError:
+        return jsonify({'message': 'Invalid date format. Use YYYY-MM-DD.'}), 400
+    if start > end:
+        return jsonify({'message': "'from' must not be after 'to'"}), 400
+    if (end - start).days + 1 > MAX_ANALYTICS_DAYS:
+        return jsonify({'message': f'Date range is limited to {MAX_ANALYTICS_DAYS} days'}), 400
+
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('day', 'week'):
+        return jsonify({'message': "Invalid granularity. Use 'day' or 'week'."}), 400
+    top_n = request.args.get('top', 20, type=int)
+    if top_n is None or top_n < 0:
+        return jsonify({'message': 'top must be a non-negative integer'}), 400
+
+    return jsonify(sales_report(start, end, granularity, min(top_n, MAX_TOP_SHOES))), 200
+
+
+@analytics_bp.route('/api/analytics/sales/cache', methods=['GET', 'DELETE'])
+@jwt_required()
+def sales_cache():
+    # DELETE membuang semua rollup hari yang sudah di-cache (mis. setelah koreksi data manual)
+    if not current_user_is_admin():
+        return jsonify({'message': 'Admin access required'}), 403
+    if request.method == 'DELETE':
+        day_cache.clear()
+    return jsonify(day_cache.stats()), 200
@@ -1,16 +1,82 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from supabase_client import supabase
+from user_lookup import user_exists, prefetch_principals
+from data_loader import get_loader, invalidate_loaded
+from interaction_buffer import record_interaction
 from datetime import datetime
+import logging
+import os
 import pytz
 
 cart_bp = Blueprint('cart', __name__)
 
+# Add to cart lewat fungsi Postgres add_to_cart (lihat supabase_schema.sql): satu round trip,
+# stock dicek & quantity di-upsert dalam satu transaksi
+CART_ATOMIC_RPC = os.environ.get('CART_ATOMIC_RPC', 'true').lower() == 'true'
+
+# Status dari RPC add_to_cart -> (message, status code) response lama
+ADD_TO_CART_RESPONSES = {
+    'created': ('Item added to cart successfully', 201),
+    'updated': ('Item quantity updated in cart', 200),
+    'user_not_found': ('User not found', 404),
+    'shoe_not_found': ('Shoe not found', 404),
+    'insufficient_stock': ('Insufficient stock available', 400),
+    'invalid_quantity': ('Quantity must be a positive integer', 400)
+}
+
 def get_current_time_wita():
     wita_tz = pytz.timezone('Asia/Makassar')
     return datetime.now(wita_tz).isoformat()
 
 
+# Cart + detail sepatu diambil dalam satu query (embedded select lewat FK cart.shoe_detail_id)
+CART_WITH_SHOE_COLUMNS = '*, shoe_detail(shoe_name,shoe_price,shoe_size,stock)'
+
+
+def format_cart_item(item):
+    """Baris cart hasil embedded select -> format response lama + line_total; None kalau sepatu sudah tidak ada."""
+    shoe = item.get('shoe_detail')
+    if not shoe:
+        return None
+    return {
+        'id_cart': item['id_cart'],
+        'shoe_detail_id': item['shoe_detail_id'],
+        'id_user': item['id_user'],
+        'quantity': item['quantity'],
+        'shoe_name': shoe['shoe_name'],
+        'shoe_price': shoe['shoe_price'],
+        'shoe_size': shoe['shoe_size'],
+        'stock': shoe['stock'],
+        'line_total': round(shoe['shoe_price'] * item['quantity'], 2),
+        'date_added': item['date_added'],
+        'last_updated': item['last_updated']
+    }
+
+
+def fetch_user_cart(user_id):
+    result = supabase.table('cart').select(CART_WITH_SHOE_COLUMNS).eq('id_user', user_id).order('id_cart').execute()
+    return [entry for entry in map(format_cart_item, result.data or []) if entry]
+
+
+def cart_response(items):
+    """
+    Array item cart (format lama) dengan subtotal di header X-Cart-Subtotal;
+    ?summary=true mengembalikan {items, item_count, total_quantity, subtotal}.
+    """
+    subtotal = round(sum(item['line_total'] for item in items), 2)
+    if request.args.get('summary', 'false').lower() == 'true':
+        return jsonify({
+            'items': items,
+            'item_count': len(items),
+            'total_quantity': sum(item['quantity'] for item in items),
+            'subtotal': subtotal
+        }), 200
+    response = jsonify(items)
+    response.headers['X-Cart-Subtotal'] = str(subtotal)
+    return response, 200
+
+
 @cart_bp.route('/api/cart/<int:user_id>', methods=['GET'])
 @jwt_required()
 def get_cart(user_id):
@@ -18,29 +84,28 @@ def get_cart(user_id):
     if int(current_user) != user_id:
         return jsonify({'message': 'You are not authorized to view this cart'}), 403
 
-    cart_result = supabase.table('cart').select('*').eq('id_user', user_id).execute()
-    if cart_result.data:
-        result = []
-        for item in cart_result.data:
-            shoe_result = supabase.table('shoe_detail').select('shoe_name,shoe_price,shoe_size,stock').eq('shoe_detail_id', item['shoe_detail_id']).execute()
-            shoe = shoe_result.data[0] if shoe_result.data else None
-            if shoe:
-                result.append({
-                    'id_cart': item['id_cart'],
-                    'shoe_detail_id': item['shoe_detail_id'],
-                    'id_user': item['id_user'],
-                    'quantity': item['quantity'],
-                    'shoe_name': shoe['shoe_name'],
-                    'shoe_price': shoe['shoe_price'],
-                    'shoe_size': shoe['shoe_size'],
-                    'stock': shoe['stock'],
-                    'date_added': item['date_added'],
-                    'last_updated': item['last_updated']
-                })
-        return jsonify(result), 200
+    items = fetch_user_cart(user_id)
+    if items:
+        return cart_response(items)
     return jsonify({'message': 'Cart is empty'}), 404
 
 
+def fetch_shoe_stock(shoe_id):
+    # Stock dibaca dari database (bukan shoe_cache) karena dipakai untuk validasi; lewat loader
+    # supaya digabung dengan lookup stock lain dalam request yang sama
+    return get_loader().load_one('shoe_detail', 'shoe_detail_id', shoe_id, 'stock')
+
+
+def is_unique_violation(error):
+    # Postgres unique_violation (mis. idx_cart_user_shoe) dari PostgREST
+    return getattr(error, 'code', None) == '23505'
+
+
+def valid_quantity(value):
+    # Quantity cart selalu bilangan bulat >= 1 (negatif akan menambah stock saat checkout)
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+
 @cart_bp.route('/api/cart', methods=['POST'])
 @jwt_required()
 def add_to_cart():
@@ -53,33 +118,51 @@ def add_to_cart():
     if int(current_user) != data.get('id_user'):
         return jsonify({'message': 'You are not authorized to add items to this cart'}), 403
 
+    if not valid_quantity(data['quantity']):
+        return jsonify({'message': ADD_TO_CART_RESPONSES['invalid_quantity'][0]}), 400
+
+    if CART_ATOMIC_RPC:
+        try:
+            result = supabase.rpc('add_to_cart', {
+                'p_user_id': data['id_user'],
+                'p_shoe_detail_id': data['shoe_detail_id'],
+                'p_quantity': data['quantity']
+            }).execute()
+        except Exception as e:
+            # Fungsi belum dibuat di database (PGRST202): pakai alur lama
+            if getattr(e, 'code', None) != 'PGRST202':
+                raise
+            logging.warning('Fungsi add_to_cart belum ada di database, memakai alur add to cart lama')
+        else:
+            outcome = result.data or {}
+            message, status_code = ADD_TO_CART_RESPONSES[outcome['status']]
+            body = {'message': message}
+            if status_code < 300:
+                body.update({'id_cart': outcome['id_cart'], 'quantity': outcome['quantity']})
+            return jsonify(body), status_code
+
+    return add_to_cart_sequential(data)
+
+
+def add_to_cart_sequential(data):
+    """Alur lama (beberapa query terpisah, tidak atomic); dipakai kalau RPC add_to_cart tidak tersedia."""
     # Cek user exists
-    user_result = supabase.table('user').select('user_id').eq('user_id', data['id_user']).execute()
-    if not user_result.data:
+    if not user_exists(data['id_user']):
         return jsonify({'message': 'User not found'}), 404
 
-    # Cek shoe exists & stock
-    shoe_result = supabase.table('shoe_detail').select('*').eq('shoe_detail_id', data['shoe_detail_id']).execute()
-    if not shoe_result.data:
+    # Cek shoe exists & stock (cukup kolom stock)
+    shoe = fetch_shoe_stock(data['shoe_detail_id'])
+    if not shoe:
         return jsonify({'message': 'Shoe not found'}), 404
 
-    shoe = shoe_result.data[0]
     if shoe['stock'] < data['quantity']:
         return jsonify({'message': 'Insufficient stock available'}), 400
 
     # Cek item sudah ada di cart
     existing_result = supabase.table('cart').select('*').eq('id_user', data['id_user']).eq('shoe_detail_id', data['shoe_detail_id']).execute()
+    existing_item = existing_result.data[0] if existing_result.data else None
 
-    if existing_result.data:
-        existing_item = existing_result.data[0]
-        new_quantity = existing_item['quantity'] + data['quantity']
-        supabase.table('cart').update({
-            'quantity': new_quantity,
-            'last_updated': get_current_time_wita()
-        }).eq('id_cart', existing_item['id_cart']).execute()
-        message = 'Item quantity updated in cart'
-        status_code = 200
-    else:
+    if existing_item is None:
         new_item = {
             'shoe_detail_id': data['shoe_detail_id'],
             'id_user': data['id_user'],
@@ -87,18 +170,28 @@ def add_to_cart():
             'date_added': get_current_time_wita(),
             'last_updated': get_current_time_wita()
         }
-        supabase.table('cart').insert(new_item).execute()
-        message = 'Item added to cart successfully'
-        status_code = 201
-
-    # Catat interaksi
-    new_interaction = {
-        'id_user': data['id_user'],
-        'shoe_detail_id': data['shoe_detail_id'],
-        'interaction_type': 'cart',
-        'interaction_date': get_current_time_wita()
-    }
-    supabase.table('user_interaction').insert(new_interaction).execute()
+        try:
+            supabase.table('cart').insert(new_item).execute()
+            message, status_code = ADD_TO_CART_RESPONSES['created']
+        except Exception as e:
+            # Request lain untuk sepatu yang sama insert lebih dulu (idx_cart_user_shoe): gabungkan ke baris itu
+            if not is_unique_violation(e):
+                raise
+            existing_item = supabase.table('cart').select('*').eq('id_user', data['id_user']) \
+                .eq('shoe_detail_id', data['shoe_detail_id']).execute().data[0]
+
+    if existing_item is not None:
+        new_quantity = existing_item['quantity'] + data['quantity']
+        if shoe['stock'] < new_quantity:
+            return jsonify({'message': ADD_TO_CART_RESPONSES['insufficient_stock'][0]}), 400
+        supabase.table('cart').update({
+            'quantity': new_quantity,
+            'last_updated': get_current_time_wita()
+        }).eq('id_cart', existing_item['id_cart']).execute()
+        message, status_code = ADD_TO_CART_RESPONSES['updated']
+
+    # Catat interaksi (ditulis bulk di background)
+    record_interaction(data['id_user'], data['shoe_detail_id'], 'cart')
 
     return jsonify({'message': message}), status_code
 
@@ -124,26 +217,31 @@ def update_cart(id_cart):
     data = request.json
     current_user = get_jwt_identity()
 
-    result = supabase.table('cart').select('*').eq('id_cart', id_cart).execute()
-    item = result.data[0] if result.data else None
+    loader = get_loader()
+    item = loader.select_one('cart', '*', id_cart=id_cart)
 
     if not item or item['id_user'] != int(current_user):
         return jsonify({'message': 'Item not found or unauthorized'}), 404
 
-    # Cek user
     user_id = data.get('id_user', item['id_user'])
-    user_result = supabase.table('user').select('user_id').eq('user_id', user_id).execute()
-    if not user_result.data:
+    shoe_id = data.get('shoe_detail_id', item['shoe_detail_id'])
+
+    # Lookup user & stock diantrekan dulu, lalu dijalankan saat dibutuhkan
+    prefetch_principals([user_id])
+    loader.load('shoe_detail', 'shoe_detail_id', shoe_id, 'stock')
+
+    # Cek user (principal cache)
+    if not user_exists(user_id):
         return jsonify({'message': 'User not found'}), 404
 
     # Cek shoe & stock
-    shoe_id = data.get('shoe_detail_id', item['shoe_detail_id'])
-    shoe_result = supabase.table('shoe_detail').select('*').eq('shoe_detail_id', shoe_id).execute()
-    if not shoe_result.data:
+    shoe = fetch_shoe_stock(shoe_id)
+    if not shoe:
         return jsonify({'message': 'Shoe not found'}), 404
 
-    shoe = shoe_result.data[0]
     quantity = data.get('quantity', item['quantity'])
+    if not valid_quantity(quantity):
+        return jsonify({'message': ADD_TO_CART_RESPONSES['invalid_quantity'][0]}), 400
     if shoe['stock'] < quantity:
         return jsonify({'message': 'Not enough stock'}), 400
 
@@ -154,7 +252,14 @@ def update_cart(id_cart):
         'last_updated': get_current_time_wita()
     }
 
-    supabase.table('cart').update(update_data).eq('id_cart', id_cart).execute()
+    try:
+        supabase.table('cart').update(update_data).eq('id_cart', id_cart).execute()
+        invalidate_loaded('cart')
+    except Exception as e:
+        # Sepatu tujuan sudah punya baris cart sendiri untuk user ini (idx_cart_user_shoe)
+        if not is_unique_violation(e):
+            raise
+        return jsonify({'message': 'This shoe is already in the cart; update that item instead'}), 409
     return jsonify({'message': 'Cart updated successfully'}), 200
 
 
@@ -163,25 +268,13 @@ def update_cart(id_cart):
 def get_cart_item(id_cart):
     current_user = get_jwt_identity()
 
-    result = supabase.table('cart').select('*').eq('id_cart', id_cart).execute()
+    result = supabase.table('cart').select(CART_WITH_SHOE_COLUMNS).eq('id_cart', id_cart).execute()
     item = result.data[0] if result.data else None
 
     if item and item['id_user'] == int(current_user):
-        shoe_result = supabase.table('shoe_detail').select('shoe_name,shoe_price,shoe_size,stock').eq('shoe_detail_id', item['shoe_detail_id']).execute()
-        shoe = shoe_result.data[0] if shoe_result.data else None
-        if shoe:
-            return jsonify({
-                'id_cart': item['id_cart'],
-                'shoe_detail_id': item['shoe_detail_id'],
-                'id_user': item['id_user'],
-                'quantity': item['quantity'],
-                'shoe_name': shoe['shoe_name'],
-                'shoe_price': shoe['shoe_price'],
-                'shoe_size': shoe['shoe_size'],
-                'stock': shoe['stock'],
-                'date_added': item['date_added'],
-                'last_updated': item['last_updated']
-            }), 200
+        entry = format_cart_item(item)
+        if entry:
+            return jsonify(entry), 200
         return jsonify({'message': 'Shoe not found'}), 404
     return jsonify({'message': 'Item not found or unauthorized'}), 404
 
@@ -190,23 +283,4 @@ def get_cart_item(id_cart):
 @jwt_required()
 def get_all_cart_items():
     current_user = get_jwt_identity()
-
-    cart_result = supabase.table('cart').select('*').eq('id_user', int(current_user)).execute()
-    result = []
-    for item in cart_result.data:
-        shoe_result = supabase.table('shoe_detail').select('shoe_name,shoe_price,shoe_size,stock').eq('shoe_detail_id', item['shoe_detail_id']).execute()
-        shoe = shoe_result.data[0] if shoe_result.data else None
-        if shoe:
-            result.append({
-                'id_cart': item['id_cart'],
-                'shoe_detail_id': item['shoe_detail_id'],
-                'id_user': item['id_user'],
-                'quantity': item['quantity'],
-                'shoe_name': shoe['shoe_name'],
-                'shoe_price': shoe['shoe_price'],
-                'shoe_size': shoe['shoe_size'],
-                'stock': shoe['stock'],
-                'date_added': item['date_added'],
-                'last_updated': item['last_updated']
-            })
-    return jsonify(result), 200
+    return cart_response(fetch_user_cart(int(current_user)))
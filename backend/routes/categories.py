@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify
 from supabase_client import supabase
+from pagination import paginated_response
+from catalog_index import catalog_index
+from shoe_lookup import shoe_cache
+from category_overview import get_category_overview, invalidate_category_overview, DEFAULT_TOP_N, MAX_TOP_N
 from datetime import datetime
 import pytz
 
@@ -18,7 +22,10 @@ def add_category():
         'date_added': get_current_time_wita(),
         'last_updated': get_current_time_wita()
     }
-    supabase.table('shoe_category').insert(new_category).execute()
+    result = supabase.table('shoe_category').insert(new_category).execute()
+    if result.data:
+        catalog_index.set_category(result.data[0]['category_id'], result.data[0]['category_name'])
+    invalidate_category_overview()
     return jsonify({'message': 'Category added successfully'}), 201
 
 
@@ -27,6 +34,10 @@ def delete_category(category_id):
     result = supabase.table('shoe_category').select('category_id').eq('category_id', category_id).execute()
     if result.data:
         supabase.table('shoe_category').delete().eq('category_id', category_id).execute()
+        # Sepatu di kategori ini ikut terhapus (ON DELETE CASCADE)
+        shoe_cache.clear()
+        catalog_index.invalidate()
+        invalidate_category_overview()
         return jsonify({'message': 'Category deleted successfully'}), 200
     return jsonify({'message': 'Category not found'}), 404
 
@@ -44,9 +55,20 @@ def update_category(category_id):
         'last_updated': get_current_time_wita()
     }
     supabase.table('shoe_category').update(update_data).eq('category_id', category_id).execute()
+    catalog_index.set_category(category_id, update_data['category_name'])
+    invalidate_category_overview()
     return jsonify({'message': 'Category updated successfully'}), 200
 
 
+@categories_bp.route('/api/categories/overview', methods=['GET'])
+def get_categories_overview():
+    # Ringkasan semua kategori untuk halaman kategori (?top_n= jumlah sepatu populer per kategori)
+    top_n = request.args.get('top_n', DEFAULT_TOP_N, type=int)
+    if top_n is None or not 0 <= top_n <= MAX_TOP_N:
+        return jsonify({'message': f'top_n must be between 0 and {MAX_TOP_N}'}), 400
+    return jsonify(get_category_overview(top_n)), 200
+
+
 @categories_bp.route('/api/categories/<int:category_id>', methods=['GET'])
 def get_category(category_id):
     result = supabase.table('shoe_category').select('*').eq('category_id', category_id).execute()
@@ -57,7 +79,8 @@ def get_category(category_id):
 
 @categories_bp.route('/api/categories', methods=['GET'])
 def get_categories():
-    result = supabase.table('shoe_category').select('*').execute()
-    if result.data:
-        return jsonify(result.data), 200
-    return jsonify({'message': 'No categories found'}), 404
+    return paginated_response(
+        supabase.table('shoe_category').select('*'),
+        'category_id',
+        empty_message='No categories found'
+    )
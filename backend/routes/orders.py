@@ -1,7 +1,18 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.datastructures import MultiDict
 from supabase_client import supabase
+from shoe_lookup import shoe_exists, fetch_shoes_by_ids, invalidate_shoe
+from user_lookup import current_principal
+from pagination import paginated_response, parse_page_args, fetch_keyset_page, is_key_value
+from streaming import stream_format, stream_response
+from catalog_index import catalog_index
+from category_overview import invalidate_category_overview
+from interaction_buffer import record_interaction, record_interactions, make_interaction
+from analytics import invalidate_sales_day, today_wita
 from datetime import datetime
+import logging
+import time
 import pytz
 
 orders_bp = Blueprint('orders', __name__)
@@ -18,18 +29,15 @@ def create_order():
     user_id = get_jwt_identity()
 
     # Cek user exists
-    user_result = supabase.table('user').select('user_id').eq('user_id', user_id).execute()
-    if not user_result.data:
+    if current_principal() is None:
         return jsonify({'message': 'User not authenticated or does not exist'}), 400
 
     # Cek shoe exists
-    shoe_result = supabase.table('shoe_detail').select('shoe_detail_id').eq('shoe_detail_id', data['shoe_detail_id']).execute()
-    if not shoe_result.data:
+    if not shoe_exists(data['shoe_detail_id']):
         return jsonify({'message': 'Shoe Detail ID does not exist'}), 400
 
-    try:
-        order_date = datetime.strptime(data['order_date'], '%Y-%m-%d').strftime('%Y-%m-%d')
-    except ValueError:
+    order_date = parse_order_date(data.get('order_date'))
+    if order_date is None:
         return jsonify({'message': 'Invalid date format. Use YYYY-MM-DD.'}), 400
 
     new_order = {
@@ -41,25 +49,238 @@ def create_order():
         'last_updated': get_current_time_wita()
     }
 
-    new_interaction = {
-        'id_user': int(user_id),
-        'shoe_detail_id': data['shoe_detail_id'],
-        'interaction_type': 'order',
-        'interaction_date': get_current_time_wita()
-    }
-
     result = supabase.table('order').insert(new_order).execute()
-    supabase.table('user_interaction').insert(new_interaction).execute()
+    invalidate_sales_day(order_date)
+    record_interaction(int(user_id), data['shoe_detail_id'], 'order')
 
     order_id = result.data[0]['order_id'] if result.data else None
     return jsonify({'message': 'Order created successfully', 'order_id': order_id}), 201
 
 
+def parse_order_date(value):
+    """order_date YYYY-MM-DD dari request; default tanggal hari ini WITA (bukan zona waktu server). None kalau invalid."""
+    if not value:
+        return today_wita().isoformat()
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+
+
+CHECKOUT_RESPONSES = {
+    'cart_empty': ('Cart is empty', 400),
+    'invalid_quantity': ('Cart contains items with an invalid quantity', 400),
+    'insufficient_stock': ('Insufficient stock available', 409)
+}
+
+
+class StageTimer:
+    """Durasi (ms) tiap tahap checkout untuk log & response."""
+
+    def __init__(self):
+        self.timings = {}
+        self._started = time.perf_counter()
+
+    def end(self, name):
+        now = time.perf_counter()
+        self.timings[name] = round((now - self._started) * 1000, 2)
+        self._started = now
+
+    def result(self):
+        return dict(self.timings, total=round(sum(self.timings.values()), 2))
+
+
+@orders_bp.route('/api/orders/checkout', methods=['POST'])
+@jwt_required()
+def checkout():
+    """
+    Checkout seluruh cart (atau sebagian lewat cart_ids) sekaligus lewat RPC checkout_cart:
+    klaim baris cart, cek & kurangi stock, insert order + payment + interaksi 'order'
+    dan hapus cart dalam satu transaksi database.
+    """
+    data = request.get_json(silent=True) or {}
+    user_id = int(get_jwt_identity())
+
+    order_date = parse_order_date(data.get('order_date'))
+    if order_date is None:
+        return jsonify({'message': 'Invalid date format. Use YYYY-MM-DD.'}), 400
+    cart_ids = data.get('cart_ids') or None
+    if cart_ids is not None and (not isinstance(cart_ids, list) or not all(isinstance(i, int) for i in cart_ids)):
+        return jsonify({'message': 'cart_ids must be a list of integers'}), 400
+
+    params = {
+        'user_id': user_id,
+        'cart_ids': cart_ids,
+        'order_date': order_date,
+        'order_status': data.get('order_status', 'pending'),
+        'payment_method': data.get('payment_method', 'Cash on Delivery'),
+        'payment_status': data.get('payment_status', 'pending')
+    }
+    timer = StageTimer()
+    try:
+        outcome = supabase.rpc('checkout_cart', {f'p_{k}': v for k, v in params.items()}).execute().data or {}
+    except Exception as e:
+        if getattr(e, 'code', None) != 'PGRST202':
+            raise
+        logging.warning('Fungsi checkout_cart belum ada di database, checkout dijalankan bertahap')
+        return checkout_sequential(params)
+    timer.end('checkout_rpc')
+
+    status = outcome.get('status')
+    if status != 'ok':
+        message, status_code = CHECKOUT_RESPONSES.get(status, ('Checkout failed', 500))
+        return jsonify({'message': message, 'items': outcome.get('items', [])}), status_code
+
+    orders = outcome.get('orders') or []
+    after_checkout({order['shoe_detail_id'] for order in orders}, order_date)
+    return checkout_response(user_id, orders, timer.result())
+
+
+def after_checkout(shoe_ids, order_date):
+    # Stock berubah: cache & index katalog ikut diperbarui; order baru masuk rollup penjualan hari itu
+    for shoe_id in shoe_ids:
+        invalidate_shoe(shoe_id)
+    catalog_index.mark_dirty(shoe_ids)
+    invalidate_category_overview()
+    invalidate_sales_day(order_date)
+
+
+def checkout_response(user_id, orders, timings):
+    logging.info(f'Checkout user {user_id}: {len(orders)} order(s), timings (ms) {timings}')
+    return jsonify({
+        'message': 'Checkout completed successfully',
+        'order_ids': [order['order_id'] for order in orders],
+        'orders': [{
+            'order_id': order['order_id'],
+            'shoe_detail_id': order['shoe_detail_id'],
+            'shoe_name': order['shoe_name'],
+            'quantity': order['quantity'],
+            'amount': order['amount']
+        } for order in orders],
+        'total_amount': round(sum(order['amount'] for order in orders), 2),
+        'timings_ms': timings
+    }), 201
+
+
+def compensate(user_id, steps):
+    """Jalankan langkah kompensasi (nama, fungsi) satu per satu; return nama langkah yang gagal."""
+    failed = []
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            logging.error(f'Kompensasi checkout user {user_id} gagal di langkah {name}: {e}')
+            failed.append(name)
+    return failed
+
+
+def checkout_failed(user_id, error, failed_steps):
+    logging.error(f'Checkout bertahap user {user_id} gagal: {error}')
+    if failed_steps:
+        # Data tidak konsisten (stock/order/cart): perlu dicek manual
+        logging.critical(f'Checkout user {user_id} tidak ter-rollback penuh, langkah gagal: {failed_steps}')
+        return jsonify({'message': 'Checkout failed and could not be fully rolled back',
+                        'compensation_failed': failed_steps}), 500
+    return jsonify({'message': 'Checkout failed'}), 500
+
+
+def checkout_sequential(params):
+    """
+    Fallback kalau RPC checkout_cart belum ada (beberapa query, tidak satu transaksi).
+    Baris cart diklaim dulu dengan delete (submit ganda hanya mendapat baris yang
+    belum diklaim), dan setiap langkah yang gagal dikompensasi: stock dikembalikan,
+    order yang sudah dibuat dihapus dan baris cart dikembalikan. Kompensasi yang gagal
+    di-log dan dilaporkan di response (compensation_failed).
+    """
+    user_id = params['user_id']
+    timer = StageTimer()
+
+    query = supabase.table('cart').select('*, shoe_detail(shoe_name,shoe_price)').eq('id_user', user_id)
+    if params['cart_ids']:
+        query = query.in_('id_cart', params['cart_ids'])
+    lines = [line for line in (query.order('id_cart').execute().data or []) if line.get('shoe_detail')]
+    timer.end('load_cart')
+    if not lines:
+        return jsonify({'message': 'Cart is empty'}), 400
+    invalid = [line for line in lines if not isinstance(line['quantity'], int) or line['quantity'] < 1]
+    if invalid:
+        return jsonify({'message': CHECKOUT_RESPONSES['invalid_quantity'][0],
+                        'items': [{'id_cart': line['id_cart'], 'quantity': line['quantity']} for line in invalid]}), 400
+
+    claimed = supabase.table('cart').delete().eq('id_user', user_id) \
+        .in_('id_cart', [line['id_cart'] for line in lines]).execute().data or []
+    claimed_ids = {row['id_cart'] for row in claimed}
+    lines = [line for line in lines if line['id_cart'] in claimed_ids]
+    timer.end('claim_cart')
+    if not lines:
+        return jsonify({'message': 'Cart is empty'}), 400
+
+    def restore_cart():
+        supabase.table('cart').insert(claimed).execute()
+
+    def restore_stock():
+        restore = [dict(item, quantity=-item['quantity']) for item in stock_items]
+        supabase.rpc('decrement_stock', {'p_items': restore}).execute()
+
+    def delete_orders():
+        # Payment ikut terhapus lewat cascade
+        if orders:
+            supabase.table('order').delete().in_('order_id', [order['order_id'] for order in orders]).execute()
+
+    stock_items = [{'shoe_detail_id': line['shoe_detail_id'], 'quantity': line['quantity']} for line in lines]
+    try:
+        stock_result = supabase.rpc('decrement_stock', {'p_items': stock_items}).execute().data or {}
+    except Exception as e:
+        return checkout_failed(user_id, e, compensate(user_id, [('restore_cart', restore_cart)]))
+    timer.end('reserve_stock')
+    if stock_result.get('status') != 'ok':
+        body = {'message': 'Insufficient stock available', 'items': stock_result.get('items', [])}
+        failed = compensate(user_id, [('restore_cart', restore_cart)])
+        if failed:
+            body['compensation_failed'] = failed
+        return jsonify(body), 409
+
+    now = get_current_time_wita()
+    orders = []
+    try:
+        orders = supabase.table('order').insert([{
+            'user_id': user_id,
+            'shoe_detail_id': line['shoe_detail_id'],
+            'order_status': params['order_status'],
+            'order_date': params['order_date'],
+            'amount': round(line['shoe_detail']['shoe_price'] * line['quantity'], 2),
+            'last_updated': now
+        } for line in lines]).execute().data or []
+        timer.end('insert_orders')
+        supabase.table('payment').insert([{
+            'order_id': order['order_id'],
+            'payment_method': params['payment_method'],
+            'payment_status': params['payment_status'],
+            'payment_date': params['order_date']
+        } for order in orders]).execute()
+        timer.end('insert_payments')
+    except Exception as e:
+        # Kompensasi berurutan: order, stock, lalu cart; langkah yang gagal tidak menghentikan langkah berikutnya
+        failed = compensate(user_id, [('delete_orders', delete_orders), ('restore_stock', restore_stock),
+                                      ('restore_cart', restore_cart)])
+        return checkout_failed(user_id, e, failed)
+    after_checkout({item['shoe_detail_id'] for item in stock_items}, params['order_date'])
+
+    record_interactions([make_interaction(user_id, line['shoe_detail_id'], 'order', now) for line in lines])
+    timer.end('record_interactions')
+
+    return checkout_response(user_id, [dict(order, shoe_name=line['shoe_detail']['shoe_name'], quantity=line['quantity'])
+                                       for order, line in zip(orders, lines)], timer.result())
+
+
 @orders_bp.route('/api/orders', methods=['GET'])
 @jwt_required()
 def get_orders():
-    result = supabase.table('order').select('*').execute()
-    return jsonify(result.data), 200
+    # Export penuh: ?format=ndjson atau Accept: application/x-ndjson
+    fmt = stream_format()
+    if fmt:
+        return stream_response(lambda: supabase.table('order').select('*'), 'order_id', fmt)
+    return paginated_response(supabase.table('order').select('*'), 'order_id')
 
 
 @orders_bp.route('/api/orders/user/<int:user_id>', methods=['GET'])
@@ -67,10 +288,11 @@ def get_orders():
 def get_orders_for_user(user_id):
     orders_result = supabase.table('order').select('*').eq('user_id', user_id).execute()
     order_data = []
+    shoes = fetch_shoes_by_ids([order['shoe_detail_id'] for order in orders_result.data])
 
     for order in orders_result.data:
-        shoe_result = supabase.table('shoe_detail').select('shoe_name').eq('shoe_detail_id', order['shoe_detail_id']).execute()
-        shoe_name = shoe_result.data[0]['shoe_name'] if shoe_result.data else 'Unknown'
+        shoe = shoes.get(order['shoe_detail_id'])
+        shoe_name = shoe['shoe_name'] if shoe else 'Unknown'
 
         order_data.append({
             'order_id': order['order_id'],
@@ -85,6 +307,74 @@ def get_orders_for_user(user_id):
     return jsonify(order_data), 200
 
 
+ORDER_STATUSES = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
+ORDER_HISTORY_DEFAULT_LIMIT = 20
+
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
+@orders_bp.route('/api/orders/history', methods=['GET'])
+@jwt_required()
+def get_order_history():
+    """
+    Riwayat order user yang login, terbaru dulu:
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD&status=pending,shipped&limit=&cursor=
+    Keyset pagination pada (order_date, order_id); data sepatu diambil dengan satu query batch per halaman.
+    """
+    user_id = int(get_jwt_identity())
+    try:
+        date_from, date_to = _parse_date_arg('from'), _parse_date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Invalid date format. Use YYYY-MM-DD.'}), 400
+
+    statuses = [s.strip().lower() for raw in request.args.getlist('status') for s in raw.split(',') if s.strip()]
+    invalid = [s for s in statuses if s not in ORDER_STATUSES]
+    if invalid:
+        return jsonify({'message': f'Invalid status. Use one of: {", ".join(ORDER_STATUSES)}'}), 400
+
+    args = MultiDict(request.args)
+    if 'limit' not in args:
+        args['limit'] = ORDER_HISTORY_DEFAULT_LIMIT
+    try:
+        limit, after, _ = parse_page_args(args)
+        if after is not None:
+            # Cursor masuk ke filter PostgREST: pastikan bentuknya [tanggal, id]
+            if len(after) != 2 or not is_key_value(after[1]):
+                raise ValueError('Invalid cursor')
+            after = [datetime.strptime(str(after[0]), '%Y-%m-%d').strftime('%Y-%m-%d'), after[1]]
+    except (ValueError, TypeError):
+        return jsonify({'message': 'Invalid limit or cursor'}), 400
+
+    query = supabase.table('order').select('order_id,user_id,shoe_detail_id,order_status,order_date,amount') \
+        .eq('user_id', user_id)
+    if date_from:
+        query = query.gte('order_date', date_from)
+    if date_to:
+        query = query.lte('order_date', date_to)
+    if statuses:
+        query = query.in_('order_status', statuses)
+
+    orders, next_cursor = fetch_keyset_page(query, ['order_date', 'order_id'], limit, after, desc=True)
+    shoes = fetch_shoes_by_ids([order['shoe_detail_id'] for order in orders])
+
+    items = []
+    for order in orders:
+        shoe = shoes.get(order['shoe_detail_id']) or {}
+        items.append(dict(
+            order,
+            shoe_name=shoe.get('shoe_name', 'Unknown'),
+            shoe_price=shoe.get('shoe_price'),
+            shoe_size=shoe.get('shoe_size'),
+            category_id=shoe.get('category_id')
+        ))
+    return jsonify({'data': items, 'next_cursor': next_cursor, 'limit': limit}), 200
+
+
 @orders_bp.route('/api/orders/<int:order_id>', methods=['PUT'])
 @jwt_required()
 def update_order(order_id):
@@ -97,9 +387,8 @@ def update_order(order_id):
 
     update_data = {}
     if 'order_status' in data:
-        valid_statuses = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
-        if data['order_status'].lower() not in valid_statuses:
-            return jsonify({'message': f'Invalid status. Use one of: {", ".join(valid_statuses)}'}), 400
+        if data['order_status'].lower() not in ORDER_STATUSES:
+            return jsonify({'message': f'Invalid status. Use one of: {", ".join(ORDER_STATUSES)}'}), 400
         update_data['order_status'] = data['order_status']
     if 'order_date' in data:
         try:
@@ -111,14 +400,18 @@ def update_order(order_id):
     update_data['last_updated'] = get_current_time_wita()
 
     supabase.table('order').update(update_data).eq('order_id', order_id).execute()
+    invalidate_sales_day(result.data[0]['order_date'])
+    if 'order_date' in update_data:
+        invalidate_sales_day(update_data['order_date'])
     return jsonify({'message': 'Order updated successfully'}), 200
 
 
 @orders_bp.route('/api/orders/<int:order_id>', methods=['DELETE'])
 @jwt_required()
 def delete_order(order_id):
-    result = supabase.table('order').select('order_id').eq('order_id', order_id).execute()
+    result = supabase.table('order').select('order_id,order_date').eq('order_id', order_id).execute()
     if result.data:
         supabase.table('order').delete().eq('order_id', order_id).execute()
+        invalidate_sales_day(result.data[0]['order_date'])
         return jsonify({'message': 'Order deleted successfully'}), 200
     return jsonify({'message': 'Order not found'}), 404
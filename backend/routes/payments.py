@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from supabase_client import supabase
+from pagination import paginated_response
+from streaming import stream_format, stream_response
+from analytics import invalidate_sales_day
 from datetime import datetime
 
 payments_bp = Blueprint('payments', __name__)
@@ -18,7 +21,7 @@ def process_payment():
         return jsonify({'message': 'Format tanggal tidak valid. Gunakan format YYYY-MM-DD.'}), 400
 
     # Cek order exists
-    order_result = supabase.table('order').select('order_id').eq('order_id', data['order_id']).execute()
+    order_result = supabase.table('order').select('order_id,order_date').eq('order_id', data['order_id']).execute()
     if not order_result.data:
         return jsonify({'message': 'Order ID tidak ditemukan'}), 400
 
@@ -35,6 +38,7 @@ def process_payment():
     }
 
     supabase.table('payment').insert(new_payment).execute()
+    invalidate_sales_day(order_result.data[0]['order_date'])
     return jsonify({'message': 'Pembayaran berhasil diproses'}), 201
 
 
@@ -42,7 +46,7 @@ def process_payment():
 def update_payment_status(payment_id):
     data = request.json
 
-    result = supabase.table('payment').select('*').eq('payment_id', payment_id).execute()
+    result = supabase.table('payment').select('*, order(order_date)').eq('payment_id', payment_id).execute()
     if not result.data:
         return jsonify({'message': 'Pembayaran tidak ditemukan'}), 404
 
@@ -50,6 +54,9 @@ def update_payment_status(payment_id):
         return jsonify({'message': 'Status pembayaran tidak disertakan'}), 400
 
     supabase.table('payment').update({'payment_status': data['payment_status']}).eq('payment_id', payment_id).execute()
+    # Paid revenue dihitung per tanggal order
+    if result.data[0].get('order'):
+        invalidate_sales_day(result.data[0]['order']['order_date'])
     return jsonify({'message': 'Status pembayaran berhasil diperbarui'}), 200
 
 
@@ -63,16 +70,22 @@ def get_payment(payment_id):
 
 @payments_bp.route('/api/payments', methods=['GET'])
 def get_payments():
-    result = supabase.table('payment').select('*').execute()
-    if result.data:
-        return jsonify(result.data), 200
-    return jsonify({'message': 'Tidak ada pembayaran ditemukan'}), 404
+    fmt = stream_format()
+    if fmt:
+        return stream_response(lambda: supabase.table('payment').select('*'), 'payment_id', fmt)
+    return paginated_response(
+        supabase.table('payment').select('*'),
+        'payment_id',
+        empty_message='Tidak ada pembayaran ditemukan'
+    )
 
 
 @payments_bp.route('/api/payments/<int:payment_id>', methods=['DELETE'])
 def delete_payment(payment_id):
-    result = supabase.table('payment').select('payment_id').eq('payment_id', payment_id).execute()
+    result = supabase.table('payment').select('payment_id, order(order_date)').eq('payment_id', payment_id).execute()
     if result.data:
         supabase.table('payment').delete().eq('payment_id', payment_id).execute()
+        if result.data[0].get('order'):
+            invalidate_sales_day(result.data[0]['order']['order_date'])
         return jsonify({'message': 'Pembayaran berhasil dihapus'}), 200
     return jsonify({'message': 'Pembayaran tidak ditemukan'}), 404
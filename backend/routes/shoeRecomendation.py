@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify
 from supabase_client import supabase
+from shoe_lookup import fetch_shoes_by_ids, hydrate_with_shoes, shoe_exists
+from user_lookup import user_exists
+from recommendation_store import get_user_recommendations, get_global_ranking, visible_user_rows
+from pagination import paginated_response
 from datetime import datetime
 import pytz
 
@@ -10,42 +14,59 @@ def get_current_time_wita():
     return datetime.now(wita_tz).isoformat()
 
 
+def format_recommendation(rec, shoe, include_category=True):
+    item = {
+        'id_shoe_recomendation': rec['id_shoe_recomendation'],
+        'id_user': rec['id_user'],
+        'shoe_detail_id': rec['shoe_detail_id'],
+        'shoe_name': shoe['shoe_name'],
+        'shoe_price': shoe['shoe_price'],
+        'shoe_size': shoe['shoe_size'],
+        'stock': shoe['stock'],
+    }
+    if include_category:
+        item['category_id'] = shoe.get('category_id')
+    item['date_added'] = shoe['date_added']
+    item['last_updated'] = shoe['last_updated']
+    return item
+
+
 @shoe_recommendation_bp.route('/api/shoe_recommendations/<int:user_id>', methods=['GET'])
 def get_recommendations_for_user(user_id):
-    rec_result = supabase.table('shoe_recomendation_for_users').select('*').eq('id_user', user_id).execute()
-
-    if rec_result.data:
-        result = []
-        for rec in rec_result.data:
-            shoe_result = supabase.table('shoe_detail').select('*').eq('shoe_detail_id', rec['shoe_detail_id']).execute()
-            shoe = shoe_result.data[0] if shoe_result.data else None
-            if shoe:
-                result.append({
-                    'id_shoe_recomendation': rec['id_shoe_recomendation'],
-                    'id_user': rec['id_user'],
-                    'shoe_detail_id': rec['shoe_detail_id'],
-                    'shoe_name': shoe['shoe_name'],
-                    'shoe_price': shoe['shoe_price'],
-                    'shoe_size': shoe['shoe_size'],
-                    'stock': shoe['stock'],
-                    'category_id': shoe.get('category_id'),
-                    'date_added': shoe['date_added'],
-                    'last_updated': shoe['last_updated']
-                })
+    # Override per user + ranking global
+    recommendations = get_user_recommendations(user_id)
+
+    if recommendations:
+        # Satu query shoe_detail untuk semua rekomendasi
+        result = hydrate_with_shoes(recommendations, format_recommendation)
         return jsonify(result), 200
     return jsonify([]), 200
 
 
+@shoe_recommendation_bp.route('/api/shoe_recommendations/global', methods=['GET'])
+def get_global_recommendations():
+    ranking = get_global_ranking()
+    result = hydrate_with_shoes(ranking, lambda row, shoe: {
+        'rank': row['rank'],
+        'score': row['score'],
+        'shoe_detail_id': row['shoe_detail_id'],
+        'shoe_name': shoe['shoe_name'],
+        'shoe_price': shoe['shoe_price'],
+        'shoe_size': shoe['shoe_size'],
+        'stock': shoe['stock'],
+        'category_id': shoe.get('category_id')
+    })
+    return jsonify(result), 200
+
+
 @shoe_recommendation_bp.route('/api/shoe_recommendations', methods=['POST'])
 def add_recommendation():
     data = request.json
 
-    user_result = supabase.table('user').select('user_id').eq('user_id', data['id_user']).execute()
-    if not user_result.data:
+    if not user_exists(data['id_user']):
         return jsonify({'message': 'User not found'}), 404
 
-    shoe_result = supabase.table('shoe_detail').select('shoe_detail_id').eq('shoe_detail_id', data['shoe_detail_id']).execute()
-    if not shoe_result.data:
+    if not shoe_exists(data['shoe_detail_id']):
         return jsonify({'message': 'Shoe not found'}), 404
 
     existing = supabase.table('shoe_recomendation_for_users').select('id_shoe_recomendation').eq('id_user', data['id_user']).eq('shoe_detail_id', data['shoe_detail_id']).execute()
@@ -82,13 +103,11 @@ def update_recommendation(id_shoe_recomendation):
     new_shoe_id = data.get('shoe_detail_id', rec['shoe_detail_id'])
 
     # Validasi user
-    user_result = supabase.table('user').select('user_id').eq('user_id', new_user_id).execute()
-    if not user_result.data:
+    if not user_exists(new_user_id):
         return jsonify({'message': 'User not found'}), 404
 
     # Validasi shoe
-    shoe_result = supabase.table('shoe_detail').select('shoe_detail_id').eq('shoe_detail_id', new_shoe_id).execute()
-    if not shoe_result.data:
+    if not shoe_exists(new_shoe_id):
         return jsonify({'message': 'Shoe not found'}), 404
 
     supabase.table('shoe_recomendation_for_users').update({
@@ -103,41 +122,19 @@ def get_recommendation(id_shoe_recomendation):
     result = supabase.table('shoe_recomendation_for_users').select('*').eq('id_shoe_recomendation', id_shoe_recomendation).execute()
     if result.data:
         rec = result.data[0]
-        shoe_result = supabase.table('shoe_detail').select('*').eq('shoe_detail_id', rec['shoe_detail_id']).execute()
-        shoe = shoe_result.data[0] if shoe_result.data else None
+        shoe = fetch_shoes_by_ids([rec['shoe_detail_id']]).get(rec['shoe_detail_id'])
         if shoe:
-            return jsonify({
-                'id_shoe_recomendation': rec['id_shoe_recomendation'],
-                'id_user': rec['id_user'],
-                'shoe_detail_id': rec['shoe_detail_id'],
-                'shoe_name': shoe['shoe_name'],
-                'shoe_price': shoe['shoe_price'],
-                'shoe_size': shoe['shoe_size'],
-                'stock': shoe['stock'],
-                'category_id': shoe['category_id'],
-                'date_added': shoe['date_added'],
-                'last_updated': shoe['last_updated']
-            }), 200
+            return jsonify(format_recommendation(rec, shoe)), 200
     return jsonify({'message': 'Recommendation not found'}), 404
 
 
 @shoe_recommendation_bp.route('/api/shoe_recommendations', methods=['GET'])
 def get_all_recommendations():
-    rec_result = supabase.table('shoe_recomendation_for_users').select('*').execute()
-    result = []
-    for rec in rec_result.data:
-        shoe_result = supabase.table('shoe_detail').select('*').eq('shoe_detail_id', rec['shoe_detail_id']).execute()
-        shoe = shoe_result.data[0] if shoe_result.data else None
-        if shoe:
-            result.append({
-                'id_shoe_recomendation': rec['id_shoe_recomendation'],
-                'id_user': rec['id_user'],
-                'shoe_detail_id': rec['shoe_detail_id'],
-                'shoe_name': shoe['shoe_name'],
-                'shoe_price': shoe['shoe_price'],
-                'shoe_size': shoe['shoe_size'],
-                'stock': shoe['stock'],
-                'date_added': shoe['date_added'],
-                'last_updated': shoe['last_updated']
-            })
-    return jsonify(result), 200
+    # shoe_detail di-hydrate per halaman
+    return paginated_response(
+        visible_user_rows(supabase.table('shoe_recomendation_for_users').select('*')),
+        'id_shoe_recomendation',
+        transform=lambda rows: hydrate_with_shoes(
+            rows, lambda rec, shoe: format_recommendation(rec, shoe, include_category=False)
+        )
+    )
@@ -1,8 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity
-from werkzeug.security import check_password_hash
+from password_policy import (verify_and_upgrade, PasswordVerifyBusy, PASSWORD_VERIFY_BUSY_MESSAGE,
+                             PASSWORD_VERIFY_RETRY_AFTER)
 from supabase_client import supabase
+from shoe_lookup import shoe_cache, invalidate_shoe
+from pagination import paginated_response, MAX_PAGE_LIMIT
+from catalog_index import catalog_index
+from facets import compute_facets
+from category_overview import invalidate_category_overview
 from datetime import datetime
+import math
+import time
 import pytz
 
 shoes_bp = Blueprint('shoes', __name__)
@@ -30,8 +38,11 @@ def login():
     if not user:
         return jsonify({'message': 'Invalid credentials'}), 401
 
-    if not check_password_hash(user['password'], password):
-        return jsonify({'message': 'Invalid credentials'}), 401
+    try:
+        if not verify_and_upgrade(user, password):
+            return jsonify({'message': 'Invalid credentials'}), 401
+    except PasswordVerifyBusy:
+        return jsonify({'message': PASSWORD_VERIFY_BUSY_MESSAGE}), 503, {'Retry-After': PASSWORD_VERIFY_RETRY_AFTER}
 
     user_id = user.get('user_id') or user.get('id_user') or user.get('id')
     if user_id is None:
@@ -70,6 +81,10 @@ def add_shoe_detail():
     }
 
     result = supabase.table('shoe_detail').insert(new_shoe).execute()
+    if result.data:
+        invalidate_shoe(result.data[0]['shoe_detail_id'])
+        catalog_index.upsert(result.data[0])
+    invalidate_category_overview()
     return jsonify({
         'message': 'Shoe detail added successfully',
         'shoe_detail_id': result.data[0]['shoe_detail_id'] if result.data else None
@@ -101,7 +116,10 @@ def update_shoe_detail(shoe_detail_id):
     if 'category_id' in data:
         update_data['category_id'] = data['category_id']
 
-    supabase.table('shoe_detail').update(update_data).eq('shoe_detail_id', shoe_detail_id).execute()
+    updated = supabase.table('shoe_detail').update(update_data).eq('shoe_detail_id', shoe_detail_id).execute()
+    invalidate_shoe(shoe_detail_id)
+    catalog_index.upsert(updated.data[0] if updated.data else dict(shoe, **update_data))
+    invalidate_category_overview()
     return jsonify({'message': 'Shoe detail updated successfully'}), 200
 
 
@@ -113,9 +131,123 @@ def delete_shoe_detail(shoe_detail_id):
         return jsonify({'message': 'Shoe detail not found'}), 404
 
     supabase.table('shoe_detail').delete().eq('shoe_detail_id', shoe_detail_id).execute()
+    invalidate_shoe(shoe_detail_id)
+    catalog_index.remove(shoe_detail_id)
+    invalidate_category_overview()
     return jsonify({'message': 'Shoe detail deleted successfully'}), 200
 
 
+@shoes_bp.route('/api/shoes/cache_stats', methods=['GET'])
+@jwt_required()
+def get_shoe_cache_stats():
+    return jsonify(shoe_cache.stats()), 200
+
+
+SEARCH_SORTS = ('relevance', 'price_asc', 'price_desc', 'name', 'newest', 'id')
+
+
+def _list_arg(name, type_=str):
+    # ?category_id=1,2&category_id=3 -> [1, 2, 3]
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(type_(part) for part in raw.split(',') if part.strip())
+    return values
+
+
+def _number_arg(name, type_, default=None):
+    # Parameter kosong -> default; nilai yang tidak bisa di-parse -> ValueError (400), bukan diabaikan
+    raw = request.args.get(name)
+    if raw is None or not raw.strip():
+        return default
+    value = type_(raw)
+    if not math.isfinite(value):
+        raise ValueError(f'Invalid {name}')
+    return value
+
+
+@shoes_bp.route('/api/shoes/search', methods=['GET'])
+@jwt_required()
+def search_shoes():
+    """
+    Pencarian katalog dari index in-memory:
+    ?q=&category_id=&size=&min_price=&max_price=&in_stock=true&sort=&limit=&offset=
+    """
+    started = time.perf_counter()
+    try:
+        category_ids = _list_arg('category_id', int)
+        sizes = _list_arg('size')
+        min_price = _number_arg('min_price', float)
+        max_price = _number_arg('max_price', float)
+    except ValueError:
+        return jsonify({'message': 'Invalid filter value'}), 400
+    try:
+        limit = _number_arg('limit', int, 50)
+        offset = _number_arg('offset', int, 0)
+    except ValueError:
+        limit = offset = None
+    if limit is None or offset is None or limit < 1 or offset < 0:
+        return jsonify({'message': 'limit must be a positive integer and offset a non-negative integer'}), 400
+    limit = min(limit, MAX_PAGE_LIMIT)
+    sort = request.args.get('sort')
+    if sort is not None and sort not in SEARCH_SORTS:
+        return jsonify({'message': f'Invalid sort. Use one of: {", ".join(SEARCH_SORTS)}'}), 400
+
+    items, total = catalog_index.search(
+        q=request.args.get('q'),
+        category_ids=category_ids,
+        sizes=sizes,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=request.args.get('in_stock', 'false').lower() == 'true',
+        sort=sort,
+        limit=limit,
+        offset=offset
+    )
+    return jsonify({
+        'data': items,
+        'total': total,
+        'limit': limit,
+        'offset': offset,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    }), 200
+
+
+@shoes_bp.route('/api/shoes/facets', methods=['GET'])
+@jwt_required()
+def get_shoe_facets():
+    """
+    Count per kategori, ukuran dan bucket harga untuk kombinasi filter yang sama dengan search
+    (?q=&category_id=&size=&min_price=&max_price=&in_stock=) plus ?price_buckets=0,100,200.
+    """
+    started = time.perf_counter()
+    try:
+        category_ids = _list_arg('category_id', int)
+        sizes = _list_arg('size')
+        price_buckets = sorted(_list_arg('price_buckets', float)) or None
+        min_price = _number_arg('min_price', float)
+        max_price = _number_arg('max_price', float)
+    except ValueError:
+        return jsonify({'message': 'Invalid filter value'}), 400
+
+    facets = compute_facets(
+        q=request.args.get('q'),
+        category_ids=category_ids,
+        sizes=sizes,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=request.args.get('in_stock', 'false').lower() == 'true',
+        price_buckets=price_buckets
+    )
+    facets['took_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify(facets), 200
+
+
+@shoes_bp.route('/api/shoes/search/stats', methods=['GET'])
+@jwt_required()
+def get_search_index_stats():
+    return jsonify(catalog_index.stats()), 200
+
+
 @shoes_bp.route('/api/shoes/<int:shoe_detail_id>', methods=['GET'])
 @jwt_required()
 def get_shoe_detail(shoe_detail_id):
@@ -130,7 +262,8 @@ def get_shoe_detail(shoe_detail_id):
 @shoes_bp.route('/api/shoes', methods=['GET'])
 @jwt_required()
 def get_all_shoes():
-    result = supabase.table('shoe_detail').select('*').execute()
-    if not result.data:
-        return jsonify({'message': 'No Shoe detail found'}), 404
-    return jsonify(result.data), 200
+    return paginated_response(
+        supabase.table('shoe_detail').select('*'),
+        'shoe_detail_id',
+        empty_message='No Shoe detail found'
+    )
@@ -1,6 +1,15 @@
+import os
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from supabase_client import supabase
-from datetime import datetime
+from shoe_lookup import shoe_exists, fetch_shoes_by_ids
+from user_lookup import user_exists, fetch_principals, prefetch_principals, current_principal, current_user_is_admin
+from cache import TTLCache
+from interaction_buffer import record_interaction, record_interactions, make_interaction, VALID_INTERACTION_TYPES
+from pagination import paginated_response
+from interaction_counters import count_deltas, apply_counter_deltas, get_counters, top_counters, reconcile_counters, COUNTER_COLUMNS
+from streaming import stream_format, stream_response
+from datetime import datetime, timedelta
 import pytz
 
 user_interaction_bp = Blueprint('user_interaction', __name__)
@@ -12,8 +21,11 @@ def get_current_time_wita():
 
 @user_interaction_bp.route('/api/user_interactions', methods=['GET'])
 def get_all_interactions():
-    result = supabase.table('user_interaction').select('*').execute()
-    return jsonify(result.data), 200
+    # Export penuh: ?format=ndjson atau Accept: application/x-ndjson
+    fmt = stream_format()
+    if fmt:
+        return stream_response(lambda: supabase.table('user_interaction').select('*'), 'interaction_id', fmt)
+    return paginated_response(supabase.table('user_interaction').select('*'), 'interaction_id')
 
 
 @user_interaction_bp.route('/api/user_interactions', methods=['POST'])
@@ -24,33 +36,178 @@ def create_interaction():
         return jsonify({'message': 'Missing required fields'}), 400
 
     # Validasi user
-    user_result = supabase.table('user').select('user_id').eq('user_id', data['id_user']).execute()
-    if not user_result.data:
+    if not user_exists(data['id_user']):
         return jsonify({'message': 'User not found'}), 404
 
     # Validasi shoe
-    shoe_result = supabase.table('shoe_detail').select('shoe_detail_id').eq('shoe_detail_id', data['shoe_detail_id']).execute()
-    if not shoe_result.data:
+    if not shoe_exists(data['shoe_detail_id']):
         return jsonify({'message': 'Shoe not found'}), 404
 
     # Validasi interaction_type
-    valid_types = ['view', 'wishlist', 'cart', 'order']
-    if data['interaction_type'] not in valid_types:
+    if data['interaction_type'] not in VALID_INTERACTION_TYPES:
         return jsonify({'message': 'Invalid interaction type'}), 400
 
     try:
-        new_interaction = {
-            'id_user': data['id_user'],
-            'shoe_detail_id': data['shoe_detail_id'],
-            'interaction_type': data['interaction_type'],
-            'interaction_date': get_current_time_wita()
-        }
-        supabase.table('user_interaction').insert(new_interaction).execute()
+        record_interaction(data['id_user'], data['shoe_detail_id'], data['interaction_type'])
         return jsonify({'message': 'Interaction recorded successfully'}), 201
     except Exception as e:
         return jsonify({'message': f'Error: {str(e)}'}), 500
 
 
+# Batas jumlah event per request batch
+MAX_BATCH_EVENTS = int(os.environ.get('INTERACTION_BATCH_MAX_EVENTS', 1000))
+# Event identik (user, sepatu, tipe) dalam jendela ini hanya dicatat sekali
+INTERACTION_DEDUPE_WINDOW = int(os.environ.get('INTERACTION_DEDUPE_WINDOW', 10))
+recent_events = TTLCache(max_size=100000, ttl=INTERACTION_DEDUPE_WINDOW)
+
+
+def _as_id(value):
+    # bool adalah subclass int, bukan id yang valid
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+# Toleransi jam klien yang sedikit lebih cepat dari server (detik)
+INTERACTION_DATE_MAX_SKEW = int(os.environ.get('INTERACTION_DATE_MAX_SKEW', 300))
+INVALID_DATE = object()
+
+
+def _parse_interaction_date(value):
+    """
+    interaction_date dari klien -> ISO string dengan zona waktu; None = pakai waktu server.
+    Format tidak valid atau tanggal di masa depan (selain toleransi skew) -> INVALID_DATE,
+    supaya tidak ditolak database saat flush dan tidak memberi bobot penuh di scoring decay.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        return INVALID_DATE
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return INVALID_DATE
+    wita_tz = pytz.timezone('Asia/Makassar')
+    if parsed.tzinfo is None:
+        parsed = wita_tz.localize(parsed)
+    if parsed > datetime.now(wita_tz) + timedelta(seconds=INTERACTION_DATE_MAX_SKEW):
+        return INVALID_DATE
+    return parsed.isoformat()
+
+
+def validate_interaction_events(events, user_id=None, interaction_type=None, owner_id=None):
+    """
+    Validasi sekumpulan event dengan dua query berbasis set (user & sepatu), lalu dedupe.
+    user_id / interaction_type mengisi paksa field tersebut (endpoint views).
+    owner_id membatasi event hanya untuk user tersebut; event user lain ditolak.
+    Return (results, accepted): results per event {index, status, reason?}, accepted = baris untuk insert.
+    """
+    parsed = []
+    for event in events:
+        if not isinstance(event, dict):
+            parsed.append(None)
+            continue
+        parsed.append((
+            user_id if user_id is not None else _as_id(event.get('id_user')),
+            _as_id(event.get('shoe_detail_id')),
+            interaction_type or event.get('interaction_type'),
+            _parse_interaction_date(event.get('interaction_date'))
+        ))
+
+    candidates = [p for p in parsed if p]
+    if user_id is not None:
+        known_users = {user_id}
+    else:
+        known_users = set(fetch_principals(p[0] for p in candidates if p[0] is not None))
+    known_shoes = fetch_shoes_by_ids([p[1] for p in candidates if p[1] is not None])
+
+    results, accepted, seen = [], [], set()
+    for index, p in enumerate(parsed):
+        if p is None or p[0] is None or p[1] is None or not p[2]:
+            reason = 'Missing required fields'
+        elif owner_id is not None and p[0] != owner_id:
+            reason = 'Not authorized for this user'
+        elif p[2] not in VALID_INTERACTION_TYPES:
+            reason = 'Invalid interaction type'
+        elif p[3] is INVALID_DATE:
+            reason = 'Invalid interaction_date'
+        elif p[0] not in known_users:
+            reason = 'User not found'
+        elif p[1] not in known_shoes:
+            reason = 'Shoe not found'
+        else:
+            reason = None
+
+        if reason:
+            results.append({'index': index, 'status': 'rejected', 'reason': reason})
+            continue
+
+        key = p[:3]
+        if key in seen or recent_events.get(key):
+            results.append({'index': index, 'status': 'duplicate'})
+            continue
+        seen.add(key)
+        accepted.append(make_interaction(*p))
+        results.append({'index': index, 'status': 'accepted'})
+
+    recent_events.set_many({key: True for key in seen})
+    return results, accepted
+
+
+def batch_summary(results):
+    return {status: sum(1 for r in results if r['status'] == status) for status in ('accepted', 'duplicate', 'rejected')}
+
+
+@user_interaction_bp.route('/api/user_interactions/batch', methods=['POST'])
+@jwt_required()
+def create_interactions_batch():
+    """
+    Banyak event sekaligus: {"events": [{"id_user", "shoe_detail_id", "interaction_type", "interaction_date"?}, ...]}.
+    Semua event yang valid dicatat dalam satu bulk insert; hasil per event dikembalikan sesuai urutan.
+    Selain admin, event hanya boleh untuk user yang sedang login.
+    """
+    data = request.get_json(silent=True) or {}
+    events = data.get('events')
+    if not isinstance(events, list) or not events:
+        return jsonify({'message': 'No events provided'}), 400
+    if len(events) > MAX_BATCH_EVENTS:
+        return jsonify({'message': f'Too many events (max {MAX_BATCH_EVENTS})'}), 400
+
+    # Principal pemanggil & user di event diambil dalam satu query
+    prefetch_principals([get_jwt_identity()] + [event.get('id_user') for event in events if isinstance(event, dict)])
+    principal = current_principal()
+    if principal is None:
+        return jsonify({'message': 'User not found'}), 404
+
+    try:
+        owner_id = None if principal['role'] == 'Admin' else principal['user_id']
+        results, accepted = validate_interaction_events(events, owner_id=owner_id)
+        record_interactions(accepted)
+    except Exception as e:
+        return jsonify({'message': f'Error: {str(e)}'}), 500
+    return jsonify(dict(batch_summary(results), results=results)), 202
+
+
+@user_interaction_bp.route('/api/user_interactions/views', methods=['POST'])
+@jwt_required()
+def record_view_events():
+    """
+    Event view dari frontend dikirim berkelompok untuk user yang sedang login:
+    {"shoe_detail_ids": [1, 2, ...]} atau {"events": [{"shoe_detail_id": 1, "interaction_date": "..."}]}.
+    """
+    data = request.get_json(silent=True) or {}
+    events = data.get('events') or [{'shoe_detail_id': shoe_id} for shoe_id in data.get('shoe_detail_ids', [])]
+    if not isinstance(events, list) or not events:
+        return jsonify({'message': 'No view events provided'}), 400
+    if len(events) > MAX_BATCH_EVENTS:
+        return jsonify({'message': f'Too many events (max {MAX_BATCH_EVENTS})'}), 400
+
+    try:
+        results, accepted = validate_interaction_events(events, user_id=int(get_jwt_identity()), interaction_type='view')
+        record_interactions(accepted)
+    except Exception as e:
+        return jsonify({'message': f'Error: {str(e)}'}), 500
+    return jsonify(batch_summary(results)), 202
+
+
 @user_interaction_bp.route('/api/user_interactions/<int:interaction_id>', methods=['PUT'])
 def update_interaction(interaction_id):
     data = request.json
@@ -67,14 +224,66 @@ def update_interaction(interaction_id):
         'interaction_type': data['interaction_type'],
         'interaction_date': get_current_time_wita()
     }).eq('interaction_id', interaction_id).execute()
+    # Pindahkan hitungan dari tipe lama ke tipe baru
+    previous = result.data[0]
+    deltas = count_deltas([previous], -1)
+    deltas.update(count_deltas([dict(previous, interaction_type=data['interaction_type'])]))
+    apply_counter_deltas(deltas)
     return jsonify({'message': 'Interaction updated successfully'}), 200
 
 
 @user_interaction_bp.route('/api/user_interactions/<int:interaction_id>', methods=['DELETE'])
 def delete_interaction(interaction_id):
-    result = supabase.table('user_interaction').select('interaction_id').eq('interaction_id', interaction_id).execute()
+    result = supabase.table('user_interaction').select('interaction_id,shoe_detail_id,interaction_type') \
+        .eq('interaction_id', interaction_id).execute()
     if not result.data:
         return jsonify({'message': 'Interaction not found'}), 404
 
     supabase.table('user_interaction').delete().eq('interaction_id', interaction_id).execute()
+    apply_counter_deltas(count_deltas(result.data, -1))
     return jsonify({'message': 'Interaction deleted successfully'}), 200
+
+
+# Batas jumlah sepatu per request counter
+MAX_COUNTER_SHOES = 500
+
+
+@user_interaction_bp.route('/api/user_interactions/counters', methods=['GET'])
+def get_interaction_counters():
+    """
+    Counter view/wishlist/cart/order per sepatu dari shoe_interaction_counter:
+    ?shoe_ids=1,2,3 untuk sepatu tertentu, atau ?sort=view|wishlist|cart|order&limit=20 untuk yang tertinggi.
+    """
+    raw_ids = [s for raw in request.args.getlist('shoe_ids') for s in raw.split(',') if s.strip()]
+    if raw_ids:
+        try:
+            shoe_ids = [int(s) for s in raw_ids]
+        except ValueError:
+            return jsonify({'message': 'shoe_ids must be integers'}), 400
+        if len(shoe_ids) > MAX_COUNTER_SHOES:
+            return jsonify({'message': f'Too many shoe_ids (max {MAX_COUNTER_SHOES})'}), 400
+        counters = get_counters(shoe_ids)
+        return jsonify([dict(counters[shoe_id], shoe_detail_id=shoe_id) for shoe_id in dict.fromkeys(shoe_ids)]), 200
+
+    sort = request.args.get('sort', 'view')
+    if sort not in COUNTER_COLUMNS:
+        return jsonify({'message': f'Invalid sort. Use one of: {", ".join(COUNTER_COLUMNS)}'}), 400
+    limit = request.args.get('limit', 20, type=int)
+    if limit is None or limit < 1:
+        return jsonify({'message': 'limit must be a positive integer'}), 400
+    return jsonify(top_counters(COUNTER_COLUMNS[sort], min(limit, MAX_COUNTER_SHOES))), 200
+
+
+@user_interaction_bp.route('/api/user_interactions/counters/reconcile', methods=['POST'])
+@jwt_required()
+def reconcile_interaction_counters():
+    # Rebuild penuh bisa men-scan seluruh user_interaction: hanya admin
+    if not current_user_is_admin():
+        return jsonify({'message': 'Admin access required'}), 403
+
+    # ?dry_run=true hanya melaporkan drift tanpa memperbaiki counter
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    try:
+        return jsonify(reconcile_counters(apply=not dry_run)), 200
+    except Exception as e:
+        return jsonify({'message': f'Error: {str(e)}'}), 500
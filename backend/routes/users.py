@@ -1,12 +1,17 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from supabase_client import supabase
+from user_lookup import user_exists, current_user_is_admin, invalidate_user, prefetch_principals
+from password_policy import (hash_password, verify_and_upgrade, PasswordVerifyBusy, PASSWORD_VERIFY_BUSY_MESSAGE,
+                             PASSWORD_VERIFY_RETRY_AFTER)
+from pagination import paginated_response
 from datetime import datetime
 import pytz
 
 users_bp = Blueprint('users', __name__)
 
+USER_PUBLIC_COLUMNS = 'user_id,username,email,first_name,last_name,address,phone,role,date_added,last_updated'
+
 def get_current_time_wita():
     wita_tz = pytz.timezone('Asia/Makassar')
     return datetime.now(wita_tz).isoformat()
@@ -30,7 +35,7 @@ def register():
     if existing_email.data:
         return jsonify({'message': 'Email already exists'}), 409
 
-    hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
+    hashed_password = hash_password(data['password'])
 
     new_user = {
         'username': data['username'],
@@ -60,7 +65,12 @@ def login():
     result = supabase.table('user').select('*').eq('username', data['username']).execute()
     user = result.data[0] if result.data else None
 
-    if user and check_password_hash(user['password'], data['password']):
+    try:
+        authenticated = user is not None and verify_and_upgrade(user, data['password'])
+    except PasswordVerifyBusy:
+        return jsonify({'message': PASSWORD_VERIFY_BUSY_MESSAGE}), 503, {'Retry-After': PASSWORD_VERIFY_RETRY_AFTER}
+
+    if authenticated:
         access_token = create_access_token(identity=str(user['user_id']))
 
         return jsonify({
@@ -107,6 +117,7 @@ def update_profile(user_id):
     }
 
     supabase.table('user').update(update_data).eq('user_id', user_id).execute()
+    invalidate_user(user_id)
     return jsonify({'message': 'Profile updated successfully'}), 200
 
 
@@ -143,42 +154,29 @@ def get_user(user_id):
 # ========== GET ALL USERS ==========
 @users_bp.route('/api/users', methods=['GET'])
 def get_users():
-    result = supabase.table('user').select('*').execute()
-    if not result.data:
-        return jsonify({'message': 'No users found'}), 404
-
-    users = [{
-        'user_id': u['user_id'],
-        'username': u['username'],
-        'email': u['email'],
-        'first_name': u['first_name'],
-        'last_name': u['last_name'],
-        'address': u['address'],
-        'phone': u['phone'],
-        'role': u['role'],
-        'date_added': u['date_added'],
-        'last_updated': u['last_updated']
-    } for u in result.data]
-
-    return jsonify(users), 200
+    # Kolom password tidak ikut di-select
+    return paginated_response(
+        supabase.table('user').select(USER_PUBLIC_COLUMNS),
+        'user_id',
+        empty_message='No users found'
+    )
 
 
 # ========== DELETE USER ==========
 @users_bp.route('/api/users/<int:user_id>', methods=['DELETE'])
 @jwt_required()
 def delete_user(user_id):
-    current_user_id = int(get_jwt_identity())
+    # Principal admin & user target diambil dalam satu query
+    prefetch_principals([get_jwt_identity(), user_id])
 
     # Cek role admin
-    admin_result = supabase.table('user').select('role').eq('user_id', current_user_id).execute()
-    admin = admin_result.data[0] if admin_result.data else None
-    if not admin or admin['role'] != 'Admin':
+    if not current_user_is_admin():
         return jsonify({'message': 'Admin access required'}), 403
 
     # Cek user exists
-    user_result = supabase.table('user').select('user_id').eq('user_id', user_id).execute()
-    if not user_result.data:
+    if not user_exists(user_id):
         return jsonify({'message': 'User not found'}), 404
 
     supabase.table('user').delete().eq('user_id', user_id).execute()
+    invalidate_user(user_id)
     return jsonify({'message': 'User deleted successfully'}), 200
\ No newline at end of file
@@ -1,6 +1,10 @@
 # wishlist.py
 from flask import Blueprint, request, jsonify
 from supabase_client import supabase
+from shoe_lookup import shoe_exists
+from user_lookup import user_exists
+from interaction_buffer import record_interaction
+from pagination import paginated_response
 from datetime import datetime
 import pytz
 
@@ -24,13 +28,11 @@ def add_to_wishlist():
     data = request.json
 
     # Cek user
-    user_result = supabase.table('user').select('user_id').eq('user_id', data['id_user']).execute()
-    if not user_result.data:
+    if not user_exists(data['id_user']):
         return jsonify({'message': 'User not found'}), 404
 
     # Cek shoe
-    shoe_result = supabase.table('shoe_detail').select('shoe_detail_id').eq('shoe_detail_id', data['shoe_detail_id']).execute()
-    if not shoe_result.data:
+    if not shoe_exists(data['shoe_detail_id']):
         return jsonify({'message': 'Shoe not found'}), 404
 
     new_item = {
@@ -39,15 +41,8 @@ def add_to_wishlist():
         'date_added': get_current_time_wita()
     }
 
-    new_interaction = {
-        'id_user': data['id_user'],
-        'shoe_detail_id': data['shoe_detail_id'],
-        'interaction_type': 'wishlist',
-        'interaction_date': get_current_time_wita()
-    }
-
     supabase.table('wishlist').insert(new_item).execute()
-    supabase.table('user_interaction').insert(new_interaction).execute()
+    record_interaction(data['id_user'], data['shoe_detail_id'], 'wishlist')
     return jsonify({'message': 'Item added to wishlist successfully'}), 201
 
 
@@ -88,5 +83,4 @@ def get_wishlist_item(id_wishlist):
 
 @wishlist_bp.route('/api/wishlist', methods=['GET'])
 def get_all_wishlist_items():
-    result = supabase.table('wishlist').select('*').execute()
-    return jsonify(result.data), 200
+    return paginated_response(supabase.table('wishlist').select('*'), 'id_wishlist')
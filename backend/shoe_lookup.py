@@ -0,0 +1,71 @@
+import os
+from cache import TTLCache
+from data_loader import get_loader, invalidate_loaded, IN_QUERY_CHUNK_SIZE
+
+# Cache katalog per shoe_detail_id (berisi baris shoe_detail lengkap).
+# Di-invalidate oleh write path di routes/shoes.py.
+shoe_cache = TTLCache(
+    max_size=int(os.environ.get('SHOE_CACHE_MAX_SIZE', 2048)),
+    ttl=float(os.environ.get('SHOE_CACHE_TTL', 60))
+)
+
+
+def _query_shoes(shoe_ids, columns):
+    # Lewat loader request: digabung dengan lookup sepatu lain yang antre, id yang tidak ada tidak di-query ulang
+    return get_loader().load_many('shoe_detail', 'shoe_detail_id', shoe_ids, columns)
+
+
+def fetch_shoes_by_ids(shoe_ids, columns='*', use_cache=True):
+    """
+    Ambil banyak baris shoe_detail sekaligus dengan satu query in_().
+    Return dict {shoe_detail_id: row}; id yang tidak ditemukan tidak ada di dict.
+    Dengan use_cache=True hanya id yang belum ada di shoe_cache yang di-query
+    (selalu select('*') supaya baris di cache lengkap).
+    """
+    unique_ids = list(dict.fromkeys(int(s) for s in shoe_ids if s is not None))
+    if not unique_ids:
+        return {}
+
+    if use_cache:
+        shoes, missing = shoe_cache.get_many(unique_ids)
+        if missing:
+            fetched = _query_shoes(missing, '*')
+            shoe_cache.set_many(fetched)
+            shoes.update(fetched)
+        return shoes
+
+    # shoe_detail_id wajib ikut di-select supaya hasil bisa di-index
+    if columns != '*' and 'shoe_detail_id' not in columns.split(','):
+        columns = f'shoe_detail_id,{columns}'
+    return _query_shoes(unique_ids, columns)
+
+
+def get_shoe(shoe_detail_id):
+    """Ambil satu sepatu lewat cache; None kalau tidak ada."""
+    return fetch_shoes_by_ids([shoe_detail_id]).get(int(shoe_detail_id))
+
+
+def shoe_exists(shoe_detail_id):
+    try:
+        return get_shoe(shoe_detail_id) is not None
+    except (TypeError, ValueError):
+        return False
+
+
+def invalidate_shoe(shoe_detail_id):
+    shoe_cache.invalidate(int(shoe_detail_id))
+    invalidate_loaded('shoe_detail')
+
+
+def hydrate_with_shoes(rows, build, columns='*'):
+    """
+    Gabungkan setiap row (yang punya shoe_detail_id) dengan data sepatunya.
+    build(row, shoe) menghasilkan item response; row tanpa sepatu dilewati.
+    """
+    shoes = fetch_shoes_by_ids([row['shoe_detail_id'] for row in rows], columns)
+    result = []
+    for row in rows:
+        shoe = shoes.get(row['shoe_detail_id'])
+        if shoe:
+            result.append(build(row, shoe))
+    return result
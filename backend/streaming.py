@@ -0,0 +1,44 @@
+from flask import Response, current_app, request, stream_with_context
+from pagination import iter_pages, MAX_PAGE_LIMIT
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def stream_format():
+    """
+    Format streaming yang diminta client, atau None untuk response biasa:
+    ?format=ndjson / Accept: application/x-ndjson -> 'ndjson'
+    ?format=json-stream                            -> 'json' (array JSON yang dikirim per chunk)
+    """
+    fmt = request.args.get('format')
+    if fmt == 'ndjson' or NDJSON_MIMETYPE in request.headers.get('Accept', ''):
+        return 'ndjson'
+    if fmt == 'json-stream':
+        return 'json'
+    return None
+
+
+def stream_response(query_factory, key, fmt='ndjson', transform=None, page_size=MAX_PAGE_LIMIT):
+    """
+    Stream seluruh tabel per halaman keyset tanpa menampung semua baris di memori.
+    query_factory() membuat query baru per halaman; transform(rows) -> items per halaman.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        first = True
+        if fmt == 'json':
+            yield '['
+        for rows in iter_pages(query_factory, key, page_size):
+            items = transform(rows) if transform else rows
+            if fmt == 'ndjson':
+                yield ''.join(dumps(item) + '\n' for item in items)
+            else:
+                for item in items:
+                    yield dumps(item) if first else ',' + dumps(item)
+                    first = False
+        if fmt == 'json':
+            yield ']'
+
+    mimetype = NDJSON_MIMETYPE if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
@@ -1,6 +1,10 @@
+import logging
 import os
+import threading
+import time
+import httpx
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 
 load_dotenv()
 
@@ -10,4 +14,149 @@ SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Tuning connection pool HTTP ke Supabase (per proses worker)
+SUPABASE_MAX_CONNECTIONS = int(os.environ.get('SUPABASE_MAX_CONNECTIONS', 20))
+SUPABASE_MAX_KEEPALIVE = int(os.environ.get('SUPABASE_MAX_KEEPALIVE', 10))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.environ.get('SUPABASE_KEEPALIVE_EXPIRY', 30))
+SUPABASE_CONNECT_TIMEOUT = float(os.environ.get('SUPABASE_CONNECT_TIMEOUT', 5))
+SUPABASE_READ_TIMEOUT = float(os.environ.get('SUPABASE_READ_TIMEOUT', 30))
+SUPABASE_POOL_TIMEOUT = float(os.environ.get('SUPABASE_POOL_TIMEOUT', 10))
+SUPABASE_HTTP2 = os.environ.get('SUPABASE_HTTP2', 'true').lower() == 'true'
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class PoolMetrics:
+    """Counter request HTTP ke Supabase per proses (jumlah, error, latency)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        # Dipanggil setiap kali ada request ke Supabase (mis. penghitung round trip per request Flask)
+        self.listeners = []
+
+    def on_request(self, request):
+        request.extensions['started_at'] = time.perf_counter()
+        for listener in self.listeners:
+            listener(request)
+
+    def on_response(self, response):
+        started_at = response.request.extensions.get('started_at')
+        latency = time.perf_counter() - started_at if started_at else 0.0
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if response.status_code >= 400:
+                self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'avg_latency_ms': round(self.total_latency / self.requests * 1000, 2) if self.requests else 0.0,
+                'max_latency_ms': round(self.max_latency * 1000, 2)
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+def create_http_client():
+    """httpx.Client dengan keep-alive, HTTP/2 (kalau paket h2 terpasang), timeout dan batas koneksi."""
+    return httpx.Client(
+        http2=SUPABASE_HTTP2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(
+            SUPABASE_READ_TIMEOUT,
+            connect=SUPABASE_CONNECT_TIMEOUT,
+            pool=SUPABASE_POOL_TIMEOUT
+        ),
+        follow_redirects=True,
+        event_hooks={
+            'request': [pool_metrics.on_request],
+            'response': [pool_metrics.on_response]
+        }
+    )
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _get_process_client():
+    pid = os.getpid()
+    entry = _clients.get(pid)
+    if entry is None:
+        with _clients_lock:
+            entry = _clients.get(pid)
+            if entry is None:
+                http_client = create_http_client()
+                client = create_client(SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(httpx_client=http_client))
+                # Client milik proses induk (sebelum fork) tidak dipakai lagi
+                _clients.clear()
+                entry = _clients[pid] = (client, http_client)
+                logging.info(f'Supabase client dibuat untuk pid {pid} (http2={SUPABASE_HTTP2 and HTTP2_AVAILABLE})')
+    return entry
+
+
+def get_client() -> Client:
+    """
+    Client Supabase untuk proses ini. Dibuat lazy per PID supaya setiap worker
+    (gunicorn fork) punya connection pool sendiri; dipakai bersama oleh semua thread.
+    """
+    return _get_process_client()[0]
+
+
+def _pool_connection_counts(http_client):
+    """
+    (open, idle) koneksi di pool httpcore. httpx tidak punya API publik untuk isi pool,
+    jadi atribut privat dibaca hati-hati; kalau struktur internalnya berubah hasilnya 'unknown'.
+    """
+    pool = getattr(getattr(http_client, '_transport', None), '_pool', None)
+    connections = getattr(pool, 'connections', None)
+    if connections is None:
+        return 'unknown', 'unknown'
+    try:
+        connections = list(connections)
+        return len(connections), sum(1 for conn in connections if conn.is_idle())
+    except (AttributeError, TypeError):
+        return 'unknown', 'unknown'
+
+
+def get_pool_metrics():
+    """Statistik request dan connection pool untuk proses ini."""
+    metrics = pool_metrics.snapshot()
+    _, http_client = _get_process_client()
+    open_connections, idle_connections = _pool_connection_counts(http_client)
+    metrics.update({
+        'pid': os.getpid(),
+        'http2_enabled': SUPABASE_HTTP2 and HTTP2_AVAILABLE,
+        'max_connections': SUPABASE_MAX_CONNECTIONS,
+        'max_keepalive_connections': SUPABASE_MAX_KEEPALIVE,
+        'open_connections': open_connections,
+        'idle_connections': idle_connections
+    })
+    return metrics
+
+
+class _SupabaseProxy:
+    """Objek `supabase` lama tetap bisa di-import; semua atribut diteruskan ke get_client()."""
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+
+supabase: Client = _SupabaseProxy()
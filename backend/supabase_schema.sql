@@ -91,9 +91,97 @@ CREATE TABLE IF NOT EXISTS user_interaction (
 CREATE TABLE IF NOT EXISTS shoe_recomendation_for_users (
     id_shoe_recomendation SERIAL PRIMARY KEY,
     id_user INTEGER NOT NULL REFERENCES "user"(user_id) ON DELETE CASCADE,
-    shoe_detail_id INTEGER NOT NULL REFERENCES shoe_detail(shoe_detail_id) ON DELETE CASCADE
+    shoe_detail_id INTEGER NOT NULL REFERENCES shoe_detail(shoe_detail_id) ON DELETE CASCADE,
+    -- NULL = override manual; selain itu generation hasil training
+    generation BIGINT
+);
+
+-- 10. Tabel Ranking Rekomendasi Global
+-- Top-N global disimpan sekali; shoe_recomendation_for_users hanya berisi
+-- override per user (RECOMMENDATION_STORAGE=global).
+CREATE TABLE IF NOT EXISTS shoe_recomendation_global (
+    id_global_recomendation SERIAL PRIMARY KEY,
+    rank INTEGER NOT NULL,
+    shoe_detail_id INTEGER NOT NULL REFERENCES shoe_detail(shoe_detail_id) ON DELETE CASCADE,
+    score DOUBLE PRECISION NOT NULL DEFAULT 0,
+    generation BIGINT NOT NULL DEFAULT 0
+);
+
+-- 11. Pointer generation rekomendasi yang aktif (selalu satu baris, id = 1)
+-- Training menulis ke generation baru lalu memindah pointer ini (atomic swap).
+CREATE TABLE IF NOT EXISTS recommendation_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    active_generation BIGINT NOT NULL DEFAULT 0,
+    previous_generation BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO recommendation_generation (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+-- 12. Riwayat training rekomendasi (durasi & jumlah baris per run)
+-- Baris status 'running' juga menjadi lock training lintas worker (idx_training_run_one_running).
+CREATE TABLE IF NOT EXISTS training_run (
+    id_training_run SERIAL PRIMARY KEY,
+    job_id VARCHAR(32) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    mode VARCHAR(20),
+    engine VARCHAR(20),
+    started_at TIMESTAMPTZ NOT NULL,
+    finished_at TIMESTAMPTZ,
+    duration_seconds DOUBLE PRECISION,
+    new_interactions INTEGER,
+    rows_written INTEGER,
+    error TEXT
+);
+
+-- 13. Counter interaksi per sepatu (materialised dari user_interaction)
+-- Di-update incremental setiap interaksi tersimpan; dikoreksi oleh reconcile.
+CREATE TABLE IF NOT EXISTS shoe_interaction_counter (
+    shoe_detail_id INTEGER PRIMARY KEY REFERENCES shoe_detail(shoe_detail_id) ON DELETE CASCADE,
+    view_count BIGINT NOT NULL DEFAULT 0,
+    wishlist_count BIGINT NOT NULL DEFAULT 0,
+    cart_count BIGINT NOT NULL DEFAULT 0,
+    order_count BIGINT NOT NULL DEFAULT 0,
+    last_updated TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Migrasi untuk database yang sudah ada
+-- Kolom generation ditambahkan dan SEMUA baris lama (hasil training sebelum ada
+-- generation) ditandai generation 0 dalam langkah yang sama. Tanpa ini baris lama
+-- bernilai NULL, dianggap override manual dan tidak pernah dibersihkan. Hanya jalan
+-- sekali (saat kolom belum ada), jadi override manual yang dibuat sesudahnya aman.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'shoe_recomendation_for_users' AND column_name = 'generation'
+    ) THEN
+        ALTER TABLE shoe_recomendation_for_users ADD COLUMN generation BIGINT;
+        UPDATE shoe_recomendation_for_users SET generation = 0;
+    END IF;
+END $$;
+-- Baris cart duplikat (user, sepatu) hasil add to cart bersamaan di alur lama digabung
+-- sebelum idx_cart_user_shoe (UNIQUE) dibuat; tanpa ini CREATE UNIQUE INDEX gagal.
+-- Quantity dijumlahkan ke baris dengan id_cart terkecil (dibatasi stock, minimal 1),
+-- baris lainnya dihapus. Hanya jalan selama index belum ada.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_cart_user_shoe') THEN
+        UPDATE cart c
+        SET quantity = GREATEST(1, LEAST(d.total_quantity, COALESCE(s.stock, d.total_quantity))),
+            last_updated = NOW()
+        FROM (
+            SELECT id_user, shoe_detail_id, MIN(id_cart) AS keep_id, SUM(quantity) AS total_quantity
+            FROM cart
+            GROUP BY id_user, shoe_detail_id
+            HAVING COUNT(*) > 1
+        ) d
+        LEFT JOIN shoe_detail s ON s.shoe_detail_id = d.shoe_detail_id
+        WHERE c.id_cart = d.keep_id;
+
+        DELETE FROM cart a USING cart b
+        WHERE a.id_user = b.id_user AND a.shoe_detail_id = b.shoe_detail_id AND a.id_cart > b.id_cart;
+    END IF;
+END $$;
+
 -- ============================================================
 -- INDEXES (untuk performa query)
 -- ============================================================
@@ -104,12 +192,21 @@ CREATE INDEX IF NOT EXISTS idx_order_shoe ON "order"(shoe_detail_id);
 CREATE INDEX IF NOT EXISTS idx_payment_order ON payment(order_id);
 CREATE INDEX IF NOT EXISTS idx_cart_user ON cart(id_user);
 CREATE INDEX IF NOT EXISTS idx_cart_shoe ON cart(shoe_detail_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cart_user_shoe ON cart(id_user, shoe_detail_id);
 CREATE INDEX IF NOT EXISTS idx_wishlist_user ON wishlist(id_user);
 CREATE INDEX IF NOT EXISTS idx_wishlist_shoe ON wishlist(shoe_detail_id);
 CREATE INDEX IF NOT EXISTS idx_interaction_user ON user_interaction(id_user);
 CREATE INDEX IF NOT EXISTS idx_interaction_shoe ON user_interaction(shoe_detail_id);
 CREATE INDEX IF NOT EXISTS idx_recommendation_user ON shoe_recomendation_for_users(id_user);
 CREATE INDEX IF NOT EXISTS idx_recommendation_shoe ON shoe_recomendation_for_users(shoe_detail_id);
+CREATE INDEX IF NOT EXISTS idx_recommendation_global_generation ON shoe_recomendation_global(generation, rank);
+CREATE INDEX IF NOT EXISTS idx_recommendation_generation ON shoe_recomendation_for_users(generation);
+CREATE INDEX IF NOT EXISTS idx_training_run_started ON training_run(started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_training_run_job ON training_run(job_id);
+-- Paling banyak satu training berjalan: insert baris 'running' kedua gagal dengan 23505
+CREATE UNIQUE INDEX IF NOT EXISTS idx_training_run_one_running ON training_run ((status)) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_interaction_counter_view ON shoe_interaction_counter(view_count DESC);
+CREATE INDEX IF NOT EXISTS idx_interaction_counter_order ON shoe_interaction_counter(order_count DESC);
 
 -- ============================================================
 -- AUTO-UPDATE last_updated (trigger)
@@ -139,6 +236,304 @@ CREATE TRIGGER trg_order_updated BEFORE UPDATE ON "order"
 CREATE TRIGGER trg_cart_updated BEFORE UPDATE ON cart
     FOR EACH ROW EXECUTE FUNCTION update_last_updated();
 
+-- ============================================================
+-- RPC FUNCTIONS (dipanggil lewat supabase.rpc)
+-- ============================================================
+
+-- Tambah counter interaksi per sepatu (delta negatif untuk interaksi yang dihapus).
+-- p_deltas: [{"shoe_detail_id": 1, "interaction_type": "view", "count": 3}, ...]
+-- Baris di-upsert urut shoe_detail_id supaya batch bersamaan tidak deadlock.
+CREATE OR REPLACE FUNCTION increment_interaction_counters(p_deltas JSONB)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO shoe_interaction_counter (shoe_detail_id, view_count, wishlist_count, cart_count, order_count, last_updated)
+    SELECT d.shoe_detail_id,
+           COALESCE(SUM(d.count) FILTER (WHERE d.interaction_type = 'view'), 0),
+           COALESCE(SUM(d.count) FILTER (WHERE d.interaction_type = 'wishlist'), 0),
+           COALESCE(SUM(d.count) FILTER (WHERE d.interaction_type = 'cart'), 0),
+           COALESCE(SUM(d.count) FILTER (WHERE d.interaction_type = 'order'), 0),
+           NOW()
+    FROM (
+        SELECT (item->>'shoe_detail_id')::INTEGER AS shoe_detail_id,
+               item->>'interaction_type' AS interaction_type,
+               (item->>'count')::BIGINT AS count
+        FROM jsonb_array_elements(p_deltas) AS item
+    ) d
+    WHERE EXISTS (SELECT 1 FROM shoe_detail s WHERE s.shoe_detail_id = d.shoe_detail_id)
+    GROUP BY d.shoe_detail_id
+    ORDER BY d.shoe_detail_id
+    ON CONFLICT (shoe_detail_id) DO UPDATE SET
+        view_count = shoe_interaction_counter.view_count + EXCLUDED.view_count,
+        wishlist_count = shoe_interaction_counter.wishlist_count + EXCLUDED.wishlist_count,
+        cart_count = shoe_interaction_counter.cart_count + EXCLUDED.cart_count,
+        order_count = shoe_interaction_counter.order_count + EXCLUDED.order_count,
+        last_updated = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Hitungan ulang dari user_interaction untuk reconcile counter.
+-- Dikembalikan sebagai SATU nilai JSONB (bukan set baris) supaya tidak terpotong
+-- batas max-rows PostgREST: [{"shoe_detail_id": 1, "interaction_type": "view", "count": 10}, ...]
+DROP FUNCTION IF EXISTS interaction_counts();
+CREATE OR REPLACE FUNCTION interaction_counts()
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'shoe_detail_id', c.shoe_detail_id, 'interaction_type', c.interaction_type, 'count', c.count)), '[]'::JSONB)
+    FROM (
+        SELECT ui.shoe_detail_id, ui.interaction_type, COUNT(*) AS count
+        FROM user_interaction ui
+        GROUP BY ui.shoe_detail_id, ui.interaction_type
+    ) c;
+$$ LANGUAGE sql STABLE;
+
+-- Add to cart dalam satu transaksi: baris shoe_detail di-lock (FOR UPDATE) supaya
+-- request bersamaan untuk sepatu yang sama berjalan berurutan, total quantity di
+-- cart dicek terhadap stock, lalu cart di-upsert dan interaksi 'cart' dicatat.
+CREATE OR REPLACE FUNCTION add_to_cart(p_user_id INTEGER, p_shoe_detail_id INTEGER, p_quantity INTEGER)
+RETURNS JSONB AS $$
+DECLARE
+    v_stock INTEGER;
+    v_current INTEGER;
+    v_cart cart%ROWTYPE;
+BEGIN
+    IF p_quantity IS NULL OR p_quantity < 1 THEN
+        RETURN jsonb_build_object('status', 'invalid_quantity');
+    END IF;
+
+    PERFORM 1 FROM "user" WHERE user_id = p_user_id;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'user_not_found');
+    END IF;
+
+    SELECT stock INTO v_stock FROM shoe_detail WHERE shoe_detail_id = p_shoe_detail_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'shoe_not_found');
+    END IF;
+
+    SELECT quantity INTO v_current FROM cart WHERE id_user = p_user_id AND shoe_detail_id = p_shoe_detail_id;
+    IF COALESCE(v_current, 0) + p_quantity > v_stock THEN
+        RETURN jsonb_build_object('status', 'insufficient_stock', 'stock', v_stock, 'quantity', COALESCE(v_current, 0));
+    END IF;
+
+    INSERT INTO cart (id_user, shoe_detail_id, quantity, date_added, last_updated)
+    VALUES (p_user_id, p_shoe_detail_id, p_quantity, NOW(), NOW())
+    ON CONFLICT (id_user, shoe_detail_id)
+    DO UPDATE SET quantity = cart.quantity + EXCLUDED.quantity, last_updated = NOW()
+    RETURNING * INTO v_cart;
+
+    INSERT INTO user_interaction (id_user, shoe_detail_id, interaction_type, interaction_date)
+    VALUES (p_user_id, p_shoe_detail_id, 'cart', NOW());
+    PERFORM increment_interaction_counters(
+        jsonb_build_array(jsonb_build_object('shoe_detail_id', p_shoe_detail_id, 'interaction_type', 'cart', 'count', 1)));
+
+    RETURN jsonb_build_object(
+        'status', CASE WHEN v_current IS NULL THEN 'created' ELSE 'updated' END,
+        'id_cart', v_cart.id_cart,
+        'quantity', v_cart.quantity,
+        'stock', v_stock
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Kurangi stock beberapa sepatu sekaligus (checkout). Semua baris dikunci dulu
+-- (urut shoe_detail_id supaya tidak deadlock); kalau ada yang stock-nya kurang,
+-- tidak ada yang diubah. Quantity negatif mengembalikan stock (kompensasi).
+-- p_items: [{"shoe_detail_id": 1, "quantity": 2}, ...]
+CREATE OR REPLACE FUNCTION decrement_stock(p_items JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    v_short JSONB;
+BEGIN
+    PERFORM 1 FROM shoe_detail
+    WHERE shoe_detail_id IN (SELECT (item->>'shoe_detail_id')::INTEGER FROM jsonb_array_elements(p_items) AS item)
+    ORDER BY shoe_detail_id
+    FOR UPDATE;
+
+    WITH r AS (
+        SELECT (item->>'shoe_detail_id')::INTEGER AS shoe_detail_id, SUM((item->>'quantity')::INTEGER) AS quantity
+        FROM jsonb_array_elements(p_items) AS item
+        GROUP BY 1
+    )
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'shoe_detail_id', r.shoe_detail_id, 'requested', r.quantity, 'stock', s.stock
+    )), '[]'::JSONB) INTO v_short
+    FROM r
+    LEFT JOIN shoe_detail s ON s.shoe_detail_id = r.shoe_detail_id
+    WHERE s.stock IS NULL OR s.stock < r.quantity;
+
+    IF jsonb_array_length(v_short) > 0 THEN
+        RETURN jsonb_build_object('status', 'insufficient_stock', 'items', v_short);
+    END IF;
+
+    WITH r AS (
+        SELECT (item->>'shoe_detail_id')::INTEGER AS shoe_detail_id, SUM((item->>'quantity')::INTEGER) AS quantity
+        FROM jsonb_array_elements(p_items) AS item
+        GROUP BY 1
+    )
+    UPDATE shoe_detail s SET stock = s.stock - r.quantity
+    FROM r
+    WHERE s.shoe_detail_id = r.shoe_detail_id;
+
+    RETURN jsonb_build_object('status', 'ok');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Checkout seluruh cart (atau cart_ids tertentu) dalam SATU transaksi:
+-- 1. baris cart user di-lock (FOR UPDATE) lalu dibaca; submit kedua yang bersamaan
+--    menunggu di sini dan setelah transaksi pertama commit tidak menemukan baris lagi
+-- 2. quantity < 1 ditolak, baris shoe_detail di-lock (urut id) dan stock dicek
+-- 3. cart dihapus, stock dikurangi, order + payment + interaksi 'order' di-insert
+-- Kalau ada langkah yang gagal, seluruh transaksi di-rollback.
+CREATE OR REPLACE FUNCTION checkout_cart(
+    p_user_id INTEGER,
+    p_cart_ids INTEGER[] DEFAULT NULL,
+    p_order_date DATE DEFAULT CURRENT_DATE,
+    p_order_status VARCHAR DEFAULT 'pending',
+    p_payment_method VARCHAR DEFAULT 'Cash on Delivery',
+    p_payment_status VARCHAR DEFAULT 'pending'
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_lines JSONB;
+    v_invalid JSONB;
+    v_short JSONB;
+    v_orders JSONB;
+BEGIN
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'id_cart', c.id_cart, 'shoe_detail_id', c.shoe_detail_id, 'quantity', c.quantity
+    ) ORDER BY c.id_cart), '[]'::JSONB) INTO v_lines
+    FROM (
+        SELECT id_cart, shoe_detail_id, quantity FROM cart
+        WHERE id_user = p_user_id AND (p_cart_ids IS NULL OR id_cart = ANY(p_cart_ids))
+        ORDER BY id_cart
+        FOR UPDATE
+    ) c;
+
+    IF jsonb_array_length(v_lines) = 0 THEN
+        RETURN jsonb_build_object('status', 'cart_empty');
+    END IF;
+
+    SELECT COALESCE(jsonb_agg(line), '[]'::JSONB) INTO v_invalid
+    FROM jsonb_array_elements(v_lines) AS line
+    WHERE (line->>'quantity')::INTEGER IS NULL OR (line->>'quantity')::INTEGER < 1;
+    IF jsonb_array_length(v_invalid) > 0 THEN
+        RETURN jsonb_build_object('status', 'invalid_quantity', 'items', v_invalid);
+    END IF;
+
+    PERFORM 1 FROM shoe_detail
+    WHERE shoe_detail_id IN (SELECT (line->>'shoe_detail_id')::INTEGER FROM jsonb_array_elements(v_lines) AS line)
+    ORDER BY shoe_detail_id
+    FOR UPDATE;
+
+    WITH r AS (
+        SELECT (line->>'shoe_detail_id')::INTEGER AS shoe_detail_id, SUM((line->>'quantity')::INTEGER) AS quantity
+        FROM jsonb_array_elements(v_lines) AS line
+        GROUP BY 1
+    )
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'shoe_detail_id', r.shoe_detail_id, 'requested', r.quantity, 'stock', s.stock
+    )), '[]'::JSONB) INTO v_short
+    FROM r
+    LEFT JOIN shoe_detail s ON s.shoe_detail_id = r.shoe_detail_id
+    WHERE s.stock IS NULL OR s.stock < r.quantity;
+
+    IF jsonb_array_length(v_short) > 0 THEN
+        RETURN jsonb_build_object('status', 'insufficient_stock', 'items', v_short);
+    END IF;
+
+    DELETE FROM cart
+    WHERE id_cart IN (SELECT (line->>'id_cart')::INTEGER FROM jsonb_array_elements(v_lines) AS line);
+
+    WITH r AS (
+        SELECT (line->>'shoe_detail_id')::INTEGER AS shoe_detail_id, SUM((line->>'quantity')::INTEGER) AS quantity
+        FROM jsonb_array_elements(v_lines) AS line
+        GROUP BY 1
+    )
+    UPDATE shoe_detail s SET stock = s.stock - r.quantity
+    FROM r
+    WHERE s.shoe_detail_id = r.shoe_detail_id;
+
+    WITH lines AS (
+        SELECT (line->>'id_cart')::INTEGER AS id_cart,
+               (line->>'shoe_detail_id')::INTEGER AS shoe_detail_id,
+               (line->>'quantity')::INTEGER AS quantity
+        FROM jsonb_array_elements(v_lines) AS line
+    ), inserted AS (
+        INSERT INTO "order" (user_id, shoe_detail_id, order_date, amount, order_status, last_updated)
+        SELECT p_user_id, l.shoe_detail_id, p_order_date, ROUND((s.shoe_price * l.quantity)::NUMERIC, 2), p_order_status, NOW()
+        FROM lines l JOIN shoe_detail s ON s.shoe_detail_id = l.shoe_detail_id
+        RETURNING order_id, shoe_detail_id, amount
+    ), paid AS (
+        INSERT INTO payment (order_id, payment_method, payment_status, payment_date)
+        SELECT order_id, p_payment_method, p_payment_status, p_order_date FROM inserted
+    )
+    SELECT jsonb_agg(jsonb_build_object(
+        'order_id', i.order_id, 'shoe_detail_id', i.shoe_detail_id, 'amount', i.amount,
+        'quantity', l.quantity, 'shoe_name', s.shoe_name
+    ) ORDER BY i.order_id) INTO v_orders
+    FROM inserted i
+    -- (id_user, shoe_detail_id) unik di cart, jadi satu baris cart per sepatu
+    JOIN lines l ON l.shoe_detail_id = i.shoe_detail_id
+    JOIN shoe_detail s ON s.shoe_detail_id = i.shoe_detail_id;
+
+    INSERT INTO user_interaction (id_user, shoe_detail_id, interaction_type, interaction_date)
+    SELECT p_user_id, (line->>'shoe_detail_id')::INTEGER, 'order', NOW()
+    FROM jsonb_array_elements(v_lines) AS line;
+    PERFORM increment_interaction_counters((
+        SELECT jsonb_agg(jsonb_build_object('shoe_detail_id', line->>'shoe_detail_id', 'interaction_type', 'order', 'count', 1))
+        FROM jsonb_array_elements(v_lines) AS line
+    ));
+
+    RETURN jsonb_build_object('status', 'ok', 'orders', v_orders);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ringkasan per kategori dalam satu query: jumlah SKU, SKU yang ada stock-nya,
+-- rentang harga dan top-N sepatu terpopuler. Popularitas = skor ranking global
+-- generation aktif (hasil training, sudah time-decay), sama dengan fallback
+-- _overview_from_index di category_overview.py.
+CREATE OR REPLACE FUNCTION category_overview(p_top_n INTEGER DEFAULT 5)
+RETURNS JSONB AS $$
+    WITH popularity AS (
+        SELECT g.shoe_detail_id, MAX(g.score) AS score
+        FROM shoe_recomendation_global g
+        WHERE g.generation = COALESCE((SELECT active_generation FROM recommendation_generation WHERE id = 1), 0)
+        GROUP BY g.shoe_detail_id
+    ),
+    ranked AS (
+        SELECT s.shoe_detail_id, s.category_id, s.shoe_name, s.shoe_price, s.shoe_size, s.stock,
+               COALESCE(p.score, 0) AS popularity,
+               ROW_NUMBER() OVER (
+                   PARTITION BY s.category_id
+                   ORDER BY COALESCE(p.score, 0) DESC, s.shoe_detail_id
+               ) AS popularity_rank
+        FROM shoe_detail s
+        LEFT JOIN popularity p ON p.shoe_detail_id = s.shoe_detail_id
+    ),
+    overview AS (
+        SELECT c.category_id, jsonb_build_object(
+            'category_id', c.category_id,
+            'category_name', c.category_name,
+            'sku_count', COUNT(r.shoe_detail_id),
+            'in_stock_count', COUNT(r.shoe_detail_id) FILTER (WHERE r.stock > 0),
+            'min_price', MIN(r.shoe_price),
+            'max_price', MAX(r.shoe_price),
+            'top_items', COALESCE(jsonb_agg(jsonb_build_object(
+                'shoe_detail_id', r.shoe_detail_id,
+                'shoe_name', r.shoe_name,
+                'shoe_price', r.shoe_price,
+                'shoe_size', r.shoe_size,
+                'stock', r.stock,
+                'popularity', r.popularity
+            ) ORDER BY r.popularity_rank) FILTER (WHERE r.popularity_rank <= p_top_n), '[]'::JSONB)
+        ) AS item
+        FROM shoe_category c
+        LEFT JOIN ranked r ON r.category_id = c.category_id
+        GROUP BY c.category_id, c.category_name
+    )
+    SELECT COALESCE(jsonb_agg(item ORDER BY category_id), '[]'::JSONB) FROM overview;
+$$ LANGUAGE sql STABLE;
+
 -- ============================================================
 -- DONE! Database siap digunakan.
 -- ============================================================
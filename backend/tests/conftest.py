@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+# supabase_client wajib punya env ini saat import; client asli tidak pernah dibuat di test
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SUPABASE_KEY', 'test-key')
+# Interaksi ditulis langsung (tanpa thread buffer) supaya hasilnya bisa dicek segera
+os.environ.setdefault('INTERACTION_BUFFER_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask_jwt_extended import JWTManager, create_access_token  # noqa: E402
+from cache import TTLCache  # noqa: E402
+from tests.fake_supabase import FakeClient, backend_modules, install  # noqa: E402
+
+
+@pytest.fixture
+def fake_supabase_factory(monkeypatch):
+    """Membuat FakeClient baru yang menggantikan `supabase` di modul backend; semua cache modul dikosongkan."""
+    def factory():
+        fake = FakeClient()
+        install(fake, monkeypatch)
+        for module in backend_modules():
+            for value in list(vars(module).values()):
+                if isinstance(value, TTLCache):
+                    value.clear()
+        return fake
+    return factory
+
+
+@pytest.fixture
+def fake_supabase(fake_supabase_factory):
+    return fake_supabase_factory()
+
+
+@pytest.fixture
+def make_app():
+    """make_app(blueprint, ...) -> app Flask minimal dengan JWT seperti app.py."""
+    def factory(*blueprints):
+        app = Flask(__name__)
+        app.config.update(JWT_SECRET_KEY='test-secret-key-with-enough-length-32', TESTING=True)
+        JWTManager(app)
+        for blueprint in blueprints:
+            app.register_blueprint(blueprint)
+        return app
+    return factory
+
+
+@pytest.fixture
+def auth_header():
+    """auth_header(app, user_id) -> header Authorization dengan JWT user tersebut."""
+    def factory(app, user_id):
+        with app.app_context():
+            return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+    return factory
@@ -0,0 +1,295 @@
+"""
+Client Supabase palsu (in-memory) untuk test: mendukung subset query builder
+PostgREST yang dipakai backend dan mencatat setiap round trip di `calls`.
+"""
+import os
+import re
+import sys
+import threading
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+
+PRIMARY_KEYS = {
+    'shoe_detail': 'shoe_detail_id',
+    'shoe_category': 'category_id',
+    'user': 'user_id',
+    'cart': 'id_cart',
+    'order': 'order_id',
+    'payment': 'payment_id',
+    'user_interaction': 'interaction_id',
+    'wishlist': 'id_wishlist',
+    'shoe_interaction_counter': 'shoe_detail_id',
+    'shoe_recomendation_for_users': 'id_shoe_recomendation',
+    'shoe_recomendation_global': 'id_global_recomendation',
+    'recommendation_generation': 'id',
+    'training_run': 'id_training_run'
+}
+
+
+class PartialUnique:
+    """Unique partial index: kolom `columns` unik hanya di antara baris yang cocok dengan `where`."""
+
+    def __init__(self, columns, where):
+        self.columns = columns
+        self.where = where
+
+
+def _duplicate(constraint, row, item):
+    columns, where = (constraint.columns, constraint.where) if isinstance(constraint, PartialUnique) else (constraint, {})
+    if any(row.get(k) != v or item.get(k) != v for k, v in where.items()):
+        return False
+    return all(row.get(c) == item.get(c) for c in columns)
+
+
+class Result:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeAPIError(Exception):
+    """Meniru postgrest APIError: atribut code (mis. PGRST202 = fungsi tidak ada, 23505 = unique)."""
+
+    def __init__(self, code, message=''):
+        super().__init__(message or code)
+        self.code = code
+        self.message = message or code
+
+
+def _coerce(value, like):
+    return value if like is None or isinstance(like, str) else type(like)(value)
+
+
+class Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.op = 'select'
+        self.columns = '*'
+        self.filters = []
+        self.orders = []
+        self._limit = None
+        self._range = None
+        self.payload = None
+        self.on_conflict = None
+
+    def select(self, columns='*', **kwargs):
+        self.columns = columns
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.op, self.payload = 'insert', payload
+        return self
+
+    def upsert(self, payload, **kwargs):
+        self.op, self.payload = 'upsert', payload
+        self.on_conflict = kwargs.get('on_conflict') or PRIMARY_KEYS.get(self.table_name)
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = 'update', payload
+        return self
+
+    def delete(self):
+        self.op = 'delete'
+        return self
+
+    def _filter(self, key, check):
+        self.filters.append(lambda row: row.get(key) is not None and check(row.get(key)))
+        return self
+
+    def eq(self, key, value):
+        self.filters.append(lambda row: str(row.get(key)) == str(value))
+        return self
+
+    def neq(self, key, value):
+        self.filters.append(lambda row: str(row.get(key)) != str(value))
+        return self
+
+    def gt(self, key, value):
+        return self._filter(key, lambda v: v > _coerce(value, v))
+
+    def gte(self, key, value):
+        return self._filter(key, lambda v: v >= _coerce(value, v))
+
+    def lt(self, key, value):
+        return self._filter(key, lambda v: v < _coerce(value, v))
+
+    def lte(self, key, value):
+        return self._filter(key, lambda v: v <= _coerce(value, v))
+
+    def in_(self, key, values):
+        wanted = {str(v) for v in values}
+        self.filters.append(lambda row: str(row.get(key)) in wanted)
+        return self
+
+    def or_(self, expression):
+        self.filters.append(lambda row: any(_condition(part, row) for part in _split(expression)))
+        return self
+
+    def order(self, key, desc=False):
+        self.orders.append((key, desc))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def execute(self):
+        with self.client.lock:
+            self.client.calls.append((self.table_name, self.op))
+            return self._execute()
+
+    def _execute(self):
+        client = self.client
+        rows = client.tables.setdefault(self.table_name, [])
+        pk = PRIMARY_KEYS.get(self.table_name)
+        if self.op in ('insert', 'upsert'):
+            items = self.payload if isinstance(self.payload, list) else [self.payload]
+            out = []
+            for item in items:
+                item = dict(item)
+                if self.op == 'upsert' and self.on_conflict:
+                    keys = self.on_conflict.split(',')
+                    existing = [r for r in rows if all(str(r.get(k)) == str(item.get(k)) for k in keys)]
+                    if existing:
+                        existing[0].update(item)
+                        out.append(dict(existing[0]))
+                        continue
+                for columns in client.unique.get(self.table_name, []):
+                    if any(_duplicate(columns, r, item) for r in rows):
+                        raise FakeAPIError('23505', f'duplicate key on {self.table_name}{columns}')
+                if pk and pk not in item:
+                    client.seq[self.table_name] = client.seq.get(self.table_name, 0) + 1
+                    item[pk] = client.seq[self.table_name]
+                rows.append(item)
+                out.append(dict(item))
+            return Result(out)
+
+        matched = [r for r in rows if all(f(r) for f in self.filters)]
+        if self.op == 'update':
+            for row in matched:
+                updated = dict(row, **self.payload)
+                for columns in client.unique.get(self.table_name, []):
+                    if any(r is not row and _duplicate(columns, r, updated) for r in rows):
+                        raise FakeAPIError('23505', f'duplicate key on {self.table_name}{columns}')
+            for row in matched:
+                row.update(self.payload)
+            return Result([dict(r) for r in matched])
+        if self.op == 'delete':
+            client.tables[self.table_name] = [r for r in rows if not any(r is m for m in matched)]
+            return Result([dict(r) for r in matched])
+
+        for key, desc in reversed(self.orders):
+            matched = sorted(matched, key=lambda r: (r.get(key) is None, r.get(key)), reverse=desc)
+        if self._range:
+            matched = matched[self._range[0]:self._range[1] + 1]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        return Result([self._project(r) for r in matched])
+
+    def _project(self, row):
+        row = dict(row)
+        # Embedded select satu level: relasi(kolom,...) di-join lewat primary key tabel relasi
+        for match in re.finditer(r'(\w+)\(([^)]*)\)', self.columns):
+            relation, columns = match.group(1), match.group(2)
+            fk = PRIMARY_KEYS.get(relation)
+            target = next((r for r in self.client.tables.get(relation, []) if r.get(fk) == row.get(fk)), None)
+            if target is not None and columns.strip() != '*':
+                target = {c.strip(): target.get(c.strip()) for c in columns.split(',')}
+            row[relation] = dict(target) if target is not None else None
+        base = [c.strip() for c in re.sub(r'\w+\([^)]*\)', '', self.columns).split(',') if c.strip()]
+        if base and '*' not in base:
+            keep = set(base) | {m.group(1) for m in re.finditer(r'(\w+)\(', self.columns)}
+            row = {k: v for k, v in row.items() if k in keep}
+        return row
+
+
+def _split(expression):
+    parts, depth, current = [], 0, ''
+    for ch in expression:
+        depth += {'(': 1, ')': -1}.get(ch, 0)
+        if ch == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += ch
+    parts.append(current)
+    return parts
+
+
+def _condition(part, row):
+    # Subset filter or(): a.lt.X, a.is.null, and(a.eq.X,b.lt.Y)
+    if part.startswith('and('):
+        return all(_condition(p, row) for p in _split(part[4:-1]))
+    key, op, value = part.split('.', 2)
+    actual = row.get(key)
+    if op == 'is':
+        return actual is None if value == 'null' else False
+    if actual is None:
+        return False
+    value = _coerce(value, actual)
+    return {'eq': actual == value, 'lt': actual < value, 'gt': actual > value,
+            'lte': actual <= value, 'gte': actual >= value}[op]
+
+
+class RPC:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        function = self.client.rpcs.get(self.name)
+        with self.client.lock:
+            self.client.calls.append(('rpc', self.name))
+        if function is None:
+            raise FakeAPIError('PGRST202', f'function {self.name} not found')
+        return Result(function(self.client, **self.params))
+
+
+class FakeClient:
+    def __init__(self):
+        self.tables = {}
+        self.seq = {}
+        self.rpcs = {}
+        # {table: [(kolom, ...) | PartialUnique]} constraint unique tambahan (selain primary key)
+        self.unique = {}
+        self.calls = []
+        self.lock = threading.RLock()
+
+    def table(self, name):
+        return Query(self, name)
+
+    def rpc(self, name, params=None):
+        return RPC(self, name, params or {})
+
+    def seed(self, table, rows):
+        pk = PRIMARY_KEYS.get(table)
+        for row in rows:
+            self.tables.setdefault(table, []).append(dict(row))
+            if pk and pk in row:
+                self.seq[table] = max(self.seq.get(table, 0), row[pk])
+
+    def round_trips(self):
+        return len(self.calls)
+
+
+def install(fake, monkeypatch):
+    """Ganti `supabase` di semua modul backend yang sudah di-import dengan fake."""
+    for module in backend_modules():
+        if 'supabase' in vars(module) and module.__name__ != 'supabase_client':
+            monkeypatch.setattr(module, 'supabase', fake)
+
+
+def backend_modules():
+    """Modul backend (bukan tests / library) yang sudah di-import."""
+    for module in list(sys.modules.values()):
+        path = os.path.abspath(getattr(module, '__file__', None) or '')
+        if path.startswith(BACKEND_DIR) and not path.startswith(TESTS_DIR):
+            yield module
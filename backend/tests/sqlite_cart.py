@@ -0,0 +1,87 @@
+"""
+Pengganti RPC add_to_cart (supabase_schema.sql) di atas SQLite untuk test konkurensi.
+BEGIN IMMEDIATE mengambil write lock database, setara peran SELECT ... FOR UPDATE
+pada shoe_detail di fungsi plpgsql: request bersamaan berjalan berurutan.
+"""
+import sqlite3
+from contextlib import closing
+
+SCHEMA = """
+CREATE TABLE user (user_id INTEGER PRIMARY KEY, role TEXT);
+CREATE TABLE shoe_detail (shoe_detail_id INTEGER PRIMARY KEY, stock INTEGER NOT NULL);
+CREATE TABLE cart (
+    id_cart INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_user INTEGER NOT NULL,
+    shoe_detail_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    date_added TEXT,
+    last_updated TEXT
+);
+CREATE UNIQUE INDEX idx_cart_user_shoe ON cart(id_user, shoe_detail_id);
+CREATE TABLE user_interaction (
+    interaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_user INTEGER,
+    shoe_detail_id INTEGER,
+    interaction_type TEXT,
+    interaction_date TEXT
+);
+"""
+
+
+class SQLiteCart:
+    def __init__(self, path):
+        self.path = path
+        with closing(self.connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+
+    def seed(self, users=(), shoes=()):
+        with closing(self.connect()) as conn:
+            conn.executemany('INSERT INTO user (user_id, role) VALUES (?, ?)', [(u, 'Customer') for u in users])
+            conn.executemany('INSERT INTO shoe_detail (shoe_detail_id, stock) VALUES (?, ?)', shoes)
+
+    def add_to_cart(self, client, p_user_id, p_shoe_detail_id, p_quantity):
+        """Signature fake RPC: fn(client, **params) -> data."""
+        if p_quantity is None or p_quantity < 1:
+            return {'status': 'invalid_quantity'}
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('SELECT 1 FROM user WHERE user_id = ?', (p_user_id,)).fetchone() is None:
+                conn.execute('ROLLBACK')
+                return {'status': 'user_not_found'}
+            shoe = conn.execute('SELECT stock FROM shoe_detail WHERE shoe_detail_id = ?', (p_shoe_detail_id,)).fetchone()
+            if shoe is None:
+                conn.execute('ROLLBACK')
+                return {'status': 'shoe_not_found'}
+            current = conn.execute('SELECT quantity FROM cart WHERE id_user = ? AND shoe_detail_id = ?',
+                                   (p_user_id, p_shoe_detail_id)).fetchone()
+            current_quantity = current[0] if current else 0
+            if current_quantity + p_quantity > shoe[0]:
+                conn.execute('ROLLBACK')
+                return {'status': 'insufficient_stock', 'stock': shoe[0], 'quantity': current_quantity}
+            conn.execute(
+                """
+                INSERT INTO cart (id_user, shoe_detail_id, quantity, date_added, last_updated)
+                VALUES (?, ?, ?, datetime('now'), datetime('now'))
+                ON CONFLICT (id_user, shoe_detail_id)
+                DO UPDATE SET quantity = cart.quantity + excluded.quantity, last_updated = datetime('now')
+                """, (p_user_id, p_shoe_detail_id, p_quantity))
+            id_cart, quantity = conn.execute('SELECT id_cart, quantity FROM cart WHERE id_user = ? AND shoe_detail_id = ?',
+                                             (p_user_id, p_shoe_detail_id)).fetchone()
+            conn.execute("INSERT INTO user_interaction (id_user, shoe_detail_id, interaction_type, interaction_date) "
+                         "VALUES (?, ?, 'cart', datetime('now'))", (p_user_id, p_shoe_detail_id))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return {'status': 'updated' if current else 'created', 'id_cart': id_cart, 'quantity': quantity, 'stock': shoe[0]}
+
+    def cart_rows(self):
+        with closing(self.connect()) as conn:
+            return conn.execute('SELECT id_user, shoe_detail_id, quantity FROM cart ORDER BY id_cart').fetchall()
+
+    def interaction_count(self):
+        with closing(self.connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM user_interaction').fetchone()[0]
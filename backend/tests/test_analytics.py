@@ -0,0 +1,110 @@
+from datetime import date
+
+import pytest
+
+import analytics
+from routes.analytics import analytics_bp
+
+ADMIN_ID = 1
+CUSTOMER_ID = 2
+DAY1, DAY2, TODAY = date(2026, 10, 1), date(2026, 10, 2), date(2026, 10, 3)
+
+
+def order(order_id, shoe_id, day, amount, status='Pending', payment_status='pending'):
+    # payment_id di baris order hanya untuk join embedded select di FakeClient
+    return ({'order_id': order_id, 'user_id': CUSTOMER_ID, 'shoe_detail_id': shoe_id, 'order_date': day.isoformat(),
+             'amount': amount, 'order_status': status, 'payment_id': order_id},
+            {'payment_id': order_id, 'order_id': order_id, 'payment_status': payment_status})
+
+
+def interaction(interaction_id, user_id, interaction_type, at):
+    return {'interaction_id': interaction_id, 'id_user': user_id, 'shoe_detail_id': 1,
+            'interaction_type': interaction_type, 'interaction_date': at}
+
+
+@pytest.fixture
+def seeded(fake_supabase, monkeypatch):
+    monkeypatch.setattr(analytics, 'today_wita', lambda: TODAY)
+    fake_supabase.seed('user', [{'user_id': ADMIN_ID, 'role': 'Admin'}, {'user_id': CUSTOMER_ID, 'role': 'Customer'}])
+    fake_supabase.seed('shoe_category', [{'category_id': 1, 'category_name': 'Running'},
+                                         {'category_id': 2, 'category_name': 'Casual'}])
+    fake_supabase.seed('shoe_detail', [{'shoe_detail_id': 1, 'shoe_price': 100.0, 'category_id': 1},
+                                       {'shoe_detail_id': 2, 'shoe_price': 50.0, 'category_id': 2}])
+    orders, payments = zip(
+        order(1, 1, DAY1, 200.0, 'Completed', 'paid'),
+        order(2, 2, DAY1, 50.0, 'cancelled', 'paid'),
+        order(3, 2, DAY2, 150.0),
+        order(4, 1, TODAY, 100.0, payment_status='success'),
+    )
+    fake_supabase.seed('order', list(orders))
+    fake_supabase.seed('payment', list(payments))
+    fake_supabase.seed('user_interaction', [
+        interaction(1, 1, 'view', '2026-10-01T09:00:00+08:00'),
+        interaction(2, 1, 'view', '2026-10-01T09:30:00+08:00'),
+        # 15:30Z = 23:30 WITA (masih 1 Okt), 16:30Z = 00:30 WITA (sudah 2 Okt)
+        interaction(3, 2, 'view', '2026-10-01T15:30:00Z'),
+        interaction(4, 2, 'view', '2026-10-01T16:30:00Z'),
+        interaction(5, 1, 'cart', '2026-10-01T10:00:00+08:00'),
+        interaction(6, 1, 'order', '2026-10-01T10:05:00+08:00'),
+    ])
+    return fake_supabase
+
+
+def test_daily_rollups(seeded):
+    rollups = analytics.compute_daily_rollups(DAY1, TODAY)
+
+    day1 = rollups['2026-10-01']
+    # Order cancelled tidak dihitung sebagai order/unit/revenue, termasuk paid_revenue
+    assert {k: day1[k] for k in analytics.METRICS} == {
+        'orders': 1, 'units': 2, 'revenue': 200.0, 'paid_revenue': 200.0, 'cancelled_orders': 1}
+    assert day1['by_category'] == {1: {'orders': 1, 'units': 2, 'revenue': 200.0}}
+    assert {k: day1[k] for k in analytics.FUNNEL} == {
+        'view_users': 2, 'cart_users': 1, 'order_users': 1, 'views': 3, 'carts': 1, 'order_events': 1}
+
+    day2 = rollups['2026-10-02']
+    assert (day2['orders'], day2['units'], day2['revenue'], day2['paid_revenue']) == (1, 3, 150.0, 0.0)
+    assert day2['by_shoe'] == {2: {'orders': 1, 'units': 3, 'revenue': 150.0}}
+    assert (day2['views'], day2['view_users']) == (1, 1)
+    assert rollups['2026-10-03']['paid_revenue'] == 100.0
+
+
+def test_closed_days_are_cached_and_today_recomputed(seeded):
+    first = analytics.get_daily_rollups(DAY1, TODAY)
+    assert sorted(key for key in ['2026-10-01', '2026-10-02', '2026-10-03'] if analytics.day_cache.get(key)) == \
+        ['2026-10-01', '2026-10-02']
+
+    # Perubahan di hari yang sudah tutup tidak terlihat sampai di-invalidate; hari ini selalu dihitung ulang
+    seeded.tables['order'][2]['amount'] = 300.0
+    seeded.seed('order', [order(5, 1, TODAY, 100.0)[0]])
+    before = len(seeded.calls)
+    second = analytics.get_daily_rollups(DAY1, TODAY)
+    assert second[:2] == first[:2]
+    assert second[2]['orders'] == 2
+    fetched_orders = [row for row in seeded.calls[before:] if row == ('order', 'select')]
+    assert len(fetched_orders) == 1
+
+    analytics.invalidate_sales_day('2026-10-02T00:00:00')
+    assert analytics.get_daily_rollups(DAY1, TODAY)[1]['revenue'] == 300.0
+
+
+def test_sales_report_weekly_totals_and_conversion(seeded):
+    report = analytics.sales_report(DAY1, TODAY, granularity='week')
+    # 1-3 Okt 2026 jatuh di minggu yang dimulai Senin 28 Sep
+    assert [row['period'] for row in report['series']] == ['2026-09-28']
+    totals = report['totals']
+    assert (totals['orders'], totals['units'], totals['revenue'], totals['paid_revenue']) == (3, 6, 450.0, 300.0)
+    assert (totals['view_to_cart'], totals['cart_to_order']) == (round(1 / 3, 4), 1.0)
+    assert [(row['category_name'], row['revenue']) for row in report['by_category']] == [
+        ('Running', 300.0), ('Casual', 150.0)]
+    assert report['top_shoes'][0]['shoe_detail_id'] == 1
+
+
+def test_sales_route_is_admin_only(make_app, auth_header, seeded):
+    app = make_app(analytics_bp)
+    with app.test_client() as client:
+        denied = client.get('/api/analytics/sales', headers=auth_header(app, CUSTOMER_ID))
+        ok = client.get('/api/analytics/sales?from=2026-10-01&to=2026-10-03', headers=auth_header(app, ADMIN_ID))
+        bad = client.get('/api/analytics/sales?from=2026-10-04&to=2026-10-03', headers=auth_header(app, ADMIN_ID))
+    assert denied.status_code == 403
+    assert ok.status_code == 200 and len(ok.get_json()['series']) == 3
+    assert bad.status_code == 400
@@ -0,0 +1,131 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from routes.cart import cart_bp
+from tests.sqlite_cart import SQLiteCart
+
+USER_ID = 7
+SHOE_ID = 3
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(cart_bp)
+
+
+@pytest.fixture
+def sqlite_cart(fake_supabase, tmp_path):
+    db = SQLiteCart(str(tmp_path / 'cart.sqlite3'))
+    fake_supabase.rpcs['add_to_cart'] = db.add_to_cart
+    return db
+
+
+def post_many(app, headers, payloads, workers=16):
+    def post(payload):
+        with app.test_client() as client:
+            return client.post('/api/cart', json=payload, headers=headers).status_code
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(post, payloads))
+
+
+def test_concurrent_add_to_cart_rpc_never_oversells(app, auth_header, sqlite_cart):
+    sqlite_cart.seed(users=[USER_ID], shoes=[(SHOE_ID, 20)])
+    payload = {'id_user': USER_ID, 'shoe_detail_id': SHOE_ID, 'quantity': 1}
+
+    statuses = post_many(app, auth_header(app, USER_ID), [payload] * 50)
+
+    assert statuses.count(201) == 1
+    assert statuses.count(200) == 19
+    assert statuses.count(400) == 30
+    assert sqlite_cart.cart_rows() == [(USER_ID, SHOE_ID, 20)]
+    assert sqlite_cart.interaction_count() == 20
+
+
+def test_concurrent_sequential_add_merges_unique_conflicts(app, auth_header, fake_supabase):
+    # Tanpa RPC add_to_cart: insert yang kalah balapan kena idx_cart_user_shoe (23505) dan digabung
+    fake_supabase.unique['cart'] = [('id_user', 'shoe_detail_id')]
+    fake_supabase.seed('user', [{'user_id': USER_ID, 'role': 'Customer'}])
+    fake_supabase.seed('shoe_detail', [{'shoe_detail_id': SHOE_ID, 'stock': 1000}])
+    payload = {'id_user': USER_ID, 'shoe_detail_id': SHOE_ID, 'quantity': 2}
+
+    statuses = post_many(app, auth_header(app, USER_ID), [payload] * 40)
+
+    assert set(statuses) <= {200, 201}
+    assert statuses.count(201) == 1
+    rows = fake_supabase.tables['cart']
+    assert len(rows) == 1
+    assert 2 <= rows[0]['quantity'] <= 80
+
+
+def test_sequential_add_merges_after_losing_insert_race(app, auth_header, fake_supabase, monkeypatch):
+    fake_supabase.unique['cart'] = [('id_user', 'shoe_detail_id')]
+    fake_supabase.seed('user', [{'user_id': USER_ID, 'role': 'Customer'}])
+    fake_supabase.seed('shoe_detail', [{'shoe_detail_id': SHOE_ID, 'stock': 10}])
+    fake_supabase.seed('cart', [{'id_cart': 1, 'id_user': USER_ID, 'shoe_detail_id': SHOE_ID, 'quantity': 3}])
+
+    # Request lain insert di antara cek "sudah ada di cart" dan insert request ini
+    original_table = fake_supabase.table
+    hidden = {'done': False}
+
+    def table(name):
+        query = original_table(name)
+        if name == 'cart' and not hidden['done']:
+            hidden['done'] = True
+            query.eq('id_cart', -1)
+        return query
+    monkeypatch.setattr(fake_supabase, 'table', table)
+
+    with app.test_client() as client:
+        response = client.post('/api/cart', json={'id_user': USER_ID, 'shoe_detail_id': SHOE_ID, 'quantity': 2},
+                               headers=auth_header(app, USER_ID))
+
+    assert response.status_code == 200
+    assert [row['quantity'] for row in fake_supabase.tables['cart']] == [5]
+
+
+def test_update_cart_to_shoe_already_in_cart_returns_409(app, auth_header, fake_supabase):
+    fake_supabase.unique['cart'] = [('id_user', 'shoe_detail_id')]
+    fake_supabase.seed('user', [{'user_id': USER_ID, 'role': 'Customer'}])
+    fake_supabase.seed('shoe_detail', [{'shoe_detail_id': 1, 'stock': 5}, {'shoe_detail_id': 2, 'stock': 5}])
+    fake_supabase.seed('cart', [{'id_cart': 1, 'id_user': USER_ID, 'shoe_detail_id': 1, 'quantity': 1},
+                                {'id_cart': 2, 'id_user': USER_ID, 'shoe_detail_id': 2, 'quantity': 1}])
+
+    with app.test_client() as client:
+        response = client.put('/api/cart/1', json={'shoe_detail_id': 2}, headers=auth_header(app, USER_ID))
+
+    assert response.status_code == 409
+    assert [row['shoe_detail_id'] for row in fake_supabase.tables['cart']] == [1, 2]
+
+
+def seed_cart(fake, lines):
+    fake.seed('shoe_detail', [{'shoe_detail_id': i, 'shoe_name': f'Shoe {i}', 'shoe_price': 10.5,
+                               'shoe_size': 42, 'stock': 50} for i in range(1, lines + 1)])
+    fake.seed('cart', [{'id_cart': i, 'id_user': USER_ID, 'shoe_detail_id': i, 'quantity': 2,
+                        'date_added': '2026-10-01', 'last_updated': '2026-10-01'} for i in range(1, lines + 1)])
+
+
+@pytest.mark.parametrize('url', [f'/api/cart/{USER_ID}', '/api/cart', '/api/cart?summary=true'])
+def test_cart_reads_use_one_round_trip(app, auth_header, fake_supabase_factory, url):
+    for lines in (1, 10, 100):
+        fake = fake_supabase_factory()
+        seed_cart(fake, lines)
+        with app.test_client() as client:
+            response = client.get(url, headers=auth_header(app, USER_ID))
+        assert response.status_code == 200
+        assert fake.calls == [('cart', 'select')]
+        body = response.get_json()
+        items = body['items'] if isinstance(body, dict) else body
+        assert len(items) == lines
+        assert items[0]['shoe_name'] == 'Shoe 1' and items[0]['line_total'] == 21.0
+        subtotal = body['subtotal'] if isinstance(body, dict) else float(response.headers['X-Cart-Subtotal'])
+        assert subtotal == 21.0 * lines
+
+
+def test_cart_item_read_uses_one_round_trip(app, auth_header, fake_supabase):
+    seed_cart(fake_supabase, 3)
+    with app.test_client() as client:
+        response = client.get('/api/cart/item/2', headers=auth_header(app, USER_ID))
+    assert response.status_code == 200
+    assert response.get_json()['shoe_name'] == 'Shoe 2'
+    assert fake_supabase.calls == [('cart', 'select')]
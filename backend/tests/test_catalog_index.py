@@ -0,0 +1,145 @@
+import pytest
+
+from benchmarks import catalog_search, synthetic_categories
+from catalog_index import CatalogIndex
+from routes.shoes import shoes_bp
+from tests.fake_supabase import backend_modules
+
+USER_ID = 1
+
+
+def shoe(shoe_id, name, price, category_id=1, size=42, stock=5):
+    return {'shoe_detail_id': shoe_id, 'shoe_name': name, 'shoe_price': price, 'shoe_size': size,
+            'stock': stock, 'category_id': category_id, 'date_added': f'2026-01-{shoe_id:02d}'}
+
+
+CATALOG = [
+    shoe(1, 'Nike Air Max', 120.0),
+    shoe(2, 'Nike Air Force', 95.0, size=41),
+    shoe(3, 'Adidas Ultraboost', 180.0, category_id=2, stock=0),
+    shoe(4, 'Puma Suede Classic', 60.0, category_id=2),
+    shoe(5, 'Nike Zoom Pegasus', 130.0, category_id=3, size=41),
+]
+
+
+@pytest.fixture
+def index(fake_supabase, monkeypatch):
+    fake_supabase.seed('shoe_category', [{'category_id': c, 'category_name': f'Category {c}'} for c in (1, 2, 3)])
+    fake_supabase.seed('shoe_detail', CATALOG)
+    fresh = CatalogIndex(ttl=3600)
+    for module in list(backend_modules()):
+        if isinstance(vars(module).get('catalog_index'), CatalogIndex):
+            monkeypatch.setattr(module, 'catalog_index', fresh)
+    return fresh
+
+
+def ids(index, **params):
+    return [item['shoe_detail_id'] for item in index.search(**params)[0]]
+
+
+def test_search_filters_and_sorts(index):
+    assert ids(index, q='nike air') == [1, 2]
+    assert ids(index, q='ni', sort='price_asc') == [2, 1, 5]
+    assert ids(index, category_ids=[2], in_stock=True) == [4]
+    assert ids(index, sizes=['41']) == [2, 5]
+    assert ids(index, min_price=95, max_price=130, sort='price_desc') == [5, 1, 2]
+    assert ids(index, q='nike', min_price=100) == [1, 5]
+    assert index.search(q='nike', limit=1, offset=1, sort='id')[0][0]['category_name'] == 'Category 1'
+    assert index.search(q='nike')[1] == 3
+
+
+def test_upsert_and_remove_update_every_structure(index, fake_supabase):
+    index.search()
+    calls = fake_supabase.round_trips()
+
+    index.upsert(shoe(1, 'Reebok Classic', 40.0, category_id=3, size=44))
+    index.remove(4)
+
+    assert ids(index, q='nike air') == [2]
+    assert ids(index, q='classic') == [1]
+    assert ids(index, category_ids=[3], sizes=['44']) == [1]
+    assert ids(index, max_price=60) == [1]
+    assert 4 not in index.docs and index.prices == sorted(index.prices)
+    # Upsert/remove tidak membaca database
+    assert fake_supabase.round_trips() == calls
+
+
+def test_dirty_rows_are_reread_on_next_search(index, fake_supabase):
+    index.search()
+    fake_supabase.tables['shoe_detail'][0]['stock'] = 0
+    fake_supabase.tables['shoe_detail'] = [row for row in fake_supabase.tables['shoe_detail'] if row['shoe_detail_id'] != 2]
+
+    index.mark_dirty([1, 2])
+    before = fake_supabase.round_trips()
+    assert ids(index, q='nike', in_stock=True) == [5]
+    # Satu query in_() untuk baris dirty, bukan rebuild penuh
+    assert fake_supabase.calls[before:] == [('shoe_detail', 'select')]
+    assert index.stats()['dirty'] == 0
+
+
+def test_changes_during_rebuild_are_refreshed_after_swap(index, fake_supabase):
+    index.search()
+    rows = iter(CATALOG)
+
+    def shoes_read_while_writes_happen():
+        yield next(rows)
+        # Route tulis jalan di tengah rebuild: index lama di-update, hasil baca rebuild sudah basi
+        fake_supabase.tables['shoe_detail'][1]['shoe_price'] = 10.0
+        index.upsert(dict(CATALOG[1], shoe_price=10.0))
+        index.mark_dirty([5])
+        yield from rows
+
+    index.build(shoes=shoes_read_while_writes_happen(), categories=synthetic_categories(3))
+    assert index.docs[2]['shoe_price'] == 95.0
+    assert index.stats()['dirty'] == 2
+
+    assert ids(index, max_price=50) == [2]
+    assert index.stats()['dirty'] == 0
+
+
+def test_invalidate_forces_full_rebuild(index, fake_supabase):
+    index.search()
+    fake_supabase.seed('shoe_detail', [shoe(6, 'Vans Old Skool', 70.0)])
+    assert 6 not in ids(index)
+
+    index.invalidate()
+    assert 6 in ids(index, q='vans')
+
+
+def test_benchmark_harness_runs_on_small_catalog():
+    rows = dict(catalog_search.run(skus=2000, repeat=2))
+    assert rows['build']['skus'] == 2000
+    assert rows["q='nike air'"]['hits'] > 0
+    assert all('p50_ms' in result for name, result in rows.items() if name != 'build')
+
+
+@pytest.fixture
+def app(make_app, index):
+    return make_app(shoes_bp)
+
+
+@pytest.mark.parametrize('query', [
+    'limit=abc', 'offset=x', 'limit=0', 'offset=-1', 'limit=1.5',
+    'min_price=abc', 'max_price=nan', 'min_price=inf',
+])
+def test_search_rejects_malformed_numbers(app, auth_header, query):
+    with app.test_client() as client:
+        response = client.get(f'/api/shoes/search?{query}', headers=auth_header(app, USER_ID))
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('query', ['min_price=abc', 'max_price=1e999', 'price_buckets=0,x'])
+def test_facets_reject_malformed_numbers(app, auth_header, query):
+    with app.test_client() as client:
+        response = client.get(f'/api/shoes/facets?{query}', headers=auth_header(app, USER_ID))
+    assert response.status_code == 400
+
+
+def test_search_route_clamps_limit_and_accepts_empty_values(app, auth_header):
+    with app.test_client() as client:
+        response = client.get('/api/shoes/search?q=nike&limit=100000&min_price=&sort=price_asc',
+                              headers=auth_header(app, USER_ID))
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [item['shoe_detail_id'] for item in body['data']] == [2, 1, 5]
+    assert body['limit'] == 1000 and body['total'] == 3
@@ -0,0 +1,107 @@
+import os
+import re
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from catalog_index import CatalogIndex
+from category_overview import get_category_overview, invalidate_category_overview
+from tests.fake_supabase import BACKEND_DIR, backend_modules
+
+ACTIVE_GENERATION = 3
+
+SCHEMA = """
+CREATE TABLE shoe_category (category_id INTEGER PRIMARY KEY, category_name TEXT);
+CREATE TABLE shoe_detail (shoe_detail_id INTEGER PRIMARY KEY, shoe_name TEXT, shoe_price REAL, shoe_size TEXT,
+                          stock INTEGER, category_id INTEGER);
+CREATE TABLE shoe_recomendation_global (id_global_recomendation INTEGER PRIMARY KEY, rank INTEGER,
+                                        shoe_detail_id INTEGER, score REAL, generation INTEGER);
+CREATE TABLE recommendation_generation (id INTEGER PRIMARY KEY, active_generation INTEGER);
+"""
+
+
+def overview_ctes():
+    """CTE popularity & ranked dari fungsi category_overview di supabase_schema.sql (dijalankan apa adanya)."""
+    with open(os.path.join(BACKEND_DIR, 'supabase_schema.sql')) as f:
+        sql = f.read()
+    body = sql[sql.index('FUNCTION category_overview'):]
+    return re.search(r'(WITH popularity AS .*?\))\s*,\s*overview AS', body, re.S).group(1)
+
+
+def sqlite_category_overview(path):
+    """Fake RPC category_overview: ranking dari SQL asli, agregat jsonb ditulis ulang untuk SQLite."""
+    def rpc(client, p_top_n=5):
+        with closing(sqlite3.connect(path)) as conn:
+            conn.row_factory = sqlite3.Row
+            ranked = conn.execute(overview_ctes() + """
+                SELECT c.category_id, c.category_name, r.shoe_detail_id, r.shoe_name, r.shoe_price, r.shoe_size,
+                       r.stock, r.popularity, r.popularity_rank
+                FROM shoe_category c LEFT JOIN ranked r ON r.category_id = c.category_id
+                ORDER BY c.category_id, r.popularity_rank""").fetchall()
+        overview = {}
+        for row in ranked:
+            entry = overview.setdefault(row['category_id'], {
+                'category_id': row['category_id'], 'category_name': row['category_name'], 'sku_count': 0,
+                'in_stock_count': 0, 'min_price': None, 'max_price': None, 'top_items': []})
+            if row['shoe_detail_id'] is None:
+                continue
+            entry['sku_count'] += 1
+            entry['in_stock_count'] += row['stock'] > 0
+            entry['min_price'] = min(p for p in (entry['min_price'], row['shoe_price']) if p is not None)
+            entry['max_price'] = max(p for p in (entry['max_price'], row['shoe_price']) if p is not None)
+            if row['popularity_rank'] <= p_top_n:
+                entry['top_items'].append({key: row[key] for key in
+                                           ('shoe_detail_id', 'shoe_name', 'shoe_price', 'shoe_size', 'stock')}
+                                          | {'popularity': row['popularity']})
+        return list(overview.values())
+    return rpc
+
+
+@pytest.fixture
+def catalog(fake_supabase, monkeypatch, tmp_path):
+    categories = [{'category_id': 1, 'category_name': 'Running'}, {'category_id': 2, 'category_name': 'Casual'},
+                  {'category_id': 3, 'category_name': 'Kosong'}]
+    shoes = [{'shoe_detail_id': i, 'shoe_name': f'Shoe {i}', 'shoe_price': 50.0 + 10 * i, 'shoe_size': '42',
+              'stock': i % 3, 'category_id': 1 if i <= 6 else 2} for i in range(1, 10)]
+    # Generation lama punya urutan berbeda dan tidak boleh ikut dihitung; sepatu 4 muncul dua kali
+    ranking = [(1, 8, 9.0, 3), (2, 2, 7.5, 3), (3, 5, 7.5, 3), (4, 4, 1.0, 3), (5, 4, 2.0, 3),
+               (1, 1, 99.0, 2), (2, 6, 50.0, 2)]
+    global_rows = [{'id_global_recomendation': i, 'rank': rank, 'shoe_detail_id': shoe_id, 'score': score,
+                    'generation': generation} for i, (rank, shoe_id, score, generation) in enumerate(ranking, start=1)]
+
+    fake_supabase.seed('shoe_category', categories)
+    fake_supabase.seed('shoe_detail', shoes)
+    fake_supabase.seed('shoe_recomendation_global', global_rows)
+    fake_supabase.seed('recommendation_generation', [{'id': 1, 'active_generation': ACTIVE_GENERATION}])
+
+    path = str(tmp_path / 'overview.db')
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.executescript(SCHEMA)
+        for table, rows in [('shoe_category', categories), ('shoe_detail', shoes),
+                            ('shoe_recomendation_global', global_rows),
+                            ('recommendation_generation', [{'id': 1, 'active_generation': ACTIVE_GENERATION}])]:
+            conn.executemany(f'INSERT INTO {table} ({",".join(rows[0])}) VALUES ({",".join("?" * len(rows[0]))})',
+                             [tuple(row.values()) for row in rows])
+
+    fresh = CatalogIndex(ttl=3600)
+    for module in list(backend_modules()):
+        if isinstance(vars(module).get('catalog_index'), CatalogIndex):
+            monkeypatch.setattr(module, 'catalog_index', fresh)
+    return path
+
+
+@pytest.mark.parametrize('top_n', [1, 3, 5])
+def test_sql_and_fallback_rank_top_items_identically(fake_supabase, catalog, top_n):
+    fallback = get_category_overview(top_n)
+    assert ('rpc', 'category_overview') in fake_supabase.calls
+
+    invalidate_category_overview()
+    fake_supabase.rpcs['category_overview'] = sqlite_category_overview(catalog)
+    from_sql = get_category_overview(top_n)
+
+    assert from_sql == fallback
+    running = fallback[0]['top_items']
+    assert [(item['shoe_detail_id'], item['popularity']) for item in running][:3] == [(2, 7.5), (5, 7.5), (4, 2.0)][:top_n]
+    assert fallback[2] == {'category_id': 3, 'category_name': 'Kosong', 'sku_count': 0, 'in_stock_count': 0,
+                           'min_price': None, 'max_price': None, 'top_items': []}
@@ -0,0 +1,49 @@
+import numpy as np
+
+import cf_engine
+from benchmarks import cf_engine as cf_benchmark
+
+
+def test_build_matrix_sums_duplicates_and_keeps_original_ids():
+    matrix, user_index, item_index = cf_engine.build_interaction_matrix(
+        [7, 7, 3, 7], [100, 100, 200, 300], [1.0, 2.0, 5.0, 1.0])
+    assert user_index.tolist() == [3, 7] and item_index.tolist() == [100, 200, 300]
+    assert matrix.toarray().tolist() == [[0, 5, 0], [3, 0, 1]]
+
+
+def test_top_n_skips_interacted_items_across_chunks():
+    # Skor semua user sama: item 0 > 1 > 2 > 3 > 4 (item 4 skor 0)
+    W = np.ones((4, 1), dtype=np.float32)
+    H = np.array([[4, 3, 2, 1, 0]], dtype=np.float32)
+    users = [0, 0, 1, 2, 3, 3, 3, 3]
+    items = [0, 2, 1, 4, 0, 1, 2, 3]
+    matrix, _, _ = cf_engine.build_interaction_matrix(users, items, [1.0] * len(users))
+
+    tops = np.vstack([top for _, top in cf_engine.iter_top_n(W, H, matrix, top_n=2, chunk_size=3)])
+    assert tops.tolist() == [[1, 3], [0, 2], [0, 1], [-1, -1]]
+
+
+def test_recommend_for_users_returns_unseen_top_n_per_user():
+    # Dua kelompok user dengan selera berbeda; tiap user belum melihat satu item kelompoknya
+    users, items = [], []
+    for user in range(1, 21):
+        group = [10, 11, 12, 13] if user <= 10 else [20, 21, 22, 23]
+        for item in group:
+            if item != group[user % 4]:
+                users.append(user)
+                items.append(item)
+
+    recommendations = cf_engine.recommend_for_users(users, items, [1.0] * len(users), top_n=2, n_components=2)
+
+    assert sorted(recommendations) == list(range(1, 21))
+    for user, picked in recommendations.items():
+        group = [10, 11, 12, 13] if user <= 10 else [20, 21, 22, 23]
+        seen = {i for u, i in zip(users, items) if u == user}
+        assert 1 <= len(picked) <= 2 and not seen & set(picked)
+        assert picked[0] == group[user % 4]
+
+
+def test_benchmark_harness_runs_small():
+    rows = dict(cf_benchmark.run(users=500, items=200, per_user=5, n_components=4, max_iter=20))
+    assert rows['top-10 per user']['users_full'] > 0
+    assert rows['memori matriks']['csr_mb'] < rows['memori matriks']['dense_float32_mb']
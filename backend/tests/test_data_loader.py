@@ -0,0 +1,91 @@
+import pytest
+
+import data_loader
+from data_loader import RequestDataLoader
+from routes.cart import cart_bp
+from routes.userInteraction import user_interaction_bp
+from routes.users import users_bp
+from tests.fake_supabase import backend_modules
+
+ADMIN_ID = 1
+USER_IDS = [2, 3, 4]
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(users_bp, cart_bp, user_interaction_bp)
+
+
+@pytest.fixture
+def seeded(fake_supabase):
+    fake_supabase.seed('user', [{'user_id': ADMIN_ID, 'role': 'Admin'}] +
+                       [{'user_id': u, 'role': 'Customer'} for u in USER_IDS])
+    fake_supabase.seed('shoe_detail', [{'shoe_detail_id': i, 'shoe_name': f'Shoe {i}', 'stock': 10} for i in (1, 2, 3)])
+    fake_supabase.seed('cart', [{'id_cart': 1, 'id_user': USER_IDS[0], 'shoe_detail_id': 1, 'quantity': 1}])
+    return fake_supabase
+
+
+def without_request_loader(monkeypatch):
+    # Setiap lookup memakai loader baru: perilaku sebelum ada loader per request
+    request_loader = data_loader.get_loader
+    for module in list(backend_modules()):
+        if vars(module).get('get_loader') is request_loader:
+            monkeypatch.setattr(module, 'get_loader', RequestDataLoader)
+
+
+def test_loader_memoises_selects_and_batches_point_lookups(seeded):
+    loader = RequestDataLoader(seeded)
+
+    assert loader.select_one('cart', '*', id_cart=1)['quantity'] == 1
+    assert loader.select_one('cart', '*', id_cart=1)['quantity'] == 1
+    pending = [loader.load('user', 'user_id', user_id, 'role') for user_id in USER_IDS + [99]]
+    assert [p.get() and p.get()['role'] for p in pending] == ['Customer'] * 3 + [None]
+    # Id yang tidak ada juga di-memoise
+    assert loader.load_one('user', 'user_id', 99, 'role') is None
+    assert seeded.calls == [('cart', 'select'), ('user', 'select')]
+
+    loader.invalidate('cart')
+    loader.select_one('cart', '*', id_cart=1)
+    assert seeded.calls[-1] == ('cart', 'select') and len(seeded.calls) == 3
+
+
+def admin_batch(app, auth_header):
+    events = [{'id_user': u, 'shoe_detail_id': 1, 'interaction_type': 'view'} for u in USER_IDS]
+    with app.test_client() as client:
+        response = client.post('/api/user_interactions/batch', json={'events': events},
+                               headers=auth_header(app, ADMIN_ID))
+    assert response.get_json()['accepted'] == len(USER_IDS)
+
+
+def delete_user(app, auth_header):
+    with app.test_client() as client:
+        response = client.delete(f'/api/users/{USER_IDS[1]}', headers=auth_header(app, ADMIN_ID))
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('scenario, expected_calls', [
+    (admin_batch, [('user', 'select'), ('shoe_detail', 'select'), ('user_interaction', 'insert'),
+                   ('rpc', 'increment_interaction_counters')]),
+    (delete_user, [('user', 'select'), ('user', 'delete')]),
+])
+def test_request_loader_reduces_round_trips(app, auth_header, seeded, fake_supabase_factory, monkeypatch,
+                                            scenario, expected_calls):
+    scenario(app, auth_header)
+    assert seeded.calls == expected_calls
+
+    fake = fake_supabase_factory()
+    for table, rows in seeded.tables.items():
+        fake.seed(table, rows)
+    without_request_loader(monkeypatch)
+    if scenario is delete_user:
+        fake.seed('user', [{'user_id': USER_IDS[1], 'role': 'Customer'}])
+    scenario(app, auth_header)
+    assert fake.round_trips() > len(expected_calls)
+
+
+def test_update_cart_queues_user_and_stock_lookups(app, auth_header, seeded):
+    with app.test_client() as client:
+        response = client.put('/api/cart/1', json={'quantity': 3}, headers=auth_header(app, USER_IDS[0]))
+    assert response.status_code == 200
+    assert seeded.calls == [('cart', 'select'), ('user', 'select'), ('shoe_detail', 'select'), ('cart', 'update')]
+    assert seeded.tables['cart'][0]['quantity'] == 3
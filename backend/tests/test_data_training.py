@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+import data_training
+from benchmarks import popularity_scoring
+
+
+@pytest.fixture
+def state_store(monkeypatch):
+    """State popularitas disimpan di memori, bukan di instance/popularity_state.joblib."""
+    store = {}
+    monkeypatch.setattr(data_training, 'load_popularity_state', lambda: store.get('state'))
+    monkeypatch.setattr(data_training, 'save_popularity_state', lambda state: store.__setitem__('state', state))
+    return store
+
+
+def interaction(interaction_id, shoe_id, interaction_type, user_id=1):
+    return {
+        'interaction_id': interaction_id,
+        'id_user': user_id,
+        'shoe_detail_id': shoe_id,
+        'interaction_type': interaction_type,
+        'interaction_date': '2026-10-01T10:00:00+08:00'
+    }
+
+
+def top_n(state, n=5):
+    scores = data_training.compute_shoe_scores(state, 'weight').head(n)
+    return list(zip(scores['shoe_detail_id'], scores['score']))
+
+
+def test_incremental_counts_rows_committed_out_of_order(fake_supabase, state_store):
+    # id 3 dan 4 sudah dialokasikan tapi baru commit setelah run pertama membaca id 5..6
+    early = [interaction(1, 10, 'view'), interaction(2, 11, 'order'),
+             interaction(5, 12, 'cart'), interaction(6, 12, 'cart', user_id=2)]
+    late = [interaction(3, 13, 'order'), interaction(4, 13, 'order', user_id=2)]
+    after = [interaction(7, 11, 'wishlist')]
+
+    fake_supabase.seed('user_interaction', early)
+    data_training.update_popularity_state('incremental')
+    fake_supabase.seed('user_interaction', late + after)
+    state, fetched, mode = data_training.update_popularity_state('incremental')
+    assert mode == 'incremental'
+    assert fetched == 3
+    incremental = top_n(state)
+
+    full_state, _, _ = data_training.update_popularity_state('full')
+    assert incremental == top_n(full_state)
+    assert incremental[0] == (13, 6.0)
+
+
+def test_incremental_rerun_does_not_double_count(fake_supabase, state_store):
+    fake_supabase.seed('user_interaction', [interaction(i, 10 + i % 3, 'view') for i in range(1, 20)])
+    data_training.update_popularity_state('incremental')
+    state, fetched, _ = data_training.update_popularity_state('incremental')
+    assert fetched == 0
+    full_state, _, _ = data_training.update_popularity_state('full')
+    assert top_n(state) == top_n(full_state)
+
+
+NOW = np.datetime64('2026-10-01T00:00:00', 'ns')
+DAY = np.timedelta64(1, 'D')
+
+
+def test_decayed_scores_halve_per_half_life():
+    types = ['view', 'order', 'order', 'view', 'unknown', None]
+    dates = np.array([NOW - 14 * DAY, NOW - 90 * DAY, NOW - 180 * DAY, NOW + 3 * DAY, NOW, NOW], dtype='datetime64[ns]')
+    dates[-1] = np.datetime64('NaT')
+    scores = data_training.decayed_scores(types, dates, NOW)
+    # Tanggal di masa depan & NaT dianggap umur 0; tipe tidak dikenal bernilai 0
+    assert np.allclose(scores, [0.25, 1.5, 0.75, 0.5, 0.0, 0.0])
+
+
+def test_decay_without_half_life_equals_weight_sum(monkeypatch):
+    rng = np.random.default_rng(1)
+    types = rng.choice(['view', 'wishlist', 'cart', 'order'], 500)
+    dates = NOW - rng.integers(0, 1000, 500) * DAY
+    no_decay = {t: None for t in data_training.INTERACTION_WEIGHTS}
+    scores = data_training.decayed_scores(types, dates, NOW, half_lives=no_decay)
+    assert np.allclose(scores, [data_training.INTERACTION_WEIGHTS[t] for t in types])
+
+    monkeypatch.setattr(data_training, 'INTERACTION_HALF_LIFE_DAYS', no_decay)
+    state = data_training.new_popularity_state(NOW)
+    data_training.fold_interactions(state, [
+        dict(interaction(i, 10 + i % 4, t, user_id=i % 3), interaction_date=str(d) + 'Z')
+        for i, (t, d) in enumerate(zip(types, dates), start=1)
+    ])
+    decay = data_training.compute_shoe_scores(state, 'decay')
+    weight = data_training.compute_shoe_scores(state, 'weight')
+    assert list(decay['shoe_detail_id']) == list(weight['shoe_detail_id'])
+    assert np.allclose(decay['score'], weight['score'])
+
+
+def test_rescale_then_add_matches_full_rebuild():
+    # Batch pertama semuanya sebelum referensi awal (seperti saat run sungguhan)
+    first = [dict(interaction(i, 10 + i % 3, t), interaction_date=d) for i, (t, d) in enumerate([
+        ('view', '2026-08-01T10:00:00+08:00'), ('order', '2026-08-15T00:00:00Z'), ('cart', '2026-08-10T12:30:00+07:00'),
+        ('wishlist', '2026-08-16T00:00:00+00:00')], start=1)]
+    later = [dict(interaction(i, 10 + i % 3, t), interaction_date=d) for i, (t, d) in enumerate([
+        ('order', '2026-09-20T08:00:00+08:00'), ('view', '2026-09-30T23:00:00Z')], start=5)]
+
+    incremental = data_training.new_popularity_state(NOW - 45 * DAY)
+    data_training.fold_interactions(incremental, first)
+    data_training.advance_decay_reference(incremental, NOW)
+    data_training.fold_interactions(incremental, later)
+
+    full = data_training.new_popularity_state(NOW)
+    data_training.fold_interactions(full, first + later)
+
+    for shoe_id, agg in full['shoes'].items():
+        assert incremental['shoes'][shoe_id]['decayed'] == pytest.approx(agg['decayed'])
+        assert incremental['shoes'][shoe_id]['total_score'] == agg['total_score']
+    assert data_training.compute_shoe_scores(incremental, 'decay')['score'].tolist() == \
+        pytest.approx(data_training.compute_shoe_scores(full, 'decay')['score'].tolist())
+
+
+def test_parse_interaction_dates_matches_pandas_iso8601():
+    values = ['2026-10-01T10:00:00+08:00', '2026-10-01T10:00:00.25Z', '2026-10-01 10:00:00-05:30',
+              '2026-10-01T10:00:00', '2026-13-01T00:00:00+00:00', 'bukan tanggal', None, '2026-10-01T10:00:00+0800']
+    parsed = data_training.parse_interaction_dates(values)
+    expected = data_training._parse_dates_pandas(values)
+    assert [str(v) for v in parsed] == [str(v) for v in expected]
+    assert parsed[0] == np.datetime64('2026-10-01T02:00:00', 'ns')
+
+
+def test_scoring_benchmark_harness_runs_small():
+    rows = dict(popularity_scoring.run(rows=20000, parse_rows=2000))
+    assert rows['groupby (weight, jalur lama)']['shoes'] == rows['decayed_scores + bincount']['shoes']
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+import facets
+from benchmarks import facets as facets_benchmark
+from facets import FacetSnapshot
+
+EDGES = [0.0, 50.0, 100.0, 200.0, 500.0]
+CATEGORIES = {1: 'Running', 2: 'Casual', 3: 'Basket'}
+
+
+def catalog(size=80, seed=3):
+    rng = random.Random(seed)
+    # Harga tepat di batas bucket ikut diuji (batas bawah inklusif, batas atas eksklusif)
+    prices = EDGES + [49.99, 99.99, 199.99, 750.0]
+    return {i: {
+        'shoe_detail_id': i,
+        'shoe_price': rng.choice(prices) if i % 3 == 0 else round(rng.uniform(10, 600), 2),
+        'stock': rng.choice([0, 1, 5]),
+        'category_id': rng.choice(list(CATEGORIES)),
+        'shoe_size': rng.choice([40, 41, 42, '42.5']),
+    } for i in range(1, size + 1)}
+
+
+def brute_force(docs, text_ids=None, category_ids=None, sizes=None, min_price=None, max_price=None,
+                in_stock=False, price_buckets=None):
+    """Hitung facet satu per satu baris: setiap facet memakai semua filter kecuali filter miliknya."""
+    sizes = [str(s) for s in sizes or []]
+
+    def matches(row, skip):
+        return ((text_ids is None or row['shoe_detail_id'] in text_ids)
+                and (not in_stock or row['stock'] > 0)
+                and (skip == 'category' or not category_ids or row['category_id'] in category_ids)
+                and (skip == 'size' or not sizes or str(row['shoe_size']) in sizes)
+                and (skip == 'price' or min_price is None or row['shoe_price'] >= min_price)
+                and (skip == 'price' or max_price is None or row['shoe_price'] <= max_price))
+
+    rows = list(docs.values())
+    edges = price_buckets or facets.DEFAULT_PRICE_BUCKETS
+    categories, size_counts = {}, {}
+    for row in rows:
+        if matches(row, 'category'):
+            categories[row['category_id']] = categories.get(row['category_id'], 0) + 1
+        if matches(row, 'size'):
+            size_counts[str(row['shoe_size'])] = size_counts.get(str(row['shoe_size']), 0) + 1
+    buckets = []
+    for i, low in enumerate(edges):
+        high = edges[i + 1] if i + 1 < len(edges) else None
+        count = sum(1 for row in rows if matches(row, 'price')
+                    and row['shoe_price'] >= low and (high is None or row['shoe_price'] < high))
+        buckets.append({'min': low, 'max': high, 'count': count})
+    return {
+        'total': sum(1 for row in rows if matches(row, None)),
+        'categories': [{'category_id': c, 'category_name': CATEGORIES[c], 'count': n}
+                       for c, n in sorted(categories.items())],
+        'sizes': [{'shoe_size': s, 'count': n} for s, n in sorted(size_counts.items())],
+        'price_buckets': buckets,
+    }
+
+
+FILTERS = [
+    {},
+    {'category_ids': [1]},
+    {'category_ids': [1, 3], 'sizes': [42]},
+    {'sizes': ['42.5', 40], 'in_stock': True},
+    {'min_price': 50, 'max_price': 200},
+    {'min_price': 100, 'category_ids': [2], 'sizes': [41]},
+    {'text_ids': set(range(1, 81, 2)), 'max_price': 99.99},
+    {'text_ids': set(), 'category_ids': [1]},
+    {'category_ids': [99]},
+    {'price_buckets': [100.0, 200.0]},
+    {'price_buckets': [0.0, 49.99, 500.0], 'min_price': 60, 'in_stock': True},
+]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_facet_counts_match_brute_force(filters, monkeypatch):
+    monkeypatch.setattr(facets, 'DEFAULT_PRICE_BUCKETS', EDGES)
+    docs = catalog()
+    snapshot = FacetSnapshot(docs, CATEGORIES, version=1)
+    assert snapshot.facet_counts(**filters) == brute_force(docs, **filters)
+
+
+def test_price_bucket_edges_are_lower_inclusive(monkeypatch):
+    monkeypatch.setattr(facets, 'DEFAULT_PRICE_BUCKETS', EDGES)
+    docs = {i: {'shoe_detail_id': i, 'shoe_price': price, 'stock': 1, 'category_id': 1, 'shoe_size': 42}
+            for i, price in enumerate([0.0, 49.99, 50.0, 100.0, 500.0, 9999.0], start=1)}
+    counts = FacetSnapshot(docs, CATEGORIES, 1).facet_counts()['price_buckets']
+    assert [b['count'] for b in counts] == [2, 1, 1, 0, 2]
+    # Harga di bawah batas bawah bucket pertama tidak masuk bucket mana pun
+    custom = FacetSnapshot(docs, CATEGORIES, 1).facet_counts(price_buckets=[50.0, 500.0])['price_buckets']
+    assert [(b['min'], b['max'], b['count']) for b in custom] == [(50.0, 500.0, 2), (500.0, None, 2)]
+
+
+def test_facet_benchmark_harness_runs_small():
+    rows = dict(facets_benchmark.run(skus=2000, repeat=2))
+    assert rows['snapshot build']['skus'] == 2000
+    assert all('p50_ms' in result for name, result in rows.items() if name != 'snapshot build')
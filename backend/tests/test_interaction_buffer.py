@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+import interaction_buffer
+from interaction_buffer import InteractionBuffer
+
+DEAD_PID = 999999
+
+
+def event(i):
+    return {'id_user': 1, 'shoe_detail_id': i, 'interaction_type': 'view', 'interaction_date': '2026-10-01T10:00:00+08:00'}
+
+
+@pytest.fixture
+def spill_base(tmp_path, monkeypatch):
+    # Journal dengan pid DEAD_PID dianggap milik worker yang sudah mati
+    monkeypatch.setattr(interaction_buffer, '_pid_alive', lambda pid: pid != DEAD_PID)
+    return str(tmp_path / 'instance' / 'interaction_spill.ndjson')
+
+
+def journal(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def journaled_buffer(fake, spill_base, **kwargs):
+    """Buffer dengan journal tanpa thread flusher: batch di-flush manual, 'crash' = tidak pernah di-stop."""
+    os.makedirs(os.path.dirname(spill_base), exist_ok=True)
+    return InteractionBuffer(client=fake, batch_size=2, spill_path=spill_base, **kwargs)
+
+
+def move_to_dead_pid(buffer, spill_base):
+    dead_path = f'{spill_base}.{DEAD_PID}'
+    os.replace(buffer.spill_path, dead_path)
+    return dead_path
+
+
+def recover(fake, spill_base):
+    buffer = InteractionBuffer(client=fake, flush_interval=3600, batch_size=1000, spill_path=spill_base).start()
+    recovered = [e for _, e in buffer._events]
+    buffer.stop()
+    return recovered
+
+
+def test_spill_journal_is_on_by_default():
+    assert interaction_buffer.INTERACTION_SPILL_PATH.endswith(os.path.join('instance', 'interaction_spill.ndjson'))
+
+
+def test_recovery_replays_only_unacked_events(fake_supabase, spill_base):
+    buffer = journaled_buffer(fake_supabase, spill_base)
+    buffer.add([event(i) for i in range(1, 6)])
+    assert buffer._flush_batch() is True
+    assert journal(buffer.spill_path)[-1] == {'ack': 2}
+    move_to_dead_pid(buffer, spill_base)
+
+    assert recover(fake_supabase, spill_base) == [event(i) for i in (3, 4, 5)]
+    # Semua event tersimpan tepat sekali; journal proses pemulih dihapus setelah kosong
+    assert [row['shoe_detail_id'] for row in fake_supabase.tables['user_interaction']] == [1, 2, 3, 4, 5]
+    assert os.listdir(os.path.dirname(spill_base)) == []
+
+
+def test_journal_of_live_worker_is_left_alone(fake_supabase, spill_base, monkeypatch):
+    buffer = journaled_buffer(fake_supabase, spill_base)
+    buffer.add(event(1))
+    live_path = f'{spill_base}.{os.getpid() + 1}'
+    os.replace(buffer.spill_path, live_path)
+    monkeypatch.setattr(interaction_buffer, '_pid_alive', lambda pid: True)
+
+    assert recover(fake_supabase, spill_base) == []
+    assert os.path.exists(live_path)
+
+
+def test_compaction_keeps_only_pending_events(fake_supabase, spill_base):
+    buffer = journaled_buffer(fake_supabase, spill_base, spill_compact_bytes=1)
+    buffer.add([event(i) for i in range(1, 6)])
+    buffer._flush_batch()
+    assert journal(buffer.spill_path) == [{'ack': 2}] + [{'seq': i, 'event': event(i)} for i in (3, 4, 5)]
+    buffer._flush_batch()
+    assert journal(buffer.spill_path) == [{'ack': 4}, {'seq': 5, 'event': event(5)}]
+
+    move_to_dead_pid(buffer, spill_base)
+    assert recover(fake_supabase, spill_base) == [event(5)]
+
+
+def test_recovery_dedups_seq_and_replays_old_format(fake_supabase, spill_base):
+    os.makedirs(os.path.dirname(spill_base))
+    with open(f'{spill_base}.{DEAD_PID}', 'w') as f:
+        # Format lama: satu event per baris, tanpa seq/ack
+        f.write(json.dumps(event(1)) + '\n')
+        f.write('{rusak\n\n')
+        # Baris seq bisa tercatat dua kali (compaction bersamaan dengan producer)
+        for record in [{'seq': 1, 'event': event(2)}, {'seq': 2, 'event': event(3)}, {'seq': 2, 'event': event(3)},
+                       {'ack': 1}, {'seq': 3, 'event': event(4)}]:
+            f.write(json.dumps(record) + '\n')
+
+    assert recover(fake_supabase, spill_base) == [event(1), event(3), event(4)]
+
+
+def test_empty_spill_path_disables_journal(fake_supabase, tmp_path):
+    buffer = InteractionBuffer(client=fake_supabase, spill_path='')
+    buffer.add(event(1))
+    buffer.flush()
+    assert buffer.spill_path is None
+    assert len(fake_supabase.tables['user_interaction']) == 1
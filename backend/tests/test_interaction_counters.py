@@ -0,0 +1,117 @@
+import pytest
+
+import interaction_counters
+from interaction_counters import count_deltas, get_counters, reconcile_counters
+from routes.userInteraction import user_interaction_bp
+
+ADMIN_ID = 1
+USER_ID = 2
+
+
+def increment_interaction_counters(client, p_deltas):
+    # Meniru fungsi SQL: upsert + tambah per (sepatu, tipe)
+    table = client.tables.setdefault('shoe_interaction_counter', [])
+    for item in p_deltas:
+        row = next((r for r in table if r['shoe_detail_id'] == item['shoe_detail_id']), None)
+        if row is None:
+            row = dict(interaction_counters.EMPTY_COUNTERS, shoe_detail_id=item['shoe_detail_id'])
+            table.append(row)
+        column = interaction_counters.COUNTER_COLUMNS[item['interaction_type']]
+        row[column] += item['count']
+    return None
+
+
+def interaction_counts(client):
+    return [{'shoe_detail_id': shoe_id, 'interaction_type': t, 'count': n}
+            for (shoe_id, t), n in count_deltas(client.tables.get('user_interaction', [])).items()]
+
+
+@pytest.fixture
+def seeded(fake_supabase):
+    fake_supabase.rpcs['increment_interaction_counters'] = increment_interaction_counters
+    fake_supabase.seed('user', [{'user_id': ADMIN_ID, 'role': 'Admin'}, {'user_id': USER_ID, 'role': 'Customer'}])
+    fake_supabase.seed('shoe_detail', [{'shoe_detail_id': i, 'shoe_name': f'Shoe {i}', 'stock': 5} for i in (1, 2, 3)])
+    return fake_supabase
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(user_interaction_bp)
+
+
+def counters(fake, shoe_id):
+    row = next((r for r in fake.tables.get('shoe_interaction_counter', []) if r['shoe_detail_id'] == shoe_id), None)
+    return {k: v for k, v in (row or interaction_counters.EMPTY_COUNTERS).items() if k != 'shoe_detail_id'}
+
+
+def test_count_deltas_ignores_unknown_types_and_missing_shoes():
+    events = [{'shoe_detail_id': 1, 'interaction_type': 'view'}, {'shoe_detail_id': '1', 'interaction_type': 'view'},
+              {'shoe_detail_id': 2, 'interaction_type': 'like'}, {'shoe_detail_id': None, 'interaction_type': 'cart'}]
+    assert count_deltas(events) == {(1, 'view'): 2}
+    assert count_deltas(events, -1) == {(1, 'view'): -2}
+
+
+def test_route_writes_apply_counter_deltas(app, auth_header, seeded):
+    events = [{'id_user': USER_ID, 'shoe_detail_id': 1, 'interaction_type': t} for t in ('view', 'view', 'cart')]
+    with app.test_client() as client:
+        client.post('/api/user_interactions/batch', json={'events': events}, headers=auth_header(app, USER_ID))
+        # Event kedua duplikat dalam batch: tidak disimpan dan tidak dihitung
+        assert counters(seeded, 1) == {'view_count': 1, 'wishlist_count': 0, 'cart_count': 1, 'order_count': 0}
+
+        cart_id = next(r['interaction_id'] for r in seeded.tables['user_interaction'] if r['interaction_type'] == 'cart')
+        client.put(f'/api/user_interactions/{cart_id}', json={'interaction_type': 'order'})
+        assert counters(seeded, 1) == {'view_count': 1, 'wishlist_count': 0, 'cart_count': 0, 'order_count': 1}
+
+        client.delete(f'/api/user_interactions/{cart_id}')
+        assert counters(seeded, 1)['order_count'] == 0
+
+
+def test_get_counters_cached_until_deltas_applied(seeded):
+    seeded.seed('shoe_interaction_counter', [dict(interaction_counters.EMPTY_COUNTERS, shoe_detail_id=1, view_count=4)])
+    assert get_counters([1, 2, 1]) == {1: dict(interaction_counters.EMPTY_COUNTERS, view_count=4),
+                                       2: interaction_counters.EMPTY_COUNTERS}
+    before = seeded.round_trips()
+    get_counters([1, 2])
+    assert seeded.round_trips() == before
+
+    interaction_counters.apply_counter_deltas(count_deltas([{'shoe_detail_id': 1, 'interaction_type': 'view'}]))
+    assert get_counters([1])[1]['view_count'] == 5
+
+
+def test_missing_increment_rpc_does_not_fail_the_write(fake_supabase):
+    interaction_counters.apply_counter_deltas(count_deltas([{'shoe_detail_id': 1, 'interaction_type': 'view'}]))
+    assert fake_supabase.calls == [('rpc', 'increment_interaction_counters')]
+
+
+@pytest.mark.parametrize('with_rpc, source', [(True, 'rpc'), (False, 'scan')])
+def test_reconcile_reports_and_fixes_drift(seeded, with_rpc, source):
+    if with_rpc:
+        seeded.rpcs['interaction_counts'] = interaction_counts
+    seeded.seed('user_interaction', [
+        {'interaction_id': i, 'id_user': USER_ID, 'shoe_detail_id': shoe_id, 'interaction_type': t}
+        for i, (shoe_id, t) in enumerate([(1, 'view'), (1, 'view'), (1, 'order'), (2, 'wishlist')], start=1)])
+    seeded.seed('shoe_interaction_counter', [
+        dict(interaction_counters.EMPTY_COUNTERS, shoe_detail_id=1, view_count=5, order_count=1),
+        dict(interaction_counters.EMPTY_COUNTERS, shoe_detail_id=3, cart_count=2),
+    ])
+
+    dry_run = reconcile_counters(apply=False)
+    assert (dry_run['source'], dry_run['applied'], dry_run['drifted_shoes'], dry_run['total_abs_drift']) == \
+        (source, False, 3, 6)
+    assert dry_run['drift'][0] == {'shoe_detail_id': 1, 'drift': {'view_count': 3},
+                                   'expected': dict(interaction_counters.EMPTY_COUNTERS, view_count=2, order_count=1),
+                                   'stored': dict(interaction_counters.EMPTY_COUNTERS, view_count=5, order_count=1)}
+    assert counters(seeded, 1)['view_count'] == 5
+
+    assert reconcile_counters()['applied'] is True
+    assert counters(seeded, 1) == dict(interaction_counters.EMPTY_COUNTERS, view_count=2, order_count=1)
+    assert counters(seeded, 2)['wishlist_count'] == 1 and counters(seeded, 3)['cart_count'] == 0
+    assert reconcile_counters()['drifted_shoes'] == 0
+
+
+def test_reconcile_route_is_admin_only(app, auth_header, seeded):
+    with app.test_client() as client:
+        denied = client.post('/api/user_interactions/counters/reconcile', headers=auth_header(app, USER_ID))
+        ok = client.post('/api/user_interactions/counters/reconcile?dry_run=true', headers=auth_header(app, ADMIN_ID))
+    assert denied.status_code == 403
+    assert ok.status_code == 200 and ok.get_json()['applied'] is False
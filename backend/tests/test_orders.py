@@ -0,0 +1,208 @@
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytz
+
+from routes.orders import orders_bp
+
+USER_ID = 5
+SHOE_COUNT = 20
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(orders_bp)
+
+
+def seed_orders(fake, count):
+    fake.seed('user', [{'user_id': USER_ID, 'role': 'Customer'}])
+    fake.seed('shoe_detail', [{'shoe_detail_id': i, 'shoe_name': f'Shoe {i}', 'shoe_price': 50.0,
+                               'shoe_size': 41, 'category_id': 1} for i in range(1, SHOE_COUNT + 1)])
+    start = date(2026, 1, 1)
+    fake.seed('order', [{
+        'order_id': i,
+        'user_id': USER_ID,
+        'shoe_detail_id': i % SHOE_COUNT + 1,
+        'order_status': 'cancelled' if i % 10 == 0 else 'delivered',
+        'order_date': (start + timedelta(days=i // 3)).isoformat(),
+        'amount': 50.0
+    } for i in range(1, count + 1)])
+
+
+def get(fake, client, headers, url):
+    before = fake.round_trips()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return fake.round_trips() - before, response.get_json()
+
+
+def test_history_page_round_trips_independent_of_order_count(app, auth_header, fake_supabase_factory):
+    counts = []
+    for order_count in (5, 50, 500):
+        fake = fake_supabase_factory()
+        seed_orders(fake, order_count)
+        with app.test_client() as client:
+            count, body = get(fake, client, auth_header(app, USER_ID), '/api/orders/history?limit=100')
+        assert len(body['data']) == min(order_count, 100)
+        assert all(item['shoe_name'].startswith('Shoe ') for item in body['data'])
+        counts.append(count)
+    # Satu query order + satu query shoe_detail in_() per halaman
+    assert counts == [2, 2, 2]
+
+
+def test_history_walks_all_pages_newest_first(app, auth_header, fake_supabase):
+    seed_orders(fake_supabase, 95)
+    headers = auth_header(app, USER_ID)
+    seen, cursor, pages = [], None, 0
+    with app.test_client() as client:
+        while True:
+            url = '/api/orders/history?limit=20&status=delivered&from=2026-01-05' + (f'&cursor={cursor}' if cursor else '')
+            count, body = get(fake_supabase, client, headers, url)
+            # Halaman berikutnya bisa memakai shoe_cache (tanpa query shoe_detail)
+            assert count <= 2
+            seen.extend((item['order_date'], item['order_id']) for item in body['data'])
+            pages += 1
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+    expected = sorted(((o['order_date'], o['order_id']) for o in fake_supabase.tables['order']
+                       if o['order_status'] == 'delivered' and o['order_date'] >= '2026-01-05'), reverse=True)
+    assert seen == expected
+    assert pages == -(-len(expected) // 20)
+
+
+def test_orders_for_user_round_trips_independent_of_order_count(app, auth_header, fake_supabase_factory):
+    counts = []
+    for order_count in (5, 50, 500):
+        fake = fake_supabase_factory()
+        seed_orders(fake, order_count)
+        with app.test_client() as client:
+            count, body = get(fake, client, auth_header(app, USER_ID), f'/api/orders/user/{USER_ID}')
+        assert len(body) == order_count
+        counts.append(count)
+    assert len(set(counts)) == 1, counts
+
+
+CART_SHOES = {1: 3, 2: 1}
+
+
+def decrement_stock(client, p_items):
+    # Meniru fungsi SQL decrement_stock: semua atau tidak sama sekali
+    shoes = {row['shoe_detail_id']: row for row in client.tables['shoe_detail']}
+    short = [{'shoe_detail_id': item['shoe_detail_id'], 'requested': item['quantity'],
+              'available': shoes[item['shoe_detail_id']]['stock']}
+             for item in p_items if shoes[item['shoe_detail_id']]['stock'] < item['quantity']]
+    if short:
+        return {'status': 'insufficient_stock', 'items': short}
+    for item in p_items:
+        shoes[item['shoe_detail_id']]['stock'] -= item['quantity']
+    return {'status': 'ok'}
+
+
+@pytest.fixture
+def checkout_cart(fake_supabase):
+    """Cart user berisi dua sepatu; RPC checkout_cart tidak ada, jadi checkout berjalan bertahap."""
+    fake_supabase.seed('user', [{'user_id': USER_ID, 'role': 'Customer'}])
+    fake_supabase.seed('shoe_detail', [{'shoe_detail_id': 1, 'shoe_name': 'Shoe 1', 'shoe_price': 100.0, 'stock': 5},
+                                       {'shoe_detail_id': 2, 'shoe_name': 'Shoe 2', 'shoe_price': 40.0, 'stock': 1}])
+    fake_supabase.seed('cart', [{'id_cart': i, 'id_user': USER_ID, 'shoe_detail_id': shoe_id, 'quantity': quantity}
+                                for i, (shoe_id, quantity) in enumerate(CART_SHOES.items(), start=1)])
+    fake_supabase.rpcs['decrement_stock'] = decrement_stock
+    return fake_supabase
+
+
+def post_checkout(app, auth_header, body=None):
+    with app.test_client() as client:
+        return client.post('/api/orders/checkout', json=body or {}, headers=auth_header(app, USER_ID))
+
+
+def stock(fake):
+    return {row['shoe_detail_id']: row['stock'] for row in fake.tables['shoe_detail']}
+
+
+def cart(fake):
+    return sorted((row['shoe_detail_id'], row['quantity']) for row in fake.tables['cart'])
+
+
+@pytest.fixture
+def local_time_far_from_wita():
+    # Zona waktu server UTC-12: tanggal lokal berbeda dengan WITA (UTC+8) hampir sepanjang hari
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('TZ', 'Etc/GMT+12')
+        time.tzset()
+        yield
+    time.tzset()
+
+
+def test_checkout_defaults_order_date_to_wita(app, auth_header, checkout_cart, local_time_far_from_wita):
+    response = post_checkout(app, auth_header)
+    assert response.status_code == 201
+    today = datetime.now(pytz.timezone('Asia/Makassar')).date().isoformat()
+    assert {row['order_date'] for row in checkout_cart.tables['order']} == {today}
+    assert {row['payment_date'] for row in checkout_cart.tables['payment']} == {today}
+    assert stock(checkout_cart) == {1: 2, 2: 0} and cart(checkout_cart) == []
+
+
+def test_create_order_defaults_order_date_to_wita(app, auth_header, checkout_cart, local_time_far_from_wita):
+    with app.test_client() as client:
+        response = client.post('/api/orders', json={'shoe_detail_id': 1, 'order_status': 'pending', 'amount': 100.0},
+                               headers=auth_header(app, USER_ID))
+        invalid = client.post('/api/orders', json={'shoe_detail_id': 1, 'order_status': 'pending', 'amount': 1.0,
+                                                   'order_date': '01-10-2026'}, headers=auth_header(app, USER_ID))
+    assert response.status_code == 201 and invalid.status_code == 400
+    assert checkout_cart.tables['order'][0]['order_date'] == datetime.now(pytz.timezone('Asia/Makassar')).date().isoformat()
+
+
+def test_short_stock_returns_409_and_restores_cart(app, auth_header, checkout_cart):
+    checkout_cart.tables['shoe_detail'][1]['stock'] = 0
+    response = post_checkout(app, auth_header)
+
+    assert response.status_code == 409
+    body = response.get_json()
+    assert body['items'] == [{'shoe_detail_id': 2, 'requested': 1, 'available': 0}]
+    assert 'compensation_failed' not in body
+    assert stock(checkout_cart) == {1: 5, 2: 0}
+    assert cart(checkout_cart) == sorted(CART_SHOES.items())
+    assert checkout_cart.tables.get('order', []) == []
+
+
+def test_short_stock_from_checkout_rpc_returns_409(app, auth_header, checkout_cart):
+    items = [{'shoe_detail_id': 1, 'requested': 3, 'available': 2}]
+    checkout_cart.rpcs['checkout_cart'] = lambda client, **params: {'status': 'insufficient_stock', 'items': items}
+    response = post_checkout(app, auth_header)
+    assert response.status_code == 409
+    assert response.get_json() == {'message': 'Insufficient stock available', 'items': items}
+
+
+def test_failed_payment_insert_rolls_back_orders_stock_and_cart(app, auth_header, checkout_cart):
+    # Payment untuk order berikutnya sudah ada: insert payment kena unique violation
+    checkout_cart.unique['payment'] = [('order_id',)]
+    checkout_cart.seed('payment', [{'payment_id': 1, 'order_id': 1, 'payment_status': 'paid'}])
+
+    response = post_checkout(app, auth_header)
+
+    assert response.status_code == 500
+    assert response.get_json() == {'message': 'Checkout failed'}
+    assert checkout_cart.tables['order'] == []
+    assert stock(checkout_cart) == {1: 5, 2: 1}
+    assert cart(checkout_cart) == sorted(CART_SHOES.items())
+
+
+def test_failed_compensation_is_logged_and_reported(app, auth_header, checkout_cart, caplog):
+    checkout_cart.unique['payment'] = [('order_id',)]
+    checkout_cart.seed('payment', [{'payment_id': 1, 'order_id': 1, 'payment_status': 'paid'}])
+
+    def decrement_without_restore(client, p_items):
+        if any(item['quantity'] < 0 for item in p_items):
+            raise ConnectionError('supabase tidak bisa dihubungi')
+        return decrement_stock(client, p_items)
+    checkout_cart.rpcs['decrement_stock'] = decrement_without_restore
+
+    response = post_checkout(app, auth_header)
+
+    assert response.status_code == 500
+    assert response.get_json()['compensation_failed'] == ['restore_stock']
+    # Langkah lain tetap dijalankan
+    assert checkout_cart.tables['order'] == [] and cart(checkout_cart) == sorted(CART_SHOES.items())
+    assert any('restore_stock' in record.getMessage() and record.levelname == 'CRITICAL' for record in caplog.records)
@@ -0,0 +1,147 @@
+import gc
+import json
+import tracemalloc
+
+import pytest
+from flask import Flask
+
+from pagination import encode_cursor, paginated_response
+from streaming import stream_format, stream_response
+from tests.fake_supabase import Result
+
+
+class SyntheticTable:
+    """Query builder untuk tabel berisi `size` baris yang dibuat saat dibaca (tabel tidak ada di memori test)."""
+
+    def __init__(self, size, key='id'):
+        self.size = size
+        self.key = key
+        self.after = 0
+        self._limit = size
+
+    def select(self, columns='*'):
+        return self
+
+    def gt(self, key, value):
+        self.after = value
+        return self
+
+    def order(self, key, desc=False):
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def execute(self):
+        stop = min(self.after + self._limit, self.size)
+        return Result([{self.key: i, 'name': f'row {i}', 'payload': 'x' * 200} for i in range(self.after + 1, stop + 1)])
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def peak_bytes(func):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def stream_all(app, size):
+    with app.test_request_context('/'):
+        response = stream_response(lambda: SyntheticTable(size), 'id')
+        rows = 0
+        for chunk in response.response:
+            rows += chunk.count('\n')
+    assert rows == size
+
+
+def first_page(app, size):
+    with app.test_request_context('/?limit=100'):
+        response, status = paginated_response(SyntheticTable(size), 'id')
+    assert status == 200
+    assert len(response.get_json()['data']) == 100
+
+
+@pytest.mark.parametrize('size', [10_000, 100_000, 1_000_000])
+def test_stream_memory_stays_flat_as_table_grows(app, size):
+    small = peak_bytes(lambda: stream_all(app, 1_000))
+    large = peak_bytes(lambda: stream_all(app, size))
+    # Sampai 1000x lebih banyak baris, puncak memori tetap sebesar satu halaman (+ overhead kecil)
+    assert large < small * 1.5
+
+
+def test_page_memory_stays_flat_as_table_grows(app):
+    small = peak_bytes(lambda: first_page(app, 1_000))
+    large = peak_bytes(lambda: first_page(app, 1_000_000))
+    assert large < small * 1.5
+
+
+@pytest.mark.parametrize('cursor', [
+    encode_cursor(['abc']),
+    encode_cursor([True]),
+    encode_cursor([{'id': 1}]),
+    encode_cursor([1.5]),
+    encode_cursor([1, 2]),
+    'not-a-cursor',
+])
+def test_malformed_cursor_values_return_400(app, cursor):
+    with app.test_request_context(f'/?cursor={cursor}'):
+        response, status = paginated_response(SyntheticTable(10), 'id')
+    assert status == 400
+    assert response.get_json()['message'] == 'Invalid cursor'
+
+
+def test_cursor_walks_every_row_once(app):
+    seen, cursor = [], None
+    while True:
+        with app.test_request_context('/?limit=7' + (f'&cursor={cursor}' if cursor else '')):
+            response, _ = paginated_response(SyntheticTable(30), 'id')
+        body = response.get_json()
+        seen.extend(row['id'] for row in body['data'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert seen == list(range(1, 31))
+
+
+def stream_body(app, url, headers=None, size=2_500):
+    app.add_url_rule('/export', 'export', lambda: stream_response(lambda: SyntheticTable(size), 'id', stream_format()))
+    with app.test_client() as client:
+        response = client.get(url, headers=headers or {})
+    assert response.status_code == 200
+    return response
+
+
+@pytest.mark.parametrize('url, headers', [
+    ('/export?format=ndjson', None),
+    ('/export', {'Accept': 'application/x-ndjson'}),
+    ('/export', {'Accept': 'application/json, application/x-ndjson;q=0.9'}),
+])
+def test_ndjson_export_is_one_valid_object_per_line(app, url, headers):
+    response = stream_body(app, url, headers)
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).split('\n')
+    # Diakhiri newline: elemen terakhir split kosong
+    assert lines[-1] == ''
+    rows = [json.loads(line) for line in lines[:-1]]
+    assert [row['id'] for row in rows] == list(range(1, 2_501))
+
+
+@pytest.mark.parametrize('size', [0, 1, 1_000, 2_500])
+def test_json_stream_export_is_one_valid_array(app, size):
+    response = stream_body(app, '/export?format=json-stream', size=size)
+    assert response.mimetype == 'application/json'
+    rows = json.loads(response.get_data(as_text=True))
+    assert [row['id'] for row in rows] == list(range(1, size + 1))
+
+
+def test_export_without_stream_format_is_not_streamed(app):
+    with app.test_request_context('/export', headers={'Accept': 'application/json'}):
+        assert stream_format() is None
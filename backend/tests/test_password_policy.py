@@ -0,0 +1,109 @@
+import os
+import threading
+
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import password_policy
+import supabase_client
+from password_policy import PasswordVerifyBusy, VerifyPool, needs_rehash
+from routes.shoes import shoes_bp
+from routes.users import users_bp
+
+LOW_COST = 'pbkdf2:sha256:1000'
+
+
+def stored(method, password='rahasia'):
+    return generate_password_hash(password, method=method)
+
+
+@pytest.mark.parametrize('stored_method, policy, allow_downgrade, expected', [
+    ('pbkdf2:sha256:1000', 'pbkdf2:sha256:1000', False, False),
+    ('pbkdf2:sha256:1000', 'pbkdf2:sha256:2000', False, True),
+    # Cost lebih tinggi dari policy tidak diturunkan, kecuali diizinkan
+    ('pbkdf2:sha256:2000', 'pbkdf2:sha256:1000', False, False),
+    ('pbkdf2:sha256:2000', 'pbkdf2:sha256:1000', True, True),
+    ('pbkdf2:sha1:2000', 'pbkdf2:sha256:1000', False, True),
+    ('scrypt:16384:8:1', 'pbkdf2:sha256:1000', False, True),
+    ('scrypt:32768:8:1', 'scrypt:16384:8:1', False, False),
+    # Satu parameter lebih rendah sudah cukup untuk rehash
+    ('scrypt:32768:4:1', 'scrypt:16384:8:1', False, True),
+])
+def test_needs_rehash(stored_method, policy, allow_downgrade, expected):
+    assert needs_rehash(stored(stored_method), policy, allow_downgrade) is expected
+
+
+@pytest.mark.parametrize('stored_hash', ['', None, 'plaintext', 'md5$abc$def', 'pbkdf2:sha256:x$salt$hash'])
+def test_unknown_hash_formats_need_rehash(stored_hash):
+    assert needs_rehash(stored_hash, LOW_COST) is True
+
+
+def test_default_method_is_written_out_in_full():
+    assert password_policy.normalize_method('pbkdf2') == f'pbkdf2:sha256:{password_policy.DEFAULT_PBKDF2_ITERATIONS}'
+    assert password_policy.normalize_method('scrypt') == 'scrypt:32768:8:1'
+    assert not needs_rehash(stored('pbkdf2'), password_policy.normalize_method('pbkdf2:sha256'))
+
+
+@pytest.fixture
+def user_row(fake_supabase, monkeypatch):
+    # verify_and_upgrade meng-import supabase saat rehash, bukan saat modul di-load
+    monkeypatch.setattr(supabase_client, 'supabase', fake_supabase)
+    fake_supabase.seed('user', [{'user_id': 7, 'username': 'budi', 'role': 'User', 'password': stored(LOW_COST)}])
+    return fake_supabase.tables['user'][0]
+
+
+def test_login_rehashes_only_when_policy_changes(user_row, fake_supabase, monkeypatch):
+    monkeypatch.setattr(password_policy, 'needs_rehash', lambda h: needs_rehash(h, LOW_COST))
+    assert password_policy.verify_and_upgrade(dict(user_row), 'rahasia')
+    assert ('user', 'update') not in fake_supabase.calls
+
+    monkeypatch.setattr(password_policy, 'needs_rehash', lambda h: needs_rehash(h, 'pbkdf2:sha256:2000'))
+    monkeypatch.setattr(password_policy, 'hash_password', lambda p: generate_password_hash(p, 'pbkdf2:sha256:2000'))
+    assert not password_policy.verify_and_upgrade(dict(user_row), 'salah')
+    assert ('user', 'update') not in fake_supabase.calls
+    assert password_policy.verify_and_upgrade(dict(user_row), 'rahasia')
+    assert user_row['password'].startswith('pbkdf2:sha256:2000$')
+    assert check_password_hash(user_row['password'], 'rahasia')
+
+
+def test_pool_rejects_when_pending_limit_reached(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_check(stored_hash, password):
+        started.set()
+        release.wait(5)
+        return True
+
+    monkeypatch.setattr(password_policy, 'check_password_hash', slow_check)
+    pool = VerifyPool(workers=1, max_pending=1)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(pool.verify('h', 'p')))
+    worker.start()
+    started.wait(5)
+    with pytest.raises(PasswordVerifyBusy):
+        pool.verify('h', 'p')
+    release.set()
+    worker.join(5)
+    # Slot dilepas setelah verifikasi selesai
+    assert results == [True] and pool.verify('h', 'p') is True
+    pool.executor.shutdown()
+
+
+@pytest.fixture
+def saturated_pool(monkeypatch):
+    pool = VerifyPool(workers=1, max_pending=1)
+    pool.slots.acquire()
+    monkeypatch.setattr(password_policy, 'PASSWORD_VERIFY_WORKERS', 1)
+    monkeypatch.setattr(password_policy, '_pools', {os.getpid(): pool})
+    yield pool
+    pool.executor.shutdown()
+
+
+@pytest.mark.parametrize('blueprint, url', [(users_bp, '/api/users/login'), (shoes_bp, '/api/login')])
+def test_login_returns_503_when_verify_pool_saturated(make_app, user_row, saturated_pool, blueprint, url):
+    app = make_app(blueprint)
+    with app.test_client() as client:
+        response = client.post(url, json={'username': 'budi', 'password': 'rahasia'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json() == {'message': 'Too many login attempts in progress, try again shortly'}
@@ -0,0 +1,52 @@
+import pytest
+
+from routes.shoeRecomendation import shoe_recommendation_bp
+
+# Sampai 200 sepatu per request (IN_QUERY_CHUNK_SIZE): tetap satu query in_()
+LIST_SIZES = [1, 10, 100]
+
+
+def seed_catalog(fake, size, user_id=1):
+    fake.seed('recommendation_generation', [{'id': 1, 'active_generation': 3}])
+    fake.seed('shoe_detail', [{
+        'shoe_detail_id': i, 'shoe_name': f'Shoe {i}', 'shoe_price': 100.0 + i, 'shoe_size': 40,
+        'stock': 5, 'category_id': 1, 'date_added': '2026-01-01', 'last_updated': '2026-01-01'
+    } for i in range(1, 2 * size + 1)])
+    # Override per user (generation null) + ranking global generation aktif
+    fake.seed('shoe_recomendation_for_users', [
+        {'id_shoe_recomendation': i, 'id_user': user_id, 'shoe_detail_id': i, 'generation': None}
+        for i in range(1, size + 1)
+    ])
+    fake.seed('shoe_recomendation_global', [
+        {'id_global_recomendation': i, 'shoe_detail_id': size + i, 'rank': i, 'score': 1.0 / i, 'generation': 3}
+        for i in range(1, size + 1)
+    ])
+
+
+def round_trips(fake, client, url):
+    before = fake.round_trips()
+    response = client.get(url)
+    assert response.status_code == 200
+    return fake.round_trips() - before, response.get_json()
+
+
+@pytest.mark.parametrize('url, expected_items', [
+    ('/api/shoe_recommendations/1', lambda size: 2 * size),
+    ('/api/shoe_recommendations/global', lambda size: size),
+    ('/api/shoe_recommendations?limit=1000', lambda size: size),
+])
+def test_round_trips_constant_with_list_size(make_app, fake_supabase_factory, url, expected_items):
+    app = make_app(shoe_recommendation_bp)
+    counts = []
+    for size in LIST_SIZES:
+        fake = fake_supabase_factory()
+        seed_catalog(fake, size)
+        with app.test_client() as client:
+            count, body = round_trips(fake, client, url)
+        items = body['data'] if isinstance(body, dict) else body
+        assert len(items) == expected_items(size)
+        counts.append(count)
+    assert len(set(counts)) == 1, counts
+    # generation aktif + baris rekomendasi (+ ranking global) + satu in_() shoe_detail
+    assert counts[0] <= 4
+
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import supabase_client
+from benchmarks import supabase_pool
+
+
+@pytest.fixture
+def fresh_clients(monkeypatch):
+    # Client yang dibuat test tidak bocor ke test lain
+    monkeypatch.setattr(supabase_client, '_clients', {})
+    return supabase_client._clients
+
+
+def test_client_is_rebuilt_when_pid_changes(fresh_clients, monkeypatch):
+    client = supabase_client.get_client()
+    assert supabase_client.get_client() is client
+
+    # Proses hasil fork punya pid baru: client & pool induk tidak dipakai lagi
+    monkeypatch.setattr(supabase_client.os, 'getpid', lambda: -1)
+    child = supabase_client.get_client()
+    assert child is not client
+    assert list(fresh_clients) == [-1]
+    assert fresh_clients[-1][1] is not None
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='butuh os.fork')
+def test_forked_worker_builds_its_own_client(fresh_clients):
+    parent_client, parent_http = supabase_client._get_process_client()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            client, http_client = supabase_client._get_process_client()
+            ok = client is not parent_client and http_client is not parent_http \
+                and list(supabase_client._clients) == [os.getpid()]
+            os.write(write_fd, b'1' if ok else b'0')
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 1) == b'1'
+    os.close(read_fd)
+    assert supabase_client._get_process_client() == (parent_client, parent_http)
+
+
+def test_pool_metrics_report_unknown_when_pool_internals_change(fresh_clients, monkeypatch):
+    _, http_client = supabase_client._get_process_client()
+    assert supabase_client.get_pool_metrics()['open_connections'] == 0
+
+    monkeypatch.delattr(type(http_client._transport._pool), 'connections')
+    metrics = supabase_client.get_pool_metrics()
+    assert (metrics['open_connections'], metrics['idle_connections']) == ('unknown', 'unknown')
+    assert metrics['pid'] == os.getpid()
+
+
+def test_pool_benchmark_reuses_connection():
+    rows = dict(supabase_pool.run(requests=5, latency_ms=0))
+    assert rows['pool setelah benchmark'] == {'open': 1, 'idle': 1}
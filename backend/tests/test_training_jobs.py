@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+import app as app_module
+import training_jobs
+from tests.fake_supabase import PartialUnique
+from training_jobs import JobAlreadyRunning, TrainingJobRunner
+
+ADMIN_ID = 1
+CUSTOMER_ID = 2
+
+
+@pytest.fixture
+def runs(fake_supabase):
+    # Seperti idx_training_run_one_running di supabase_schema.sql
+    fake_supabase.unique['training_run'] = [PartialUnique(('status',), {'status': 'running'})]
+    return fake_supabase
+
+
+def blocking_train():
+    """train_func yang menunggu release.set(); dipakai untuk menahan job tetap 'running'."""
+    release = threading.Event()
+
+    def train(progress_callback=None, **params):
+        release.wait(5)
+        return {'status': 'success', 'mode': params.get('mode'), 'total_recommendations': 3}
+    return train, release
+
+
+def test_second_worker_is_rejected_while_training_runs(runs):
+    train, release = blocking_train()
+    worker_a, worker_b = TrainingJobRunner(train), TrainingJobRunner(train)
+
+    job = worker_a.start(mode='full')
+    with pytest.raises(JobAlreadyRunning) as rejected:
+        worker_b.start(mode='incremental')
+    assert rejected.value.job['job_id'] == job['job_id']
+    # Worker lain bisa membaca status job dari training_run
+    assert worker_b.get(job['job_id'])['status'] == 'running'
+
+    release.set()
+    assert worker_a.join(job['job_id'], timeout=5)['status'] == 'success'
+    second = worker_b.start(mode='incremental')
+    worker_b.join(second['job_id'], timeout=5)
+
+    rows = {row['job_id']: row for row in runs.tables['training_run']}
+    assert len(runs.tables['training_run']) == 2
+    assert rows[job['job_id']]['status'] == 'success' and rows[job['job_id']]['rows_written'] == 3
+    assert rows[job['job_id']]['mode'] == 'full' and rows[second['job_id']]['mode'] == 'incremental'
+
+
+def test_stale_running_row_is_released(runs, monkeypatch):
+    monkeypatch.setattr(training_jobs, 'TRAINING_RUN_STALE_SECONDS', 60)
+    runs.seed('training_run', [{'id_training_run': 1, 'job_id': 'dead-worker', 'status': 'running',
+                                'started_at': '2026-01-01T00:00:00+08:00'}])
+    runner = TrainingJobRunner(lambda progress_callback=None, **params: {'status': 'success'})
+
+    job = runner.start(mode='incremental')
+    runner.join(job['job_id'], timeout=5)
+
+    statuses = {row['job_id']: row['status'] for row in runs.tables['training_run']}
+    assert statuses == {'dead-worker': 'abandoned', job['job_id']: 'success'}
+
+
+def test_fresh_running_row_is_not_released(runs):
+    runs.seed('training_run', [{'id_training_run': 1, 'job_id': 'other-worker', 'status': 'running',
+                                'started_at': training_jobs.get_current_time_wita()}])
+    with pytest.raises(JobAlreadyRunning) as rejected:
+        TrainingJobRunner(lambda **params: {}).start(mode='full')
+    assert rejected.value.job['job_id'] == 'other-worker'
+    assert runs.tables['training_run'][0]['status'] == 'running'
+
+
+@pytest.fixture
+def app(runs):
+    runs.seed('user', [{'user_id': ADMIN_ID, 'role': 'Admin'}, {'user_id': CUSTOMER_ID, 'role': 'Customer'}])
+    runs.seed('training_run', [{'id_training_run': 1, 'job_id': 'abc', 'status': 'success',
+                                'started_at': '2026-10-01T00:00:00+08:00'}])
+    return app_module.app
+
+
+@pytest.mark.parametrize('url', ['/api/train_recommendation/jobs', '/api/train_recommendation/jobs/abc',
+                                 '/api/train_recommendation/runs'])
+def test_training_status_routes_require_admin(app, auth_header, url):
+    with app.test_client() as client:
+        anonymous = client.get(url)
+        customer = client.get(url, headers=auth_header(app, CUSTOMER_ID))
+        admin = client.get(url, headers=auth_header(app, ADMIN_ID))
+    assert anonymous.status_code == 401
+    assert customer.status_code == 403
+    assert admin.status_code == 200
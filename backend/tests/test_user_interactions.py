@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import cache
+from routes.userInteraction import user_interaction_bp, INTERACTION_DEDUPE_WINDOW
+
+USER_ID = 3
+OTHER_USER_ID = 4
+ADMIN_ID = 1
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(user_interaction_bp)
+
+
+@pytest.fixture
+def seeded(fake_supabase):
+    fake_supabase.seed('user', [{'user_id': ADMIN_ID, 'role': 'Admin'},
+                                {'user_id': USER_ID, 'role': 'Customer'},
+                                {'user_id': OTHER_USER_ID, 'role': 'Customer'}])
+    fake_supabase.seed('shoe_detail', [{'shoe_detail_id': i, 'shoe_name': f'Shoe {i}', 'stock': 5} for i in (1, 2, 3)])
+    return fake_supabase
+
+
+def post_batch(app, headers, events):
+    with app.test_client() as client:
+        return client.post('/api/user_interactions/batch', json={'events': events}, headers=headers)
+
+
+def event(shoe_id, interaction_type='view', user_id=USER_ID, **extra):
+    return dict({'id_user': user_id, 'shoe_detail_id': shoe_id, 'interaction_type': interaction_type}, **extra)
+
+
+def test_batch_requires_jwt(app, seeded):
+    response = post_batch(app, {}, [event(1)])
+    assert response.status_code == 401
+    assert seeded.tables.get('user_interaction', []) == []
+
+
+def test_batch_reports_result_per_event(app, auth_header, seeded):
+    future = (datetime.now(pytz.timezone('Asia/Makassar')) + timedelta(days=1)).isoformat()
+    events = [
+        event(1),
+        event(1),                              # identik dengan event sebelumnya
+        event(1, 'cart'),                      # tipe berbeda: bukan duplikat
+        event(99),
+        event(2, 'like'),
+        event(2, interaction_date=future),
+        event(2, interaction_date='kemarin'),
+        {'shoe_detail_id': 3},
+        'bukan-event',
+        event(3, interaction_date='2026-01-02T10:00:00'),
+    ]
+
+    response = post_batch(app, auth_header(app, USER_ID), events)
+
+    assert response.status_code == 202
+    body = response.get_json()
+    assert [(r['status'], r.get('reason')) for r in body['results']] == [
+        ('accepted', None),
+        ('duplicate', None),
+        ('accepted', None),
+        ('rejected', 'Shoe not found'),
+        ('rejected', 'Invalid interaction type'),
+        ('rejected', 'Invalid interaction_date'),
+        ('rejected', 'Invalid interaction_date'),
+        ('rejected', 'Missing required fields'),
+        ('rejected', 'Missing required fields'),
+        ('accepted', None),
+    ]
+    assert (body['accepted'], body['duplicate'], body['rejected']) == (3, 1, 6)
+    stored = seeded.tables['user_interaction']
+    assert [(row['shoe_detail_id'], row['interaction_type']) for row in stored] == [(1, 'view'), (1, 'cart'), (3, 'view')]
+    # Tanggal tanpa zona waktu dianggap WITA
+    assert stored[2]['interaction_date'] == '2026-01-02T10:00:00+08:00'
+    # Satu bulk insert untuk semua event yang diterima
+    assert seeded.calls.count(('user_interaction', 'insert')) == 1
+
+
+def test_batch_rejects_other_users_unless_admin(app, auth_header, seeded):
+    events = [event(1), event(2, user_id=OTHER_USER_ID)]
+
+    customer = post_batch(app, auth_header(app, USER_ID), events).get_json()
+    assert [(r['status'], r.get('reason')) for r in customer['results']] == [
+        ('accepted', None), ('rejected', 'Not authorized for this user')]
+
+    admin = post_batch(app, auth_header(app, ADMIN_ID), [event(3), event(3, user_id=OTHER_USER_ID)]).get_json()
+    assert [r['status'] for r in admin['results']] == ['accepted', 'accepted']
+    assert sorted((row['id_user'], row['shoe_detail_id']) for row in seeded.tables['user_interaction']) == [
+        (USER_ID, 1), (USER_ID, 3), (OTHER_USER_ID, 3)]
+
+
+def test_batch_unknown_jwt_user_returns_404(app, auth_header, seeded):
+    response = post_batch(app, auth_header(app, 404), [event(1, user_id=404)])
+    assert response.status_code == 404
+
+
+def test_duplicates_are_dropped_only_within_window(app, auth_header, seeded, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    headers = auth_header(app, USER_ID)
+
+    first = post_batch(app, headers, [event(1)]).get_json()
+    now[0] += INTERACTION_DEDUPE_WINDOW - 1
+    repeat = post_batch(app, headers, [event(1)]).get_json()
+    now[0] += 2
+    after_window = post_batch(app, headers, [event(1)]).get_json()
+
+    assert [first['accepted'], repeat['duplicate'], after_window['accepted']] == [1, 1, 1]
+    assert len(seeded.tables['user_interaction']) == 2
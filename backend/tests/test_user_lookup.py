@@ -0,0 +1,76 @@
+import pytest
+
+import cache
+import user_lookup
+from cache import TTLCache
+from routes.users import users_bp
+
+ADMIN_ID = 1
+USER_ID = 2
+OTHER_ID = 3
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(users_bp)
+
+
+@pytest.fixture
+def seeded(fake_supabase):
+    fake_supabase.seed('user', [
+        {'user_id': ADMIN_ID, 'role': 'Admin', 'username': 'admin'},
+        {'user_id': USER_ID, 'role': 'Customer', 'username': 'budi', 'email': 'b@x.id', 'first_name': 'Budi',
+         'last_name': '', 'address': '', 'phone': ''},
+        {'user_id': OTHER_ID, 'role': 'Customer', 'username': 'sari'},
+    ])
+    return fake_supabase
+
+
+def delete(app, headers, user_id):
+    with app.test_client() as client:
+        return client.delete(f'/api/users/{user_id}', headers=headers)
+
+
+def test_principal_cache_skips_user_lookup_on_repeat(app, auth_header, seeded):
+    headers = auth_header(app, USER_ID)
+    assert delete(app, headers, OTHER_ID).status_code == 403
+    assert seeded.calls == [('user', 'select')]
+    # Request berikutnya: role dari cache, tidak ada round trip ke tabel user
+    assert delete(app, headers, OTHER_ID).status_code == 403
+    assert seeded.calls == [('user', 'select')]
+
+
+def test_delete_invalidates_deleted_user(app, auth_header, seeded):
+    assert user_lookup.user_exists(OTHER_ID)
+    assert delete(app, auth_header(app, ADMIN_ID), OTHER_ID).status_code == 200
+    assert not user_lookup.user_exists(OTHER_ID)
+    assert delete(app, auth_header(app, ADMIN_ID), OTHER_ID).status_code == 404
+
+
+def test_profile_update_invalidates_cached_role(app, auth_header, seeded):
+    headers = auth_header(app, USER_ID)
+    assert user_lookup.get_principal(USER_ID)['role'] == 'Customer'
+    # Role diubah di luar API: cache masih lama sampai user di-invalidate
+    seeded.tables['user'][1]['role'] = 'Admin'
+    assert delete(app, headers, OTHER_ID).status_code == 403
+
+    with app.test_client() as client:
+        response = client.put(f'/api/users/profile/{USER_ID}', json={'first_name': 'Budi S.'}, headers=headers)
+    assert response.status_code == 200
+    assert user_lookup.get_principal(USER_ID)['role'] == 'Admin'
+
+
+def test_principal_expires_after_ttl_and_cache_is_bounded(seeded, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    small = TTLCache(max_size=2, ttl=60)
+    monkeypatch.setattr(user_lookup, 'principal_cache', small)
+
+    user_lookup.fetch_principals([ADMIN_ID, USER_ID, OTHER_ID, 404])
+    # LRU: hanya 2 principal terakhir yang disimpan; id yang tidak ada tidak di-cache
+    assert small.get(ADMIN_ID) is None and small.get(OTHER_ID)['role'] == 'Customer'
+
+    seeded.tables['user'][2]['role'] = 'Admin'
+    assert user_lookup.get_principal(OTHER_ID)['role'] == 'Customer'
+    now[0] += 61
+    assert user_lookup.get_principal(OTHER_ID)['role'] == 'Admin'
@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import pytz
+from supabase_client import supabase
+
+# Jumlah job terakhir yang disimpan di memori untuk endpoint status
+MAX_JOB_HISTORY = 50
+# Baris training_run 'running' yang lebih tua dari ini dianggap milik worker yang sudah mati
+TRAINING_RUN_STALE_SECONDS = int(os.environ.get('TRAINING_RUN_STALE_SECONDS', 6 * 3600))
+
+
+def get_current_time_wita():
+    wita_tz = pytz.timezone('Asia/Makassar')
+    return datetime.now(wita_tz).isoformat()
+
+
+class JobAlreadyRunning(Exception):
+    def __init__(self, job):
+        super().__init__(f'Training job {job["job_id"]} is still running')
+        self.job = job
+
+
+def job_from_run(row):
+    """Status job dari baris training_run (job yang dijalankan worker lain)."""
+    return {
+        'job_id': row['job_id'],
+        'status': row['status'],
+        'params': {k: row[k] for k in ('mode', 'engine') if row.get(k) is not None},
+        'progress': None,
+        'started_at': row['started_at'],
+        'finished_at': row.get('finished_at'),
+        'duration_seconds': row.get('duration_seconds'),
+        'result': None,
+        'error': row.get('error')
+    }
+
+
+class TrainingJobRunner:
+    """
+    Menjalankan train_nmf_model di background thread.
+    - hanya satu job berjalan di semua worker: start() menyisipkan baris training_run
+      status 'running' yang dijaga unique partial index (idx_training_run_one_running);
+      job kedua ditolak dengan JobAlreadyRunning
+    - join() menunggu job selesai (dipakai mode ?sync=true)
+    - status & progress job bisa dibaca lewat get()/list()
+    - setiap run dicatat (durasi, jumlah baris) ke tabel training_run
+    """
+
+    def __init__(self, train_func):
+        self.train_func = train_func
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._running_id = None
+        self._done = {}
+        # job_id yang baris training_run-nya sudah disisipkan saat start()
+        self._claimed = set()
+
+    def start(self, **params):
+        with self._lock:
+            if self._running_id is not None:
+                raise JobAlreadyRunning(dict(self._jobs[self._running_id]))
+
+            job_id = uuid.uuid4().hex
+            job = {
+                'job_id': job_id,
+                'status': 'running',
+                'params': {k: v for k, v in params.items() if v is not None},
+                'progress': {'phase': 'training', 'written': 0, 'total': None},
+                'started_at': get_current_time_wita(),
+                'finished_at': None,
+                'duration_seconds': None,
+                'result': None,
+                'error': None
+            }
+            if self._claim_run(job):
+                self._claimed.add(job_id)
+            self._jobs[job_id] = job
+            self._done[job_id] = threading.Event()
+            self._running_id = job_id
+            while len(self._jobs) > MAX_JOB_HISTORY:
+                old_id, _ = self._jobs.popitem(last=False)
+                self._done.pop(old_id, None)
+                self._claimed.discard(old_id)
+
+        thread = threading.Thread(target=self._run, args=(job_id, params), name=f'training-{job_id[:8]}', daemon=True)
+        thread.start()
+        return dict(job)
+
+    def _on_progress(self, job_id, done, total):
+        with self._lock:
+            self._jobs[job_id]['progress'] = {'phase': 'writing', 'written': done, 'total': total}
+
+    def _run(self, job_id, params):
+        started = time.perf_counter()
+        try:
+            result = self.train_func(
+                progress_callback=lambda done, total: self._on_progress(job_id, done, total),
+                **params
+            )
+            status, error = (result or {}).get('status', 'success'), None
+        except Exception as e:
+            logging.error(f'Training job {job_id} gagal: {e}')
+            result, status, error = None, 'failed', str(e)
+
+        duration = round(time.perf_counter() - started, 3)
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update({
+                'status': status,
+                'progress': dict(job['progress'], phase='done'),
+                'finished_at': get_current_time_wita(),
+                'duration_seconds': duration,
+                'result': result,
+                'error': error
+            })
+            self._running_id = None
+            finished = dict(job)
+
+        self._record_run(finished)
+        with self._lock:
+            done = self._done.get(job_id)
+        if done is not None:
+            done.set()
+
+    def _claim_run(self, job):
+        """
+        Lock lintas worker: sisipkan baris training_run 'running' untuk job ini.
+        Baris 'running' kedua ditolak index (23505) -> JobAlreadyRunning berisi job yang sedang jalan.
+        Return False kalau tabel/index belum bisa dipakai (hanya lock per proses).
+        """
+        for attempt in range(2):
+            try:
+                supabase.table('training_run').insert({
+                    'job_id': job['job_id'],
+                    'status': 'running',
+                    'mode': job['params'].get('mode'),
+                    'engine': job['params'].get('engine'),
+                    'started_at': job['started_at']
+                }).execute()
+                return True
+            except Exception as e:
+                if getattr(e, 'code', None) != '23505':
+                    logging.warning(f'Guard training_run tidak tersedia, hanya lock per proses: {e}')
+                    return False
+            if attempt == 0 and self._release_stale_run():
+                continue
+            running = supabase.table('training_run').select('*').eq('status', 'running').limit(1).execute().data
+            if running:
+                raise JobAlreadyRunning(job_from_run(running[0]))
+        raise JobAlreadyRunning({'job_id': None, 'status': 'running'})
+
+    def _release_stale_run(self):
+        """Tandai baris 'running' yang sudah kedaluwarsa sebagai 'abandoned'; True kalau ada yang dilepas."""
+        cutoff = datetime.now(pytz.timezone('Asia/Makassar')) - timedelta(seconds=TRAINING_RUN_STALE_SECONDS)
+        released = supabase.table('training_run').update({
+            'status': 'abandoned',
+            'finished_at': get_current_time_wita(),
+            'error': f'No result after {TRAINING_RUN_STALE_SECONDS}s, lock released'
+        }).eq('status', 'running').lt('started_at', cutoff.isoformat()).execute().data
+        for row in released or []:
+            logging.warning(f'Training job {row["job_id"]} ditinggal worker lain, lock training_run dilepas')
+        return bool(released)
+
+    def _record_run(self, job):
+        result = job['result'] or {}
+        row = {
+            'status': job['status'],
+            'mode': result.get('mode') or job['params'].get('mode'),
+            'engine': result.get('engine') or job['params'].get('engine'),
+            'finished_at': job['finished_at'],
+            'duration_seconds': job['duration_seconds'],
+            'new_interactions': result.get('new_interactions'),
+            'rows_written': result.get('total_recommendations'),
+            'error': job['error']
+        }
+        with self._lock:
+            claimed = job['job_id'] in self._claimed
+            self._claimed.discard(job['job_id'])
+        try:
+            if claimed:
+                # Update status juga melepas lock 'running' untuk worker lain
+                supabase.table('training_run').update(row).eq('job_id', job['job_id']).execute()
+            else:
+                supabase.table('training_run').insert(
+                    dict(row, job_id=job['job_id'], started_at=job['started_at'])
+                ).execute()
+        except Exception as e:
+            logging.warning(f'Gagal mencatat training_run {job["job_id"]}: {e}')
+
+    def join(self, job_id, timeout=None):
+        """Tunggu job selesai (termasuk pencatatan training_run); kembalikan status job terakhir."""
+        with self._lock:
+            done = self._done.get(job_id)
+        if done is not None:
+            done.wait(timeout)
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        # Job dari worker lain: status dibaca dari training_run
+        rows = supabase.table('training_run').select('*').eq('job_id', job_id).limit(1).execute().data
+        return job_from_run(rows[0]) if rows else None
+
+    def list(self):
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
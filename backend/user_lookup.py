@@ -0,0 +1,82 @@
+import os
+from flask_jwt_extended import get_jwt_identity
+from cache import TTLCache
+from data_loader import get_loader, invalidate_loaded
+
+PRINCIPAL_COLUMNS = 'user_id,role'
+
+# Cache principal per user_id (keberadaan user & role) untuk route yang butuh JWT.
+# Di-invalidate oleh update/delete di routes/users.py; TTL pendek menangkap perubahan di luar API.
+principal_cache = TTLCache(
+    max_size=int(os.environ.get('USER_PRINCIPAL_CACHE_MAX_SIZE', 10000)),
+    ttl=float(os.environ.get('USER_PRINCIPAL_CACHE_TTL', 60))
+)
+
+
+def _as_user_id(user_id):
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_principals(user_ids):
+    """
+    {user_id: {'user_id', 'role'}} untuk user yang ada; hanya id yang belum
+    di cache yang di-query, bersama lookup user lain yang antre di loader request
+    (satu query in_() per chunk).
+    """
+    unique_ids = list(dict.fromkeys(u for u in (_as_user_id(u) for u in user_ids) if u is not None))
+    if not unique_ids:
+        return {}
+    principals, missing = principal_cache.get_many(unique_ids)
+    if missing:
+        fetched = get_loader().load_many('user', 'user_id', missing, PRINCIPAL_COLUMNS)
+        principal_cache.set_many(fetched)
+        principals.update(fetched)
+    return principals
+
+
+def prefetch_principals(user_ids):
+    """
+    Antrekan lookup user yang belum di cache; lookup principal berikutnya dalam
+    request ini menjalankan semuanya dalam satu query in_().
+    """
+    unique_ids = list(dict.fromkeys(u for u in (_as_user_id(u) for u in user_ids) if u is not None))
+    loader = get_loader()
+    for user_id in principal_cache.get_many(unique_ids)[1]:
+        loader.load('user', 'user_id', user_id, PRINCIPAL_COLUMNS)
+
+
+def get_principal(user_id):
+    """Principal satu user ({'user_id', 'role'}) atau None kalau user tidak ada."""
+    user_id = _as_user_id(user_id)
+    if user_id is None:
+        return None
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        # User yang tidak ada juga di-memoise loader selama request ini
+        principal = get_loader().load_one('user', 'user_id', user_id, PRINCIPAL_COLUMNS)
+        if principal is None:
+            return None
+        principal_cache.set(user_id, principal)
+    return principal
+
+
+def current_principal():
+    """Principal user dari JWT request ini (harus di dalam @jwt_required); None kalau user sudah tidak ada."""
+    return get_principal(get_jwt_identity())
+
+
+def current_user_is_admin():
+    principal = current_principal()
+    return principal is not None and principal['role'] == 'Admin'
+
+
+def user_exists(user_id):
+    return get_principal(user_id) is not None
+
+
+def invalidate_user(user_id):
+    principal_cache.invalidate(int(user_id))
+    invalidate_loaded('user')
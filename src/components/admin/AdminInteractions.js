@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import Swal from 'sweetalert2';
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function AdminInteractions({ accessToken }) {
   const [interactions, setInteractions] = useState([]);
@@ -16,8 +17,8 @@ function AdminInteractions({ accessToken }) {
   const authHeaders = { headers: { Authorization: `Bearer ${accessToken}` } };
 
   const fetchInteractions = () => {
-    axios.get(`${API_URL}/user_interactions`, authHeaders)
-      .then(response => setInteractions(response.data))
+    fetchAllPages(`${API_URL}/user_interactions`, authHeaders)
+      .then(setInteractions)
       .catch(error => console.error('Error fetching interactions:', error));
   };
 
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from "react";
 import axios from "axios";
 import Swal from "sweetalert2";
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function AdminOrders({ accessToken }) {
   const [orders, setOrders] = useState([]);
@@ -14,8 +15,8 @@ function AdminOrders({ accessToken }) {
   }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
   const fetchOrders = () => {
-    axios.get(`${API_URL}/orders`, authHeaders)
-      .then((response) => setOrders(response.data))
+    fetchAllPages(`${API_URL}/orders`, authHeaders)
+      .then(setOrders)
       .catch((error) => console.error("Error fetching orders:", error));
   };
 
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from "react";
 import axios from "axios";
 import Swal from "sweetalert2";
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function AdminPayments({ accessToken }) {
   const [payments, setPayments] = useState([]);
@@ -15,8 +16,7 @@ function AdminPayments({ accessToken }) {
 
   const fetchPayments = async () => {
     try {
-      const response = await axios.get(`${API_URL}/payments`, authHeaders);
-      setPayments(response.data);
+      setPayments(await fetchAllPages(`${API_URL}/payments`, authHeaders));
     } catch (error) {
       console.error("Error fetching payments:", error);
     }
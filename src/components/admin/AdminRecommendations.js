@@ -2,27 +2,46 @@ import React, { useState, useEffect } from "react";
 import axios from "axios";
 import Swal from "sweetalert2";
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function AdminRecommendations({ accessToken }) {
   const [recommendations, setRecommendations] = useState([]);
+  const [globalRanking, setGlobalRanking] = useState([]);
   const [loading, setLoading] = useState(true);
   const [training, setTraining] = useState(false);
   const [trainingResult, setTrainingResult] = useState(null);
 
   const fetchRecommendations = async () => {
-    try {
-      const response = await axios.get(`${API_URL}/shoe_recommendations`, {
+    // Ranking global (dipakai semua user) dan override per user diambil bersamaan
+    const [userResult, globalResult] = await Promise.allSettled([
+      fetchAllPages(`${API_URL}/shoe_recommendations`, {
         headers: { Authorization: `Bearer ${accessToken}` },
-      });
-      setRecommendations(response.data || []);
-    } catch (error) {
-      console.error("Error fetching recommendations:", error);
+      }),
+      axios.get(`${API_URL}/shoe_recommendations/global`),
+    ]);
+    if (userResult.status === "fulfilled") {
+      setRecommendations(userResult.value);
+    } else {
+      console.error("Error fetching recommendations:", userResult.reason);
       setRecommendations([]);
-    } finally {
-      setLoading(false);
     }
+    if (globalResult.status === "fulfilled") {
+      setGlobalRanking(globalResult.value.data || []);
+    } else {
+      console.error("Error fetching global ranking:", globalResult.reason);
+      setGlobalRanking([]);
+    }
+    setLoading(false);
   };
 
+  const formatPrice = (price) => price?.toLocaleString("id-ID", {style: "currency", currency: "IDR", minimumFractionDigits: 0});
+
+  const stockBadge = (stock) => (
+    <span className={`text-xs font-bold px-2 py-0.5 rounded-md ${stock > 10 ? 'bg-emerald-500/10 text-emerald-400' : stock > 0 ? 'bg-amber-500/10 text-amber-400' : 'bg-red-500/10 text-red-400'}`}>
+      {stock}
+    </span>
+  );
+
   useEffect(() => {
     fetchRecommendations();
   }, []); // eslint-disable-line react-hooks/exhaustive-deps
@@ -34,11 +53,24 @@ function AdminRecommendations({ accessToken }) {
       const response = await axios.post(`${API_URL}/train_recommendation`, {}, {
         headers: { Authorization: `Bearer ${accessToken}` },
       });
-      setTrainingResult({ success: true, message: response.data.message || "Training completed!", status: response.data.status });
+      // Training berjalan di background: polling status job sampai selesai
+      let job = response.data.job;
+      while (job && job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const jobResponse = await axios.get(`${API_URL}/train_recommendation/jobs/${job.job_id}`, {
+          headers: { Authorization: `Bearer ${accessToken}` },
+        });
+        job = jobResponse.data;
+      }
+      if (job && job.status === "failed") {
+        throw Object.assign(new Error(job.error), { response: { data: { error: job.error } } });
+      }
+      const result = job ? job.result || {} : response.data;
+      setTrainingResult({ success: true, message: result.message || "Training completed!", status: result.status });
       Swal.fire({
-        icon: response.data.status === "skipped" ? "info" : "success",
-        title: response.data.status === "skipped" ? "Skipped" : "Complete!",
-        text: response.data.message,
+        icon: result.status === "skipped" ? "info" : "success",
+        title: result.status === "skipped" ? "Skipped" : "Complete!",
+        text: result.message,
         background: '#1c1917', color: '#fff', confirmButtonColor: '#f59e0b', timer: 3000, timerProgressBar: true,
       });
       await fetchRecommendations();
@@ -121,8 +153,9 @@ function AdminRecommendations({ accessToken }) {
         )}
 
         {/* Stats */}
-        <div className="grid grid-cols-3 gap-3 mb-8">
+        <div className="grid grid-cols-2 sm:grid-cols-4 gap-3 mb-8">
           {[
+            { label: "Global Top", value: globalRanking.length, color: "text-emerald-400" },
             { label: "Total", value: recommendations.length, color: "text-white" },
             { label: "Users", value: Object.keys(groupedByUser).length, color: "text-amber-400" },
             { label: "Avg/User", value: Object.keys(groupedByUser).length > 0 ? Math.round(recommendations.length / Object.keys(groupedByUser).length) : 0, color: "text-amber-400" },
@@ -142,7 +175,7 @@ function AdminRecommendations({ accessToken }) {
               <div className="absolute inset-0 rounded-full border-4 border-transparent border-t-amber-500 animate-spin"></div>
             </div>
           </div>
-        ) : recommendations.length === 0 ? (
+        ) : recommendations.length === 0 && globalRanking.length === 0 ? (
           <div className="bg-stone-900 rounded-2xl border border-stone-800 p-12 text-center">
             <svg className="w-12 h-12 text-stone-700 mx-auto mb-3" fill="none" stroke="currentColor" viewBox="0 0 24 24" strokeWidth={1.5}>
               <path strokeLinecap="round" strokeLinejoin="round" d="M9.663 17h4.673M12 3v1m6.364 1.636l-.707.707M21 12h-1M4 12H3m3.343-5.657l-.707-.707m2.828 9.9a5 5 0 117.072 0l-.548.547A3.374 3.374 0 0014 18.469V19a2 2 0 11-4 0v-.531c0-.895-.356-1.754-.988-2.386l-.548-.547z" />
@@ -152,6 +185,40 @@ function AdminRecommendations({ accessToken }) {
           </div>
         ) : (
           <div className="space-y-4">
+            {globalRanking.length > 0 && (
+              <div className="bg-stone-900 rounded-2xl border border-stone-800 overflow-hidden">
+                <div className="px-5 py-3 border-b border-stone-800 flex items-center gap-3">
+                  <div className="w-7 h-7 rounded-lg bg-emerald-500/10 flex items-center justify-center">
+                    <svg className="w-4 h-4 text-emerald-400" fill="none" stroke="currentColor" viewBox="0 0 24 24" strokeWidth={2}><path strokeLinecap="round" strokeLinejoin="round" d="M3.055 11H5a2 2 0 012 2v1a2 2 0 002 2 2 2 0 012 2v2.945M8 3.935V5.5A2.5 2.5 0 0010.5 8h.5a2 2 0 012 2 2 2 0 104 0 2 2 0 012-2h1.064M15 20.488V18a2 2 0 012-2h3.064M21 12a9 9 0 11-18 0 9 9 0 0118 0z" /></svg>
+                  </div>
+                  <span className="text-sm font-medium text-white">Global Ranking</span>
+                  <span className="text-xs text-stone-500">shown to every user without a personal override</span>
+                </div>
+                <div className="overflow-x-auto">
+                  <table className="w-full">
+                    <thead>
+                      <tr className="border-b border-stone-800/50">
+                        {['#','Shoe','Price','Size','Stock','Score'].map((h,i) => (
+                          <th key={i} className={`px-5 py-2 text-[10px] font-semibold text-stone-500 uppercase tracking-widest ${i === 5 ? 'text-right' : 'text-left'}`}>{h}</th>
+                        ))}
+                      </tr>
+                    </thead>
+                    <tbody>
+                      {globalRanking.map((row) => (
+                        <tr key={row.shoe_detail_id} className="border-b border-stone-800/30 hover:bg-stone-800/20 transition-colors">
+                          <td className="px-5 py-2.5 text-sm font-bold text-amber-400">{row.rank}</td>
+                          <td className="px-5 py-2.5 text-sm font-medium text-white">{row.shoe_name}</td>
+                          <td className="px-5 py-2.5 text-sm text-emerald-400">{formatPrice(row.shoe_price)}</td>
+                          <td className="px-5 py-2.5 text-sm text-stone-300">{row.shoe_size}</td>
+                          <td className="px-5 py-2.5">{stockBadge(row.stock)}</td>
+                          <td className="px-5 py-2.5 text-sm text-stone-400 text-right">{row.score != null ? Number(row.score).toFixed(2) : '-'}</td>
+                        </tr>
+                      ))}
+                    </tbody>
+                  </table>
+                </div>
+              </div>
+            )}
             {Object.entries(groupedByUser).map(([userId, recs]) => (
               <div key={userId} className="bg-stone-900 rounded-2xl border border-stone-800 overflow-hidden">
                 <div className="px-5 py-3 border-b border-stone-800 flex items-center gap-3">
@@ -174,13 +241,9 @@ function AdminRecommendations({ accessToken }) {
                       {recs.map((rec) => (
                         <tr key={rec.id_shoe_recomendation} className="border-b border-stone-800/30 hover:bg-stone-800/20 transition-colors">
                           <td className="px-5 py-2.5 text-sm font-medium text-white">{rec.shoe_name}</td>
-                          <td className="px-5 py-2.5 text-sm text-emerald-400">{rec.shoe_price?.toLocaleString("id-ID", {style: "currency", currency: "IDR", minimumFractionDigits: 0})}</td>
+                          <td className="px-5 py-2.5 text-sm text-emerald-400">{formatPrice(rec.shoe_price)}</td>
                           <td className="px-5 py-2.5 text-sm text-stone-300">{rec.shoe_size}</td>
-                          <td className="px-5 py-2.5">
-                            <span className={`text-xs font-bold px-2 py-0.5 rounded-md ${rec.stock > 10 ? 'bg-emerald-500/10 text-emerald-400' : rec.stock > 0 ? 'bg-amber-500/10 text-amber-400' : 'bg-red-500/10 text-red-400'}`}>
-                              {rec.stock}
-                            </span>
-                          </td>
+                          <td className="px-5 py-2.5">{stockBadge(rec.stock)}</td>
                           <td className="px-5 py-2.5 text-right">
                             <button onClick={() => handleDeleteRecommendation(rec.id_shoe_recomendation)} className="p-1.5 rounded-lg bg-red-500/10 text-red-400 hover:bg-red-500/20 transition-colors" title="Delete">
                               <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24" strokeWidth={2}><path strokeLinecap="round" strokeLinejoin="round" d="M19 7l-.867 12.142A2 2 0 0116.138 21H7.862a2 2 0 01-1.995-1.858L5 7m5 4v6m4-6v6m1-10V4a1 1 0 00-1-1h-4a1 1 0 00-1 1v3M4 7h16" /></svg>
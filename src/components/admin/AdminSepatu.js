@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import Swal from 'sweetalert2';
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function AdminSepatu({ accessToken }) {
   const [categories, setCategories] = useState([]);
@@ -15,10 +16,8 @@ function AdminSepatu({ accessToken }) {
   }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
   const fetchCategories = () => {
-    axios.get(`${API_URL}/categories`, authHeaders)
-      .then(response => {
-        setCategories(response.data);
-      })
+    fetchAllPages(`${API_URL}/categories`, authHeaders)
+      .then(setCategories)
       .catch(error => {
         console.error('Error fetching categories:', error);
       });
@@ -3,6 +3,7 @@ import axios from 'axios';
 import Swal from 'sweetalert2';
 import { useNavigate } from 'react-router-dom';
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function AdminSepatuDetail() {
   const navigate = useNavigate();
@@ -22,8 +23,8 @@ function AdminSepatuDetail() {
   }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
   const fetchShoes = () => {
-    axios.get(`${API_URL}/shoes`)
-      .then(response => setShoes(response.data))
+    fetchAllPages(`${API_URL}/shoes`)
+      .then(setShoes)
       .catch(error => console.error('Error fetching shoes:', error));
   };
 
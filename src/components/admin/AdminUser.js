@@ -2,6 +2,7 @@ import React, { useEffect, useState, useCallback } from "react";
 import axios from "axios";
 import Swal from "sweetalert2";
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function AdminUser({ accessToken }) {
   const [users, setUsers] = useState([]);
@@ -10,9 +11,8 @@ function AdminUser({ accessToken }) {
   const authHeaders = { headers: { Authorization: `Bearer ${accessToken}` } };
 
   const fetchUsers = useCallback(() => {
-    axios
-      .get(`${API_URL}/users`, authHeaders)
-      .then((response) => setUsers(response.data))
+    fetchAllPages(`${API_URL}/users`, authHeaders)
+      .then(setUsers)
       .catch((error) => console.error("Error fetching users:", error));
   }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
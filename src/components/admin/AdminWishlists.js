@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import Swal from 'sweetalert2';
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function AdminWishlists({ accessToken }) {
   const [wishlists, setWishlists] = useState([]);
@@ -16,8 +17,8 @@ function AdminWishlists({ accessToken }) {
   const authHeaders = { headers: { Authorization: `Bearer ${accessToken}` } };
 
   const fetchWishlists = () => {
-    axios.get(`${API_URL}/wishlist`, authHeaders)
-      .then(response => setWishlists(response.data))
+    fetchAllPages(`${API_URL}/wishlist`, authHeaders)
+      .then(setWishlists)
       .catch(error => console.error('Error fetching wishlists:', error));
   };
 
@@ -127,71 +127,39 @@ function Cart({ userId, accessToken }) {
     setLoading(true);
     try {
       const today = new Date().toISOString().split('T')[0];
-      let successCount = 0;
-      let failedItems = [];
-
-      for (const item of cartItems) {
-        try {
-          // Create order
-          const orderResponse = await fetch(`${API_URL}/orders`, {
-            method: 'POST',
-            headers: {
-              Authorization: `Bearer ${accessToken}`,
-              'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-              shoe_detail_id: item.shoe_detail_id,
-              order_date: today,
-              order_status: 'pending',
-              amount: item.shoe_price * item.quantity,
-            }),
-          });
-          const orderData = await orderResponse.json();
-
-          // Create payment for this order
-          if (orderData.order_id) {
-            try {
-              await fetch(`${API_URL}/payments`, {
-                method: 'POST',
-                headers: {
-                  Authorization: `Bearer ${accessToken}`,
-                  'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                  order_id: orderData.order_id,
-                  payment_method: 'Cash on Delivery',
-                  payment_status: 'pending',
-                  payment_date: today,
-                }),
-              });
-            } catch (payErr) {
-              console.error('Payment creation error:', payErr);
-            }
-          }
-
-          // Delete cart item after order created
-          await fetch(`${API_URL}/cart/${item.id_cart}`, {
-            method: 'DELETE',
-            headers: {
-              Authorization: `Bearer ${accessToken}`,
-              'Content-Type': 'application/json',
-            },
-          });
-          successCount++;
-        } catch (err) {
-          failedItems.push(item.shoe_name);
-        }
-      }
+
+      // Satu request untuk seluruh cart: order, payment, stock & cart diproses di server
+      const response = await fetch(`${API_URL}/orders/checkout`, {
+        method: 'POST',
+        headers: {
+          Authorization: `Bearer ${accessToken}`,
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          cart_ids: cartItems.map((item) => item.id_cart),
+          order_date: today,
+          order_status: 'pending',
+          payment_method: 'Cash on Delivery',
+          payment_status: 'pending',
+        }),
+      });
+      const result = await response.json();
 
       setLoading(false);
       setShowModal(false);
 
-      if (failedItems.length > 0) {
-        alert(`${successCount} order(s) placed. Failed: ${failedItems.join(', ')}`);
-      } else {
-        alert(`${successCount} order(s) placed successfully!`);
+      if (!response.ok) {
+        const failedItems = (result.items || [])
+          .map((short) => cartItems.find((item) => item.shoe_detail_id === short.shoe_detail_id))
+          .filter(Boolean)
+          .map((item) => item.shoe_name);
+        alert(failedItems.length > 0
+          ? `${result.message}: ${failedItems.join(', ')}`
+          : result.message || 'Failed to process checkout. Please try again.');
+        return;
       }
 
+      alert(`${result.order_ids.length} order(s) placed successfully!`);
       navigate('/orders');
     } catch (error) {
       setLoading(false);
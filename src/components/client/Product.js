@@ -3,6 +3,7 @@ import { useNavigate } from "react-router-dom";
 import axios from "axios";
 import Swal from 'sweetalert2';
 import API_URL from '../../config/api';
+import fetchAllPages from '../../utils/fetchAllPages';
 
 function Product({ userId, accessToken }) {
   const [shoes, setShoes] = useState([]);
@@ -69,14 +70,14 @@ function Product({ userId, accessToken }) {
     console.log("Token preview:", accessToken?.substring(0, 20) + "...");
     
     try {
-      const response = await axios.get(`${API_URL}/shoes`, {
+      const allShoes = await fetchAllPages(`${API_URL}/shoes`, {
         headers: {
           Authorization: `Bearer ${accessToken}`,
         },
       });
 
-      console.log("Shoes fetched successfully:", response.data.length, "items");
-      const shuffledShoes = shuffleArray([...response.data]);
+      console.log("Shoes fetched successfully:", allShoes.length, "items");
+      const shuffledShoes = shuffleArray(allShoes);
       setShoes(shuffledShoes);
     } catch (error) {
       console.error("Error fetching shoes:", error);
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import axios from "axios";
 import API_URL from '../../config/api';
+import { trackView } from '../../utils/viewTracker';
 
 function ShoeDetail() {
   const { id } = useParams();
@@ -20,6 +21,7 @@ function ShoeDetail() {
           { headers: { Authorization: `Bearer ${token}` } }
         );
         setShoe(response.data);
+        trackView(response.data.shoe_detail_id);
       } catch (error) {
         console.error("Error fetching shoe details:", error);
         setError("Error fetching data. Please try again later.");
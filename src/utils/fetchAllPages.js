@@ -0,0 +1,20 @@
+import axios from 'axios';
+
+// Batas halaman maksimum di backend (MAX_PAGE_LIMIT)
+const PAGE_LIMIT = 1000;
+
+// Ambil semua halaman endpoint list keyset: ikuti next_cursor sampai habis.
+// Memakai bentuk envelope ({data, next_cursor}) supaya tidak butuh header X-Next-Cursor lewat CORS.
+export const fetchAllPages = async (url, config = {}) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const params = { ...config.params, limit: PAGE_LIMIT, ...(cursor ? { cursor } : {}) };
+    const response = await axios.get(url, { ...config, params });
+    items.push(...response.data.data);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return items;
+};
+
+export default fetchAllPages;
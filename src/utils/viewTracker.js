@@ -0,0 +1,46 @@
+import API_URL from '../config/api';
+
+// Event view dikumpulkan lalu dikirim berkelompok ke /user_interactions/views
+const FLUSH_INTERVAL_MS = 5000;
+const MAX_BATCH = 50;
+
+let pending = [];
+let timer = null;
+
+const flush = () => {
+  timer = null;
+  const token = localStorage.getItem('token');
+  if (pending.length === 0 || !token) {
+    pending = [];
+    return;
+  }
+  const events = pending;
+  pending = [];
+  fetch(`${API_URL}/user_interactions/views`, {
+    method: 'POST',
+    keepalive: true,
+    headers: {
+      Authorization: `Bearer ${token}`,
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ events }),
+  }).catch((error) => console.error('Error sending view events:', error));
+};
+
+export const trackView = (shoeDetailId) => {
+  pending.push({ shoe_detail_id: shoeDetailId, interaction_date: new Date().toISOString() });
+  if (pending.length >= MAX_BATCH) {
+    clearTimeout(timer);
+    flush();
+  } else if (!timer) {
+    timer = setTimeout(flush, FLUSH_INTERVAL_MS);
+  }
+};
+
+// Kirim sisa event saat tab ditutup / disembunyikan
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', () => {
+    clearTimeout(timer);
+    flush();
+  });
+}